@@ -0,0 +1,320 @@
+"""Benchmarks of the productline_metamodel operations and the configuration readers/writers.
+
+For each combination of number of features and number of products, a synthetic feature model
+and a random portfolio are generated (see benchmarks/synthetic.py), and each benchmark is run
+`--repeat` times (the minimum time is reported) plus once under tracemalloc to record the
+peak memory. The results are saved as JSON, and a previous result file can be given with
+`--compare` to print the time ratios between both runs.
+
+Usage (from the root of the repository):
+    python -m benchmarks.run_benchmarks --features 20 200 --products 10 1000 -o results.json
+    python -m benchmarks.run_benchmarks -o new.json --compare results.json
+    python -m benchmarks.run_benchmarks --large  # Also 10^6 products
+"""
+import argparse
+import csv
+import datetime
+import gc
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from flamapy.metamodels.fm_metamodel.transformations import UVLReader
+from flamapy.metamodels.pysat_metamodel.transformations import FmToPysat
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry, ProductLineModel
+from flamapy.metamodels.productline_metamodel.operations import (
+    FullConfigurations,
+    FullConfigurationsCubes,
+    PLInclusionMatrix,
+    PLProductDistribution,
+    PLFeatureInclusionFrequency,
+    PLFeatureInclusionProbability
+)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext
+)
+from utils import (
+    ConfigurationsCSVWriter,
+    ConfigurationsCSVReader,
+    ConfigurationsListWriter,
+    ConfigurationsListReader,
+    ConfigurationsAttributesReader,
+    ConfigurationsBinaryWriter,
+    ConfigurationsBinaryReader
+)
+
+from .synthetic import synthetic_uvl, random_portfolio, random_partial_configurations
+
+
+DEFAULT_FEATURES = [20, 200, 2000]
+DEFAULT_PRODUCTS = [10, 1000, 100000]
+LARGE_PRODUCTS = [1000000]  # Added to the products with --large
+FULL_CONFIGURATIONS_PARTIALS = 10
+FULL_CONFIGURATIONS_MAX_SOLUTIONS = 100
+
+
+class BenchmarkCase:
+    """Synthetic feature model and portfolio of a given size, with their files in a temporary
+    directory."""
+
+    def __init__(self, n_features: int, n_products: int, density: float, seed: int) -> None:
+        self.n_features = n_features
+        self.n_products = n_products
+        self.directory = tempfile.mkdtemp(prefix='plbench_')
+        self.fm_path = self.path('model.uvl')
+        with open(self.fm_path, 'w', encoding='utf-8') as file:
+            file.write(synthetic_uvl(n_features, seed=seed))
+        self.fm_model = UVLReader(self.fm_path).transform()
+        self.sat_model = FmToPysat(self.fm_model).transform()
+        self.features = [feature.name for feature in self.fm_model.get_features()]
+        self.products = random_portfolio(self.features, n_products, density, seed)
+        self.pl_model = ProductLineModel()
+        self.pl_model.configurations = self.products
+        self.registry = FeatureRegistry.get(self.fm_model)
+        self.id_rows = [self.registry.ids(config.get_selected_elements(), add=False)
+                        for config in self.products]
+        self.partial_configurations = random_partial_configurations(
+            self.sat_model, FULL_CONFIGURATIONS_PARTIALS, seed=seed)
+        # Input files for the readers
+        self.write_csv(self.path('configs.csv'))
+        self.write_list(self.path('configs.txt'))
+        self.write_attributes(self.path('attributes.csv'))
+        self.write_binary(self.path('configs.plb'))
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def write_csv(self, path: str) -> None:
+        writer = ConfigurationsCSVWriter(path)
+        writer.set_elements(self.features)
+        writer.set_configurations(self.products)
+        writer.write()
+
+    def write_list(self, path: str) -> None:
+        writer = ConfigurationsListWriter(path)
+        writer.set_configurations(self.products)
+        writer.write()
+
+    def write_attributes(self, path: str) -> None:
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Configuration', 'Price'])
+            for i, config in enumerate(self.products):
+                writer.writerow([str(config.get_selected_elements()), f'{i % 100}.50'])
+
+    def write_binary(self, path: str) -> None:
+        writer = ConfigurationsBinaryWriter(path)
+        writer.set_elements(self.features)
+        writer.set_configurations(self.products)
+        writer.write()
+
+    def reset_context(self) -> None:
+        """Replace the solver of the shared context of the model by a fresh one, so that each
+        run of the enumerations starts from the same state (without the clauses learnt in the
+        previous runs)."""
+        context = FullConfigurationsContext.get(self.sat_model)
+        context.close()
+        context.solver  # pylint: disable=pointless-statement
+
+    def full_configurations_context(self) -> None:
+        context = FullConfigurationsContext(self.sat_model)
+        context.solver  # pylint: disable=pointless-statement
+        context.close()
+
+    def full_configurations(self) -> None:
+        for configuration in self.partial_configurations:
+            operation = FullConfigurations()
+            operation.set_configuration(configuration)
+            operation.set_max_solutions(FULL_CONFIGURATIONS_MAX_SOLUTIONS)
+            operation.execute(self.sat_model)
+
+    def full_configurations_cubes(self) -> None:
+        for configuration in self.partial_configurations:
+            operation = FullConfigurationsCubes()
+            operation.set_configuration(configuration)
+            operation.set_max_solutions(FULL_CONFIGURATIONS_MAX_SOLUTIONS)
+            operation.execute(self.sat_model)
+
+    def product_line(self) -> None:
+        ProductLineModel().configurations = self.products
+
+    def product_line_ids(self) -> None:
+        pl_model = ProductLineModel(registry=self.registry)
+        for ids in self.id_rows:
+            pl_model.add_ids(ids)
+
+    def read_csv(self) -> None:
+        ConfigurationsCSVReader(self.path('configs.csv')).transform()
+
+    def read_csv_ids(self) -> None:
+        reader = ConfigurationsCSVReader(self.path('configs.csv'))
+        reader.set_registry(self.registry)
+        list(reader.iter_ids())
+
+    def write_csv_ids(self, path: str) -> None:
+        writer = ConfigurationsCSVWriter(path)
+        writer.set_id_rows(self.registry, self.id_rows)
+        writer.write()
+
+    def close(self) -> None:
+        for filename in os.listdir(self.directory):
+            os.remove(self.path(filename))
+        os.rmdir(self.directory)
+
+
+BENCHMARKS: dict[str, Callable[[BenchmarkCase], Any]] = {
+    'FullConfigurationsContext': BenchmarkCase.full_configurations_context,
+    'FullConfigurations': BenchmarkCase.full_configurations,
+    'FullConfigurationsCubes': BenchmarkCase.full_configurations_cubes,
+    'ProductLineModel': BenchmarkCase.product_line,
+    'ProductLineModel (ids)': BenchmarkCase.product_line_ids,
+    'PLInclusionMatrix': lambda case: PLInclusionMatrix().execute(case.pl_model),
+    'PLFeatureInclusionFrequency': lambda case: PLFeatureInclusionFrequency().execute(
+        case.pl_model),
+    'PLFeatureInclusionProbability': lambda case: PLFeatureInclusionProbability().execute(
+        case.pl_model),
+    'PLProductDistribution': lambda case: PLProductDistribution().execute(case.pl_model),
+    'ConfigurationsCSVWriter': lambda case: case.write_csv(case.path('out.csv')),
+    'ConfigurationsCSVWriter (ids)': lambda case: case.write_csv_ids(case.path('out.csv')),
+    'ConfigurationsCSVReader': BenchmarkCase.read_csv,
+    'ConfigurationsCSVReader (ids)': BenchmarkCase.read_csv_ids,
+    'ConfigurationsListWriter': lambda case: case.write_list(case.path('out.txt')),
+    'ConfigurationsListReader': lambda case: ConfigurationsListReader(
+        case.path('configs.txt')).transform(),
+    'ConfigurationsAttributesReader': lambda case: ConfigurationsAttributesReader(
+        case.path('attributes.csv')).transform(),
+    'ConfigurationsBinaryWriter': lambda case: case.write_binary(case.path('out.plb')),
+    'ConfigurationsBinaryReader': lambda case: ConfigurationsBinaryReader(
+        case.path('configs.plb')).transform(),
+}
+
+
+# Untimed preparation before each run of a benchmark. The setup of the context of the model
+# (core features, ancestors, solver) is measured on its own by FullConfigurationsContext.
+SETUPS: dict[str, Callable[[BenchmarkCase], Any]] = {
+    'FullConfigurations': BenchmarkCase.reset_context,
+    'FullConfigurationsCubes': BenchmarkCase.reset_context,
+}
+
+
+def measure(benchmark: Callable[[BenchmarkCase], Any],
+            case: BenchmarkCase,
+            repeat: int,
+            setup: Optional[Callable[[BenchmarkCase], Any]] = None) -> dict[str, Any]:
+    """Minimum and mean wall-clock time over `repeat` runs, and peak memory of one run."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup(case)
+        gc.collect()
+        start = time.perf_counter()
+        benchmark(case)
+        times.append(time.perf_counter() - start)
+    if setup is not None:
+        setup(case)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark(case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'mean_seconds': sum(times) / len(times), 'peak_bytes': peak}
+
+
+def run(features: list[int],
+        products: list[int],
+        selected: Optional[str] = None,
+        repeat: int = 3,
+        density: float = 0.1,
+        seed: int = 0) -> list[dict[str, Any]]:
+    results = []
+    for n_features in features:
+        for n_products in products:
+            case = BenchmarkCase(n_features, n_products, density, seed)
+            try:
+                for name, benchmark in BENCHMARKS.items():
+                    if selected is not None and not re.search(selected, name):
+                        continue
+                    result = {'benchmark': name,
+                              'features': n_features,
+                              'products': n_products,
+                              **measure(benchmark, case, repeat, SETUPS.get(name))}
+                    print(f'{name:32} features={n_features:<6} products={n_products:<8} '
+                          f'{result["seconds"]:10.4f} s {result["peak_bytes"] / 2**20:10.2f} MiB')
+                    results.append(result)
+            finally:
+                case.close()
+    return results
+
+
+def metadata(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'density': args.density,
+            'seed': args.seed}
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    """Print the time ratio (current / baseline) of the benchmarks present in both runs."""
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = {(r['benchmark'], r['features'], r['products']): r
+                    for r in json.load(file)['results']}
+    print(f'\nComparison with {baseline_path} (ratio > 1 is slower):')
+    for result in results:
+        previous = baseline.get((result['benchmark'], result['features'], result['products']))
+        if previous is None or previous['seconds'] == 0:
+            continue
+        ratio = result['seconds'] / previous['seconds']
+        print(f'{result["benchmark"]:32} features={result["features"]:<6} '
+              f'products={result["products"]:<8} x{ratio:.2f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks of the product line operations.')
+    parser.add_argument('--features', type=int, nargs='+', default=DEFAULT_FEATURES,
+                        help='Numbers of features of the synthetic models.')
+    parser.add_argument('--products', type=int, nargs='+', default=DEFAULT_PRODUCTS,
+                        help='Numbers of products of the synthetic portfolios.')
+    parser.add_argument('--large', action='store_true',
+                        help=f'Also run the portfolios of {LARGE_PRODUCTS} products.')
+    parser.add_argument('--only', dest='selected', type=str, default=None,
+                        help='Regular expression to select the benchmarks by name.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark.')
+    parser.add_argument('--density', type=float, default=0.1,
+                        help='Fraction of features selected in each product.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', type=str, default=None, help='Output JSON file.')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Previous JSON results to compare with.')
+    args = parser.parse_args()
+
+    products = list(args.products)
+    if args.large:
+        products.extend(n for n in LARGE_PRODUCTS if n not in products)
+    results = run(args.features, products, args.selected, args.repeat, args.density,
+                  args.seed)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'metadata': metadata(args), 'results': results}, file, indent=2)
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import random
+from typing import Optional
+
+from pysat.solvers import Solver
+
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.pysat_metamodel.models import PySATModel
+
+
+GROUP_TYPES = ['mandatory', 'optional', 'alternative', 'or']
+MAX_CHILDREN = 6
+
+
+def synthetic_uvl(n_features: int,
+                  n_constraints: Optional[int] = None,
+                  seed: int = 0) -> str:
+    """UVL text of a random feature model with n_features features (F0 is the root).
+
+    Each feature has up to MAX_CHILDREN children, arranged in groups of random types, and the
+    cross-tree constraints (10% of the number of features by default) are random requires and
+    excludes between features, so the model may be void for some seeds.
+    """
+    rng = random.Random(seed)
+    children: dict[int, list[int]] = {0: []}
+    open_features = [0]
+    for feature in range(1, n_features):
+        parent = rng.choice(open_features)
+        children[parent].append(feature)
+        children[feature] = []
+        if len(children[parent]) >= MAX_CHILDREN:
+            open_features.remove(parent)
+        open_features.append(feature)
+    lines = ['features']
+    _write_feature(lines, 0, children, 1, rng)
+    if n_constraints is None:
+        n_constraints = n_features // 10
+    if n_constraints > 0 and n_features > 2:
+        lines.append('constraints')
+        for _ in range(n_constraints):
+            first, second = rng.sample(range(1, n_features), 2)
+            negation = '' if rng.random() < 0.7 else '!'
+            lines.append(f'    F{first} => {negation}F{second}')
+    return '\n'.join(lines) + '\n'
+
+
+def _write_feature(lines: list[str],
+                   feature: int,
+                   children: dict[int, list[int]],
+                   depth: int,
+                   rng: random.Random) -> None:
+    indentation = '    ' * depth
+    lines.append(f'{indentation}F{feature}')
+    remaining = list(children[feature])
+    while remaining:
+        size = rng.randint(1, len(remaining))
+        group, remaining = remaining[:size], remaining[size:]
+        group_type = rng.choice(GROUP_TYPES if len(group) > 1 else GROUP_TYPES[:2])
+        lines.append(f'{indentation}    {group_type}')
+        for child in group:
+            _write_feature(lines, child, children, depth + 2, rng)
+
+
+def random_portfolio(features: list[str],
+                     n_products: int,
+                     density: float = 0.1,
+                     seed: int = 0) -> list[Configuration]:
+    """Random products (not necessarily valid) that select each feature with probability
+    `density`."""
+    rng = random.Random(seed)
+    n_selected = max(1, round(len(features) * density))
+    return [Configuration(dict.fromkeys(rng.sample(features, n_selected), True))
+            for _ in range(n_products)]
+
+
+def random_partial_configurations(sat_model: PySATModel,
+                                  n_configurations: int,
+                                  keep: float = 0.5,
+                                  seed: int = 0) -> list[Configuration]:
+    """Valid partial configurations: random full configurations of the model found by the
+    solver, from which only a fraction `keep` of the selected features is kept.
+
+    A private solver is used, so the random phases do not affect the shared solver of the
+    model (and the timings of the benchmarks that use it).
+    """
+    rng = random.Random(seed)
+    features = sat_model.features
+    configurations = []
+    with Solver(name='glucose3', bootstrap_with=sat_model.get_all_clauses().clauses) as solver:
+        for _ in range(n_configurations):
+            solver.set_phases([variable if rng.random() < 0.5 else -variable
+                               for variable in features])
+            if not solver.solve():
+                break
+            selected = [features[variable] for variable in solver.get_model()
+                        if variable > 0 and variable in features]
+            kept = rng.sample(selected, max(1, round(len(selected) * keep)))
+            configurations.append(Configuration(dict.fromkeys(kept, True)))
+    return configurations
@@ -1,4 +1,6 @@
+from .feature_registry import FeatureRegistry
 from .product_line import ProductLineModel
 
 
-__all__ = ['ProductLineModel']
+__all__ = ['FeatureRegistry',
+           'ProductLineModel']
@@ -0,0 +1,173 @@
+import weakref
+from typing import Any, Iterable, Iterator, Optional
+
+from flamapy.core.exceptions import FlamaException
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+
+
+# id(fm_model) -> (weak reference to the model, registry)
+_REGISTRIES: dict[int, tuple[weakref.ref, 'FeatureRegistry']] = {}
+
+
+class FeatureRegistry:
+    """Dense integer ids for the features (names) of a model: the features are interned once,
+    with ids 0, 1, 2, ..., so the products can be handled as arrays of ids (or bitmasks, where
+    bit i is the feature with id i) instead of repeatedly hashing the names.
+
+    The registry of a feature model (`FeatureRegistry.get(fm_model)`) is shared by the readers,
+    writers, product lines and operations of the model; its ids follow the order of the
+    features in the model, and it also knows the parent of each feature. It is frozen: it only
+    has the features of the model, and it is never modified. The features that are not in the
+    model (e.g., in a file or a product line) are registered in an overlay of it (see
+    `with_features`), a copy with the same ids that is private to the reader or product line.
+    Registries that are not frozen can be grown on the fly with `intern` (e.g., from the
+    header of a file).
+    The ids are never reused or reassigned.
+    """
+
+    def __init__(self, features: Iterable[Any] = ()) -> None:
+        self._ids: dict[Any, int] = {}  # feature -> id
+        self._features: list[Any] = []  # id -> feature
+        self._parents: list[int] = []  # id -> id of the parent (-1 for none or unknown)
+        self._frozen: bool = False
+        for feature in features:
+            self.intern(feature)
+
+    @staticmethod
+    def from_feature_model(fm_model: FeatureModel) -> 'FeatureRegistry':
+        """New registry with the features of the model, in order, and their parents."""
+        registry = FeatureRegistry(feature.name for feature in fm_model.get_features())
+        for feature in fm_model.get_features():
+            parent = feature.get_parent()
+            if parent is not None:
+                registry._parents[registry._ids[feature.name]] = registry.intern(parent.name)
+        return registry
+
+    @staticmethod
+    def get(fm_model: FeatureModel) -> 'FeatureRegistry':
+        """Return the shared (frozen) registry of the feature model, creating it the first
+        time."""
+        entry = _REGISTRIES.get(id(fm_model))
+        if entry is not None and entry[0]() is fm_model:
+            return entry[1]
+        registry = FeatureRegistry.from_feature_model(fm_model)
+        registry.freeze()
+        _REGISTRIES[id(fm_model)] = (weakref.ref(fm_model), registry)
+        weakref.finalize(fm_model, _discard_registry, id(fm_model), registry)
+        return registry
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def freeze(self) -> None:
+        """Forbid registering new features."""
+        self._frozen = True
+
+    def overlay(self, features: Iterable[Any] = ()) -> 'FeatureRegistry':
+        """New registry (not frozen) with the same ids and parents as this one, plus the given
+        features. This registry is not modified."""
+        registry = FeatureRegistry()
+        registry._ids = dict(self._ids)
+        registry._features = list(self._features)
+        registry._parents = list(self._parents)
+        for feature in features:
+            registry.intern(feature)
+        return registry
+
+    def with_features(self, features: Iterable[Any]) -> 'FeatureRegistry':
+        """Registry with ids for all the features: this one, where the new features are
+        registered, or an overlay of this one with them if it is frozen."""
+        if not self._frozen:
+            for feature in features:
+                self.intern(feature)
+            return self
+        missing = [feature for feature in features if feature not in self._ids]
+        return self.overlay(missing) if missing else self
+
+    def intern(self, feature: Any) -> int:
+        """Id of the feature, which is registered if it is new (unless the registry is
+        frozen)."""
+        feature_id = self._ids.get(feature)
+        if feature_id is None:
+            if self._frozen:
+                raise FlamaException(f'Feature {feature} not found in a frozen registry')
+            feature_id = len(self._features)
+            self._ids[feature] = feature_id
+            self._features.append(feature)
+            self._parents.append(-1)
+        return feature_id
+
+    def get_id(self, feature: Any) -> Optional[int]:
+        """Id of the feature, or None if it is not registered."""
+        return self._ids.get(feature)
+
+    def ids(self, features: Iterable[Any], add: bool = True) -> list[int]:
+        """Ids of the features, registering the new ones (or failing if `add` is False or the
+        registry is frozen)."""
+        if add:
+            return [self.intern(feature) for feature in features]
+        ids = []
+        for feature in features:
+            feature_id = self._ids.get(feature)
+            if feature_id is None:
+                raise FlamaException(f'Feature {feature} not found')
+            ids.append(feature_id)
+        return ids
+
+    def feature(self, feature_id: int) -> Any:
+        return self._features[feature_id]
+
+    def features(self, ids: Optional[Iterable[int]] = None) -> list[Any]:
+        """Features of the ids (all the features, in order of id, by default)."""
+        if ids is None:
+            return list(self._features)
+        return [self._features[feature_id] for feature_id in ids]
+
+    def index(self) -> dict[Any, int]:
+        """Mapping feature -> id (must not be modified)."""
+        return self._ids
+
+    def mask(self, ids: Iterable[int]) -> int:
+        """Bitmask with the bits of the ids set."""
+        mask = 0
+        for feature_id in ids:
+            mask |= 1 << feature_id
+        return mask
+
+    def mask_ids(self, mask: int) -> list[int]:
+        """Ids of the bits set in the mask, in increasing order."""
+        ids = []
+        while mask:
+            lowest_bit = mask & -mask
+            ids.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return ids
+
+    def parent(self, feature_id: int) -> int:
+        """Id of the parent of the feature (-1 for the root or if it is unknown)."""
+        return self._parents[feature_id]
+
+    def ancestors(self, feature_id: int) -> list[int]:
+        """Ids of the ancestors of the feature, from its parent up."""
+        ancestors = []
+        parent = self._parents[feature_id]
+        while parent >= 0:
+            ancestors.append(parent)
+            parent = self._parents[parent]
+        return ancestors
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def __contains__(self, feature: object) -> bool:
+        return feature in self._ids
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._features)
+
+
+def _discard_registry(model_id: int, registry: FeatureRegistry) -> None:
+    entry = _REGISTRIES.get(model_id)
+    if entry is not None and entry[1] is registry:
+        del _REGISTRIES[model_id]
@@ -1,46 +1,337 @@
-from enum import Enum
-from typing import Optional, Any, Union
+import hashlib
+from collections.abc import Set
+from typing import Any, Iterable, Iterator, Optional, Union
 
 from flamapy.core.models import VariabilityModel
+from flamapy.core.exceptions import FlamaException
 from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models.feature_registry import FeatureRegistry
+
+
+FINGERPRINT_BITS = 64
+FINGERPRINT_MASK = (1 << FINGERPRINT_BITS) - 1
 
 
 class ProductLineModel(VariabilityModel):
-    """A product line is a set of configurations."""
+    """A product line is a set of configurations.
+
+    By default, the configurations are stored as they are given.
+    With `compact=True`, the product line stores a feature table (a FeatureRegistry) and one
+    integer bitmask per product, where bit i is set if the feature with id i is selected.
+    Products are deduplicated on their masks, and the `Configuration` objects are only built
+    when the configurations are iterated.
+    Note that in compact mode a configuration is reduced to its selected elements.
+    A registry can be given to share the ids with other product lines, readers and writers
+    (e.g., the registry of the feature model), and products can be added and iterated as
+    arrays of ids (`add_ids` and `id_rows`). A frozen registry (such as the one of the feature
+    model) is not modified: the features of the products that are not in it are registered in
+    a private overlay of it, with the same ids for its features (see `registry`).
+
+    Configurations can be added, removed, or replaced one at a time (`add`, `remove`, and
+    `update`). The model maintains the number of products that select each feature and the
+    number of products per number of selected features, so the feature inclusion frequency
+    and the product distribution are available without scanning the products.
+    The set returned by `configurations` must not be modified directly.
+
+    The model also maintains a fingerprint of its content: the sum (modulo 2^64) of a digest
+    of the selected features of each product, which does not depend on the order of the
+    products. Hashing is O(1), and comparisons reject product lines with different
+    fingerprints or statistics before comparing the products.
+    """
 
     @staticmethod
     def get_extension() -> str:
         return 'pl'
 
-    def __init__(self) -> None:
+    def __init__(self, compact: bool = False, registry: Optional[FeatureRegistry] = None) -> None:
+        self._compact: bool = compact or registry is not None
         self._configurations: set[Configuration] = set()
         self._features: set[Any] = set()
+        self._base_registry: Optional[FeatureRegistry] = registry
+        self._registry: FeatureRegistry = FeatureRegistry() if registry is None else registry
+        self._masks: set[int] = set()
+        self._feature_counts: dict[Any, int] = {}  # feature -> number of products with it
+        self._size_histogram: dict[int, int] = {}  # number of features -> number of products
+        self._fingerprint: int = 0
+        self._feature_digests: dict[Any, int] = {}
+
+    def is_compact(self) -> bool:
+        return self._compact
 
     @property
     def configurations(self) -> set[Configuration]:
+        if self._compact:
+            return CompactConfigurations(self)
         return self._configurations
 
     @configurations.setter
-    def configurations(self, configurations: set[Configuration]) -> None:
-        self._configurations = configurations
-        self._features = set().union(*[set(config.get_selected_elements()) 
-                                       for config in configurations])
+    def configurations(self, configurations: Iterable[Configuration]) -> None:
+        self._configurations = set()
+        self._registry = self._new_registry()
+        self._masks = set()
+        self._clear_statistics()
+        for config in configurations:
+            self.add(config)
+
+    def set_masks(self,
+                  features: Union[list[Any], FeatureRegistry],
+                  masks: Iterable[int]) -> None:
+        """Set the products from their bitmasks, where bit i corresponds to features[i] (or to
+        the feature with id i of the registry, which is then shared).
+
+        The product line becomes compact.
+        """
+        self._compact = True
+        self._configurations = set()
+        if isinstance(features, FeatureRegistry):
+            self._base_registry = features
+            self._registry = features
+        else:
+            self._base_registry = None
+            self._registry = FeatureRegistry(features)
+            if len(self._registry) != len(features):
+                raise FlamaException('Duplicated features in the feature table.')
+        self._masks = set()
+        self._clear_statistics()
+        for mask in masks:
+            self._add_mask(mask)
+
+    def add(self, configuration: Configuration) -> bool:
+        """Add the configuration. Return False if it was already in the product line."""
+        if self._compact:
+            return self._add_mask(self._to_mask(configuration, add_features=True))
+        if configuration in self._configurations:
+            return False
+        self._configurations.add(configuration)
+        features = configuration.get_selected_elements()
+        # The features are registered here, so that `id_rows` does not modify the registry
+        self._registry = self._registry.with_features(features)
+        self._count_features(features, 1)
+        return True
+
+    def add_ids(self, ids: Iterable[int]) -> bool:
+        """Add the product with the selected features of the given ids of the registry.
+        Return False if it was already in the product line."""
+        if self._compact:
+            ids = set(ids)
+            mask = self._registry.mask(ids)
+            if mask in self._masks:
+                return False
+            self._masks.add(mask)
+            self._count_features(self._registry.features(ids), 1)
+            return True
+        return self.add(Configuration(dict.fromkeys(self._registry.features(ids), True)))
+
+    def id_rows(self) -> Iterator[list[int]]:
+        """Products as arrays of ids of the registry (in increasing order in compact mode)."""
+        if self._compact:
+            return (self._registry.mask_ids(mask) for mask in self._masks)
+        return (self._registry.ids(config.get_selected_elements(), add=False)
+                for config in self._configurations)
+
+    def remove(self, configuration: Configuration) -> bool:
+        """Remove the configuration. Return False if it was not in the product line."""
+        if self._compact:
+            mask = self._to_mask(configuration)
+            if mask is None or mask not in self._masks:
+                return False
+            self._masks.remove(mask)
+            self._count_features(self._mask_features(mask), -1)
+            return True
+        if configuration not in self._configurations:
+            return False
+        self._configurations.remove(configuration)
+        self._count_features(configuration.get_selected_elements(), -1)
+        return True
+
+    def update(self, old_configuration: Configuration, new_configuration: Configuration) -> bool:
+        """Replace a configuration by another one.
+
+        Return False (and do nothing) if the old configuration is not in the product line, or
+        if the new configuration is already in the product line (as another product).
+        """
+        products = self._masks if self._compact else self._configurations
+        old_key = self._key(old_configuration)
+        if old_key is None or old_key not in products:
+            return False
+        new_key = self._key(new_configuration)
+        if new_key == old_key:
+            return True
+        if new_key is not None and new_key in products:
+            return False
+        self.remove(old_configuration)
+        self.add(new_configuration)
+        return True
 
     def features(self) -> set[Any]:
         return self._features
 
+    def feature_inclusion_frequency(self) -> dict[Any, int]:
+        """Number of products that select each feature."""
+        return dict(self._feature_counts)
+
+    def size_histogram(self) -> dict[int, int]:
+        """Number of products per number of selected features (only non-zero entries)."""
+        return dict(self._size_histogram)
+
+    def masks(self) -> set[int]:
+        """Bitmasks of the products (only in compact mode)."""
+        return self._masks
+
+    def feature_index(self) -> dict[Any, int]:
+        """Mapping feature -> bit index used by the masks (only in compact mode). With a shared
+        registry, it may include features not selected by any product."""
+        return self._registry.index()
+
+    def registry(self) -> FeatureRegistry:
+        """Feature table of the product line (ids of the features): the given registry, or a
+        private overlay of it if the products have features that are not in it and it is
+        frozen."""
+        return self._registry
+
+    def _new_registry(self) -> FeatureRegistry:
+        return FeatureRegistry() if self._base_registry is None else self._base_registry
+
+    def _to_mask(self, configuration: Configuration, add_features: bool = False) -> Optional[int]:
+        """Bitmask of the selected elements of the configuration.
+
+        Return None if the configuration has a feature that is not in the feature table and
+        `add_features` is False.
+        """
+        mask = 0
+        for feature in configuration.get_selected_elements():
+            index = self._registry.get_id(feature)
+            if index is None:
+                if not add_features:
+                    return None
+                self._registry = self._registry.with_features([feature])
+                index = self._registry.intern(feature)
+            mask |= 1 << index
+        return mask
+
+    def _key(self, configuration: Configuration) -> Union[Configuration, int, None]:
+        """Key of the configuration in the products (its mask in compact mode, see
+        `_to_mask`)."""
+        return self._to_mask(configuration) if self._compact else configuration
+
+    def _from_mask(self, mask: int) -> Configuration:
+        return Configuration(dict.fromkeys(self._mask_features(mask), True))
+
+    def _mask_features(self, mask: int) -> list[Any]:
+        return self._registry.features(self._registry.mask_ids(mask))
+
+    def _add_mask(self, mask: int) -> bool:
+        if mask in self._masks:
+            return False
+        self._masks.add(mask)
+        self._count_features(self._mask_features(mask), 1)
+        return True
+
+    def _count_features(self, features: list[Any], delta: int) -> None:
+        """Update the statistics with a product (delta=1) or without it (delta=-1)."""
+        for feature in features:
+            count = self._feature_counts.get(feature, 0) + delta
+            if count:
+                self._feature_counts[feature] = count
+                if count == 1 and delta == 1:
+                    self._features.add(feature)
+            else:
+                del self._feature_counts[feature]
+                self._features.discard(feature)
+        self._fingerprint = (self._fingerprint + delta * self._digest(features)) \
+            & FINGERPRINT_MASK
+        size = len(features)
+        count = self._size_histogram.get(size, 0) + delta
+        if count:
+            self._size_histogram[size] = count
+        else:
+            del self._size_histogram[size]
+
+    def _digest(self, features: list[Any]) -> int:
+        """Digest of a product, which only depends on the set of its selected features."""
+        total = 0
+        for feature in features:
+            digest = self._feature_digests.get(feature)
+            if digest is None:
+                digest = int.from_bytes(hashlib.blake2b(str(feature).encode('utf-8'),
+                                                        digest_size=8).digest(), 'little')
+                self._feature_digests[feature] = digest
+            total += digest
+        return _mix(total & FINGERPRINT_MASK)
+
+    def _clear_statistics(self) -> None:
+        self._features = set()
+        self._feature_counts = {}
+        self._size_histogram = {}
+        self._fingerprint = 0
+
+    def fingerprint(self) -> int:
+        """Order-independent fingerprint of the products."""
+        return self._fingerprint
+
     def __eq__(self, other: object) -> bool:
-        return (isinstance(other, ProductLineModel) 
-                and len(self.configurations) == len(other.configurations)
-                and all(config in other.configurations for config in self.configurations))
+        if not isinstance(other, ProductLineModel):
+            return False
+        if self is other:
+            return True
+        if (len(self.configurations) != len(other.configurations)
+                or self._fingerprint != other._fingerprint
+                or self._size_histogram != other._size_histogram
+                or self._feature_counts != other._feature_counts):
+            return False
+        if self._compact and other._compact and (
+                self._registry is other._registry
+                or self._registry.features() == other._registry.features()):
+            return self._masks == other._masks
+        if self._compact or other._compact:
+            # A compact product line only keeps the selected features of the configurations
+            return self._selected_sets() == other._selected_sets()
+        return all(config in other.configurations for config in self.configurations)
+
+    def _selected_sets(self) -> set[frozenset[Any]]:
+        """The products as sets of selected features."""
+        if self._compact:
+            return {frozenset(self._mask_features(mask)) for mask in self._masks}
+        return {frozenset(config.get_selected_elements()) for config in self._configurations}
 
     def __str__(self) -> str:
         res = 'Product Line\n'
         res += f'Features: ({len(self._features)}) {self._features}\n'
-        res += f'Products: ({len(self._configurations)})\n'
+        res += f'Products: ({len(self.configurations)})\n'
         for i, config in enumerate(self.configurations):
             res += f'{i}: {config.get_selected_elements()}\n'
         return res
 
     def __hash__(self) -> int:
-        return hash(frozenset(self.configurations))
+        return hash((len(self.configurations), self._fingerprint))
+
+
+def _mix(value: int) -> int:
+    """Finalizer of SplitMix64, to spread the bits of the sum of the feature digests."""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & FINGERPRINT_MASK
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & FINGERPRINT_MASK
+    return value ^ (value >> 31)
+
+
+class CompactConfigurations(Set):
+    """Read-only set view of the configurations of a compact product line.
+
+    The configurations are decoded from the masks on the fly.
+    """
+
+    def __init__(self, pl_model: ProductLineModel) -> None:
+        self._pl_model = pl_model
+
+    def __len__(self) -> int:
+        return len(self._pl_model._masks)
+
+    def __iter__(self) -> Iterator[Configuration]:
+        return (self._pl_model._from_mask(mask) for mask in self._pl_model._masks)
+
+    def __contains__(self, configuration: object) -> bool:
+        if not isinstance(configuration, Configuration):
+            return False
+        return self._pl_model._to_mask(configuration) in self._pl_model._masks
+
+    def __hash__(self) -> int:
+        return self._hash()
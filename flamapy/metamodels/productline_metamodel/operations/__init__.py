@@ -1,10 +1,34 @@
 from .full_configurations import FullConfigurations
+from .full_configurations_cubes import FullConfigurationsCubes
+from .full_configurations_batch import FullConfigurationsBatch, FullConfigurationsResult
+from .full_configurations_sampling import FullConfigurationsSampling
+from .full_configurations_count import FullConfigurationsCount
+from .complete_configuration import CompleteConfiguration
+from .undecided_features import UndecidedFeatures
+from .portfolio_validity import PortfolioValidity, ValidityResult
 from .pl_product_distribution import PLProductDistribution
+from .pl_inclusion_matrix import PLInclusionMatrix
 from .pl_feature_inclusion_frequency import PLFeatureInclusionFrequency
 from .pl_feature_inclusion_probability import PLFeatureInclusionProbability
+from .pl_bdd_product_distribution import PLBDDProductDistribution
+from .pl_bdd_feature_inclusion_frequency import PLBDDFeatureInclusionFrequency
+from .pl_bdd_feature_inclusion_probability import PLBDDFeatureInclusionProbability
 
 
 __all__ = ['FullConfigurations',
+           'FullConfigurationsCubes',
+           'FullConfigurationsBatch',
+           'FullConfigurationsResult',
+           'FullConfigurationsSampling',
+           'FullConfigurationsCount',
+           'CompleteConfiguration',
+           'UndecidedFeatures',
+           'PortfolioValidity',
+           'ValidityResult',
            'PLProductDistribution',
+           'PLInclusionMatrix',
            'PLFeatureInclusionFrequency',
-           'PLFeatureInclusionProbability']
+           'PLFeatureInclusionProbability',
+           'PLBDDProductDistribution',
+           'PLBDDFeatureInclusionFrequency',
+           'PLBDDFeatureInclusionProbability']
@@ -0,0 +1,209 @@
+from typing import Any, Optional
+
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+
+
+class BDDCounter:
+    """Exact counting over the configurations represented by a BDD, by dynamic programming
+    over its nodes (each node is visited once), without enumerating the configurations.
+
+    It computes the number of configurations, the number of configurations that include each
+    variable (feature inclusion frequency), and the number of configurations per number of
+    selected variables (product distribution). All counts are exact integers.
+
+    The counts consider all the variables of the BDD model. The function to count can be a
+    restriction of the root of the model (e.g., `bdd.let(assignment, root)`); in that case the
+    assigned variables are free in the restricted function and are counted as such.
+
+    Complemented edges (negated nodes) are supported: a regular node stands for a function
+    over the variables from its level on, and a negated edge to it stands for its complement.
+    """
+
+    def __init__(self, bdd_model: BDDModel, root: Optional[Any] = None) -> None:
+        self.bdd = bdd_model.bdd
+        self.root = bdd_model.root if root is None else root
+        self.variables: list[str] = sorted(bdd_model.vars_order, key=self.bdd.level_of_var)
+        self.n_vars = len(self.variables)
+        self._var_index = {var: i for i, var in enumerate(self.variables)}
+        self._counts: dict[Any, int] = {}  # regular node -> models over its variables
+        self._nodes: Optional[list[Any]] = None  # regular internal nodes by increasing index
+
+    def index(self, node: Any) -> int:
+        """Position of the variable of the node in the order (n_vars for the terminals)."""
+        return self.n_vars if node.var is None else self._var_index[node.var]
+
+    def count(self) -> int:
+        """Number of configurations (models over all the variables)."""
+        return self._function_count(self.root) * 2 ** self.index(self.root)
+
+    def count_function(self, function: Any) -> int:
+        """Number of models over all the variables of another function of the same BDD
+        (e.g., a restriction of the root).
+
+        The counts of the nodes are kept between calls, so counting many functions that share
+        nodes (e.g., the restrictions of the root by many partial configurations) visits each
+        shared node once.
+        """
+        self._count_nodes(self._reachable_nodes(function, self._counts))
+        return self._function_count(function) * 2 ** self.index(function)
+
+    def feature_inclusion_frequency(self) -> dict[str, int]:
+        """Number of configurations that select each variable."""
+        total = self.count()
+        if total == 0:
+            return {var: 0 for var in self.variables}
+        self._compute_counts()
+        nodes = self._get_nodes()
+        # Number of (partial) assignments that reach each node with an even (positive) or odd
+        # (negative) number of complemented edges
+        w_positive = dict.fromkeys(nodes, 0)
+        w_negative = dict.fromkeys(nodes, 0)
+        frequency = [0] * (self.n_vars + 1)
+        skipped = [0] * (self.n_vars + 1)  # Difference array for the skipped variables
+        root_index = self.index(self.root)
+        if root_index > 0:
+            # Variables above the root are free: half of the configurations select them
+            skipped[0] += total // 2
+            skipped[root_index] -= total // 2
+        if nodes:
+            regular_root = _regular(self.root)
+            if self.root.negated:
+                w_negative[regular_root] = 2 ** root_index
+            else:
+                w_positive[regular_root] = 2 ** root_index
+        for node in nodes:
+            node_index = self.index(node)
+            for edge, selected in ((node.low, False), (node.high, True)):
+                child = _regular(edge)
+                child_index = self.index(child)
+                gap = child_index - node_index - 1
+                positive, negative = w_positive[node], w_negative[node]
+                if edge.negated:
+                    positive, negative = negative, positive
+                models_below = (positive * self._function_count(child)
+                                + negative * self._function_count(~child))
+                through_edge = models_below * 2 ** gap
+                if selected:
+                    frequency[node_index] += through_edge
+                if gap > 0:
+                    skipped[node_index + 1] += through_edge // 2
+                    skipped[child_index] -= through_edge // 2
+                if child.var is not None:
+                    w_positive[child] += positive * 2 ** gap
+                    w_negative[child] += negative * 2 ** gap
+        accumulated = 0
+        for i in range(self.n_vars):
+            accumulated += skipped[i]
+            frequency[i] += accumulated
+        return {var: frequency[i] for i, var in enumerate(self.variables)}
+
+    def product_distribution(self) -> list[int]:
+        """Number of configurations with 0, 1, ..., n_vars selected variables."""
+        distributions: dict[Any, list[int]] = {}
+        for node in reversed(self._get_nodes()):
+            node_index = self.index(node)
+            low = self._edge_distribution(node.low, node_index, distributions)
+            high = self._edge_distribution(node.high, node_index, distributions)
+            distribution = [0] * (self.n_vars - node_index + 1)
+            for i, value in enumerate(low):
+                distribution[i] += value
+            for i, value in enumerate(high):
+                distribution[i + 1] += value
+            distributions[node] = distribution
+        root_distribution = self._edge_distribution(self.root, -1, distributions)
+        return root_distribution + [0] * (self.n_vars + 1 - len(root_distribution))
+
+    def _edge_distribution(self,
+                           edge: Any,
+                           parent_index: int,
+                           distributions: dict[Any, list[int]]) -> list[int]:
+        """Distribution of the function of the edge over the variables below the parent."""
+        child = _regular(edge)
+        child_index = self.index(child)
+        distribution = [1] if child.var is None else distributions[child]
+        if edge.negated:
+            distribution = [binomial - value for binomial, value in
+                            zip(_binomials(self.n_vars - child_index),
+                                distribution + [0] * (self.n_vars - child_index + 1))]
+        return _convolve(distribution, _binomials(child_index - parent_index - 1))
+
+    def _function_count(self, function: Any) -> int:
+        """Models of the function over the variables from its level on."""
+        node = _regular(function)
+        if node.var is None:
+            count = 1
+        else:
+            if node not in self._counts:
+                self._compute_counts()
+            count = self._counts[node]
+        if function.negated:
+            count = 2 ** (self.n_vars - self.index(node)) - count
+        return count
+
+    def _compute_counts(self) -> None:
+        """Count the models of all the nodes reachable from the root."""
+        self._count_nodes([node for node in self._get_nodes() if node not in self._counts])
+
+    def _count_nodes(self, nodes: list[Any]) -> None:
+        """Count the models of the nodes, given sorted by the order of variables (the
+        children of each node must be counted or be in the list)."""
+        for node in reversed(nodes):
+            node_index = self.index(node)
+            count = 0
+            for edge in (node.low, node.high):
+                child = _regular(edge)
+                child_count = 1 if child.var is None else self._counts[child]
+                if edge.negated:
+                    child_count = 2 ** (self.n_vars - self.index(child)) - child_count
+                count += child_count * 2 ** (self.index(child) - node_index - 1)
+            self._counts[node] = count
+
+    def _get_nodes(self) -> list[Any]:
+        """Regular internal nodes reachable from the root, sorted by the order of variables,
+        so that parents come before their children."""
+        if self._nodes is None:
+            self._nodes = self._reachable_nodes(self.root)
+        return self._nodes
+
+    def _reachable_nodes(self, function: Any, known: Optional[dict[Any, int]] = None
+                         ) -> list[Any]:
+        """Regular internal nodes reachable from the function (without going through the
+        known nodes), sorted by the order of variables."""
+        known = {} if known is None else known
+        root = _regular(function)
+        nodes = [] if root.var is None or root in known else [root]
+        visited = set(nodes)
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            i += 1
+            for edge in (node.low, node.high):
+                child = _regular(edge)
+                if child.var is not None and child not in visited and child not in known:
+                    visited.add(child)
+                    nodes.append(child)
+        nodes.sort(key=self.index)
+        return nodes
+
+
+def _regular(function: Any) -> Any:
+    return ~function if function.negated else function
+
+
+def _binomials(n: int) -> list[int]:
+    """Binomial coefficients C(n, 0), ..., C(n, n)."""
+    coefficients = [1]
+    for k in range(n):
+        coefficients.append(coefficients[-1] * (n - k) // (k + 1))
+    return coefficients
+
+
+def _convolve(first: list[int], second: list[int]) -> list[int]:
+    if second == [1]:
+        return first
+    result = [0] * (len(first) + len(second) - 1)
+    for i, a in enumerate(first):
+        if a:
+            for j, b in enumerate(second):
+                result[i + j] += a * b
+    return result
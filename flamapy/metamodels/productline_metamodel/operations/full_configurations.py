@@ -1,15 +1,15 @@
 import logging
-from typing import cast
-
-from pysat.solvers import Solver
+from typing import Iterable, Iterator, Optional, cast
 
 from flamapy.core.models import VariabilityModel
 from flamapy.core.operations import Operation
 from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
 from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
 from flamapy.metamodels.fm_metamodel.models import FeatureModel, Feature
-from flamapy.metamodels.pysat_metamodel.operations import PySATCoreFeatures
-from flamapy.metamodels.fm_metamodel.operations import FMVariationPoints
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
 
 
 LOGGER = logging.getLogger('FullConfigurations')
@@ -30,69 +30,126 @@ class FullConfigurations(Operation):
 
     This operation assumes that the provided partial configuration is valid in the sense that all
     features in the configuration are valid feature in the model.
+
+    In lazy mode (see `set_lazy`), the result is an iterator that yields the full configurations
+    as the SAT solver finds them, instead of a list. The enumeration can be bounded by a maximum
+    number of solutions and by a timeout in seconds.
+
+    With a projection (see `set_projection`), e.g., the concrete features of the model (see
+    `concrete_features`), the full configurations only contain the features of the projection
+    and are deduplicated: the solver blocks only the projected features of each solution, so
+    solutions that differ only in other features (e.g., abstract ones) are not enumerated.
     """
 
     def __init__(self) -> None:
-        self.result: list[Configuration] = []
+        self.result: Iterable[Configuration] = []
         self.configuration: Configuration = None
-        self.sat_model = None
-        self.solver = None
+        self.max_solutions: Optional[int] = None
+        self.timeout: Optional[float] = None
+        self.lazy: bool = False
+        self.projection: Optional[list[str]] = None
 
     def set_configuration(self, configuration: Configuration) -> None:
         self.configuration = configuration
 
+    def set_max_solutions(self, max_solutions: Optional[int]) -> None:
+        """Maximum number of full configurations to be returned (None for no limit)."""
+        self.max_solutions = max_solutions
+
+    def set_timeout(self, timeout: Optional[float]) -> None:
+        """Maximum time in seconds for the enumeration (None for no limit)."""
+        self.timeout = timeout
+
+    def set_lazy(self, lazy: bool) -> None:
+        """If True, the result is an iterator of the full configurations instead of a list."""
+        self.lazy = lazy
+
+    def set_projection(self, projection: Optional[Iterable[str]]) -> None:
+        """Features onto which the full configurations are projected (None for all)."""
+        self.projection = None if projection is None else list(projection)
+
+    @profiled('FullConfigurations')
     def execute(self, model: VariabilityModel) -> 'FullConfigurations':
         sat_model = cast(PySATModel, model)
-        self.result = full_configurations(self.configuration, sat_model.original_model, sat_model)
+        configurations = iter_full_configurations(self.configuration,
+                                                  sat_model.original_model,
+                                                  sat_model,
+                                                  self.max_solutions,
+                                                  self.timeout,
+                                                  self.projection)
+        self.result = configurations if self.lazy else list(configurations)
         return self
 
-    def full_configurations(self) -> list[Configuration]:
+    def full_configurations(self) -> Iterable[Configuration]:
         return self.get_result()
 
-    def get_result(self) -> list[Configuration]:
+    def get_result(self) -> Iterable[Configuration]:
         return self.result
 
 
 def full_configurations(configuration: Configuration,
-                        fm_model: FeatureModel, 
-                        sat_model: PySATModel) -> list[Configuration]:
-    # Select required features (core and parents)
-    core_features = set(PySATCoreFeatures().execute(sat_model).get_result())
-    parent_features = [get_all_parents(fm_model.get_feature_by_name(f)) 
-                       for f in configuration.get_selected_elements()]
-    parent_features = set().union(*parent_features)
-    config = Configuration(dict(configuration.elements))
-    for feature in core_features.union(parent_features):
-        config.elements[feature] = True
-    selected_elements = config.get_selected_elements()
-    # Avoid decided variation points
-    vps = FMVariationPoints().execute(fm_model).get_result()
-    for vp, variants in vps.items():
-        if vp.is_group() and vp.name in selected_elements and any(v.name in selected_elements 
-                                                                  for v in variants):
-            for variant in variants:
-                if variant.name not in selected_elements:
-                    config.elements[variant.name] = False
-    # Create assumptions
-    assumptions = []
-    for feature, selected in config.elements.items():
-        variable = sat_model.variables.get(feature)
-        if selected:
-            assumptions.append(variable)
-        else:
-            assumptions.append(-variable)
-    # Use the solver to enumerate the configurations
-    new_configurations = []
-    with Solver(name='glucose3') as solver:
-        for clause in sat_model.get_all_clauses():
-            solver.add_clause(clause)
-        for solution in solver.enum_models(assumptions=assumptions):
-            new_config = {}
-            for variable in solution:
-                if variable is not None and variable > 0:
-                    new_config[sat_model.features.get(variable)] = True
-            new_configurations.append(Configuration(new_config))
-    return new_configurations
+                        fm_model: FeatureModel,
+                        sat_model: PySATModel,
+                        max_solutions: Optional[int] = None,
+                        timeout: Optional[float] = None,
+                        projection: Optional[Iterable[str]] = None) -> list[Configuration]:
+    return list(iter_full_configurations(configuration, fm_model, sat_model,
+                                         max_solutions, timeout, projection))
+
+
+def iter_full_configurations(configuration: Configuration,
+                             fm_model: FeatureModel,
+                             sat_model: PySATModel,
+                             max_solutions: Optional[int] = None,
+                             timeout: Optional[float] = None,
+                             projection: Optional[Iterable[str]] = None
+                             ) -> Iterator[Configuration]:
+    """Yield the full configurations derived from the partial configuration one by one,
+    as they are found by the SAT solver (projected onto the given features, if any).
+
+    The precomputed context of the model (core features, variation points, ancestors and
+    solver) is shared by all the calls with the same model.
+    """
+    context = get_context(fm_model, sat_model)
+    LOGGER.debug('Deriving the full configurations of %s', configuration)
+    return context.iter_full_configurations(configuration, max_solutions, timeout, projection)
+
+
+def iter_full_configuration_ids(configuration: Configuration,
+                                fm_model: FeatureModel,
+                                sat_model: PySATModel,
+                                max_solutions: Optional[int] = None,
+                                timeout: Optional[float] = None,
+                                projection: Optional[Iterable[str]] = None
+                                ) -> Iterator[list[int]]:
+    """Yield the full configurations derived from the partial configuration as arrays of ids
+    of the features in `FeatureRegistry.get(fm_model)`."""
+    context = get_context(fm_model, sat_model)
+    return context.iter_full_configuration_ids(configuration, max_solutions, timeout,
+                                               projection)
+
+
+def full_configuration_assumptions(configuration: Configuration,
+                                   fm_model: FeatureModel,
+                                   sat_model: PySATModel) -> list[int]:
+    """Assumptions for the solver: the partial configuration extended with the core features,
+    the parents of the selected features, and the unselected variants of the decided
+    variation points."""
+    context = get_context(fm_model, sat_model)
+    return context.assumptions(configuration)
+
+
+def concrete_features(fm_model: FeatureModel) -> list[str]:
+    """Names of the concrete (not abstract) features of the model."""
+    return [feature.name for feature in fm_model.get_features() if not feature.is_abstract]
+
+
+def get_context(fm_model: FeatureModel, sat_model: PySATModel) -> FullConfigurationsContext:
+    """Shared context of the model, or a new one if the feature model is not the original
+    model of the SAT model."""
+    if fm_model is sat_model.original_model:
+        return FullConfigurationsContext.get(sat_model)
+    return FullConfigurationsContext(sat_model, fm_model)
 
 
 def get_all_parents(feature: Feature) -> set[str]:
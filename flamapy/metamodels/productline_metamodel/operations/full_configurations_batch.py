@@ -0,0 +1,121 @@
+import logging
+from typing import Iterable, Iterator, NamedTuple, Optional, cast
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
+from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.productline_metamodel.operations.full_configurations import get_context
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext
+)
+from flamapy.metamodels.productline_metamodel.operations.parallel import run_in_pool
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+LOGGER = logging.getLogger('FullConfigurationsBatch')
+
+
+class FullConfigurationsResult(NamedTuple):
+    """Full configurations derived from the partial configuration at position `index` of the
+    batch, or the error raised while deriving them."""
+    index: int
+    configuration: Configuration
+    full_configurations: list[Configuration]
+    error: Optional[str] = None
+
+
+class FullConfigurationsBatch(Operation):
+    """Apply the FullConfigurations operation to a batch of partial configurations
+    (e.g., all the products of a portfolio) using a pool of worker processes.
+
+    Each worker receives the precomputed context of the model once and builds its own solver
+    from the clauses. The results are returned in the order of the partial configurations,
+    or in the order they finish if `set_ordered(False)` is used.
+    An error in one partial configuration is reported in its result and does not stop the
+    rest of the batch.
+    """
+
+    def __init__(self) -> None:
+        self.result: list[FullConfigurationsResult] = []
+        self.configurations: list[Configuration] = []
+        self.processes: Optional[int] = None
+        self.ordered: bool = True
+        self.max_solutions: Optional[int] = None
+        self.timeout: Optional[float] = None
+        self.projection: Optional[list[str]] = None
+
+    def set_configurations(self, configurations: Iterable[Configuration]) -> None:
+        self.configurations = list(configurations)
+
+    def set_processes(self, processes: Optional[int]) -> None:
+        """Number of worker processes (None for the number of CPUs, 1 to run in-process)."""
+        self.processes = processes
+
+    def set_ordered(self, ordered: bool) -> None:
+        self.ordered = ordered
+
+    def set_max_solutions(self, max_solutions: Optional[int]) -> None:
+        """Maximum number of full configurations per partial configuration."""
+        self.max_solutions = max_solutions
+
+    def set_timeout(self, timeout: Optional[float]) -> None:
+        """Maximum time in seconds for the enumeration of each partial configuration."""
+        self.timeout = timeout
+
+    def set_projection(self, projection: Optional[Iterable[str]]) -> None:
+        """Features onto which the full configurations are projected (None for all)."""
+        self.projection = None if projection is None else list(projection)
+
+    @profiled('FullConfigurationsBatch')
+    def execute(self, model: VariabilityModel) -> 'FullConfigurationsBatch':
+        sat_model = cast(PySATModel, model)
+        self.result = list(batch_full_configurations(self.configurations,
+                                                     sat_model.original_model,
+                                                     sat_model,
+                                                     self.processes,
+                                                     self.ordered,
+                                                     self.max_solutions,
+                                                     self.timeout,
+                                                     self.projection))
+        return self
+
+    def get_result(self) -> list[FullConfigurationsResult]:
+        return self.result
+
+    def full_configurations(self) -> list[FullConfigurationsResult]:
+        return self.get_result()
+
+
+def batch_full_configurations(configurations: Iterable[Configuration],
+                              fm_model: FeatureModel,
+                              sat_model: PySATModel,
+                              processes: Optional[int] = None,
+                              ordered: bool = True,
+                              max_solutions: Optional[int] = None,
+                              timeout: Optional[float] = None,
+                              projection: Optional[list[str]] = None,
+                              chunksize: int = 1) -> Iterator[FullConfigurationsResult]:
+    """Yield the full configurations of each partial configuration as the workers finish."""
+    context = get_context(fm_model, sat_model)
+    tasks = ((index, config, max_solutions, timeout, projection)
+             for index, config in enumerate(configurations))
+    yield from run_in_pool(tasks, context, _expand, processes, ordered, chunksize)
+
+
+def _expand(context: FullConfigurationsContext,
+            task: tuple[int, Configuration, Optional[int], Optional[float], Optional[list[str]]]
+            ) -> FullConfigurationsResult:
+    index, configuration, max_solutions, timeout, projection = task
+    try:
+        full_configs = list(context.iter_full_configurations(configuration,
+                                                             max_solutions,
+                                                             timeout,
+                                                             projection))
+    except Exception as exception:  # pylint: disable=broad-except
+        LOGGER.warning('Error deriving the full configurations of %s: %s',
+                       configuration, exception)
+        return FullConfigurationsResult(index, configuration, [],
+                                        f'{type(exception).__name__}: {exception}')
+    return FullConfigurationsResult(index, configuration, full_configs)
@@ -0,0 +1,355 @@
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Iterable, Iterator, Optional
+
+from pysat.solvers import Solver
+
+from flamapy.core.exceptions import FlamaException
+from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
+from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.pysat_metamodel.operations import PySATCoreFeatures
+from flamapy.metamodels.fm_metamodel.operations import FMVariationPoints
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry
+from flamapy.metamodels.productline_metamodel.profiling import count
+
+
+LOGGER = logging.getLogger('FullConfigurationsContext')
+
+
+_CONTEXTS: dict[int, 'FullConfigurationsContext'] = {}  # id(sat_model) -> context
+
+
+class FullConfigurationsContext:
+    """Precomputed information of a model to derive full configurations from partial
+    configurations.
+
+    It holds the core features, the group variation points (vp -> variants), the ancestors of
+    each feature, the ids of the features in the registry of the feature model (see
+    FeatureRegistry), and a solver loaded with the clauses of the model. All of them are
+    computed once and reused for each partial configuration.
+    Use `FullConfigurationsContext.get(sat_model)` to obtain the shared context of a model.
+
+    The solver is reused across enumerations: the blocking clauses of each enumeration are
+    guarded by a fresh selector variable, which is disabled when the enumeration finishes.
+    """
+
+    def __init__(self, sat_model: PySATModel, fm_model: Optional[FeatureModel] = None) -> None:
+        if fm_model is None:
+            fm_model = sat_model.original_model
+        self.variables: dict[str, int] = sat_model.variables
+        self.features: dict[int, str] = sat_model.features
+        self.core_features: frozenset[str] = frozenset(
+            PySATCoreFeatures().execute(sat_model).get_result())
+        self.group_variation_points: dict[str, list[str]] = group_variation_points_index(
+            fm_model)
+        self.ancestors: dict[str, frozenset[str]] = ancestors_index(fm_model)
+        self.clauses: list[list[int]] = sat_model.get_all_clauses().clauses
+        self.n_vars: int = max([sat_model.get_all_clauses().nv, *sat_model.features])
+        self.registry: FeatureRegistry = FeatureRegistry.get(fm_model)
+        # Variable -> id of its feature in the registry (-1 for the other variables)
+        self.feature_ids: list[int] = [-1] * (self.n_vars + 1)
+        for variable, feature in self.features.items():
+            feature_id = self.registry.get_id(feature)
+            if feature_id is not None:
+                self.feature_ids[variable] = feature_id
+        self._solver: Optional[Solver] = None
+        self._completion_solver: Optional[Solver] = None
+        self._next_selector: int = self.n_vars + 1
+        # Weak reference, so that the shared contexts do not keep the models alive
+        self._model_ref = weakref.ref(sat_model)
+
+    @staticmethod
+    def get(sat_model: PySATModel) -> 'FullConfigurationsContext':
+        """Return the context of the model, creating it the first time."""
+        context = _CONTEXTS.get(id(sat_model))
+        if context is None or context._model_ref() is not sat_model:
+            context = FullConfigurationsContext(sat_model)
+            _CONTEXTS[id(sat_model)] = context
+            weakref.finalize(sat_model, _discard_context, id(sat_model), context)
+        return context
+
+    @property
+    def solver(self) -> Solver:
+        """Solver loaded with the clauses of the model (created on first use)."""
+        if self._solver is None:
+            self._solver = Solver(name='glucose3', bootstrap_with=self.clauses)
+        return self._solver
+
+    @property
+    def completion_solver(self) -> Solver:
+        """Solver loaded with the clauses of the model that prefers to deselect the undecided
+        features (created on first use). It is separate from `solver`, so its phases do not
+        change how the enumerations explore the models."""
+        if self._completion_solver is None:
+            self._completion_solver = Solver(name='glucose3', bootstrap_with=self.clauses)
+            self._completion_solver.set_phases([-variable for variable in self.features])
+        return self._completion_solver
+
+    def new_selector(self) -> int:
+        """Fresh variable, not used in the model, to guard temporary clauses."""
+        selector = self._next_selector
+        self._next_selector += 1
+        return selector
+
+    def close(self) -> None:
+        if self._solver is not None:
+            self._solver.delete()
+            self._solver = None
+        if self._completion_solver is not None:
+            self._completion_solver.delete()
+            self._completion_solver = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The solvers cannot be pickled; they are rebuilt from the clauses on first use.
+        state = dict(self.__dict__)
+        state['_solver'] = None
+        state['_completion_solver'] = None
+        state['_model_ref'] = _dead_reference
+        return state
+
+    def assumptions(self, configuration: Configuration) -> list[int]:
+        """Assumptions for the solver: the partial configuration extended with the core
+        features, the ancestors of the selected features, and the unselected variants of the
+        decided variation points."""
+        elements = decided_features(configuration, self.core_features, self.ancestors,
+                                    self.group_variation_points)
+        # Create assumptions
+        assumptions = []
+        for feature, selected in elements.items():
+            variable = self.variables.get(feature)
+            if variable is None:
+                raise FlamaException(f'Feature {feature} not found')
+            if selected:
+                assumptions.append(variable)
+            else:
+                assumptions.append(-variable)
+        return assumptions
+
+    def projection_variables(self, projection: Iterable[str]) -> list[int]:
+        """Variables of the features of the projection, in order."""
+        variables = set()
+        for feature in projection:
+            variable = self.variables.get(feature)
+            if variable is None:
+                raise FlamaException(f'Feature {feature} not found')
+            variables.add(variable)
+        return sorted(variables)
+
+    def iter_full_configurations(self,
+                                 configuration: Configuration,
+                                 max_solutions: Optional[int] = None,
+                                 timeout: Optional[float] = None,
+                                 projection: Optional[Iterable[str]] = None
+                                 ) -> Iterator[Configuration]:
+        """Yield the full configurations derived from the partial configuration using the
+        shared solver (projected onto the given features, if any)."""
+        assumptions = self.assumptions(configuration)
+        projection_variables = None
+        if projection is not None:
+            projection_variables = self.projection_variables(projection)
+        selector = self.new_selector()
+        try:
+            yield from enumerate_configurations(self.solver, self.features, assumptions,
+                                                max_solutions, timeout, selector,
+                                                projection_variables, self.n_vars)
+        finally:
+            if self._solver is not None:
+                self._solver.add_clause([-selector])
+
+    def iter_full_configuration_ids(self,
+                                    configuration: Configuration,
+                                    max_solutions: Optional[int] = None,
+                                    timeout: Optional[float] = None,
+                                    projection: Optional[Iterable[str]] = None
+                                    ) -> Iterator[list[int]]:
+        """Same as `iter_full_configurations`, but each full configuration is given as the
+        array of the ids (in the registry) of its selected features, without building the
+        configurations."""
+        assumptions = self.assumptions(configuration)
+        projection_variables = None
+        if projection is not None:
+            projection_variables = self.projection_variables(projection)
+        feature_ids = self.feature_ids
+        selector = self.new_selector()
+        try:
+            for solution in enumerate_models(self.solver, assumptions, max_solutions, timeout,
+                                             selector, projection_variables, self.n_vars):
+                if projection_variables is None:
+                    yield [feature_ids[variable] for variable in solution
+                           if 0 < variable <= self.n_vars and feature_ids[variable] >= 0]
+                else:
+                    yield [feature_ids[variable] for variable in projection_variables
+                           if solution[variable - 1] > 0]
+        finally:
+            if self._solver is not None:
+                self._solver.add_clause([-selector])
+
+
+def _dead_reference() -> None:
+    return None
+
+
+def _discard_context(model_id: int, context: FullConfigurationsContext) -> None:
+    if _CONTEXTS.get(model_id) is context:
+        del _CONTEXTS[model_id]
+    context.close()
+
+
+def decided_features(configuration: Configuration,
+                     core_features: Iterable[str],
+                     ancestors: dict[str, frozenset[str]],
+                     group_variation_points: dict[str, list[str]]) -> dict[str, bool]:
+    """Features decided by the partial configuration: its elements, plus the core features and
+    the ancestors of the selected features (selected), plus the unselected variants of the
+    group variation points with some variant selected (deselected)."""
+    elements = dict(configuration.elements)
+    # Select required features (core and parents)
+    required_features = set(core_features)
+    for feature in configuration.get_selected_elements():
+        if feature not in ancestors:
+            raise FlamaException(f'Feature {feature} not found')
+        required_features.update(ancestors[feature])
+    for feature in required_features:
+        elements[feature] = True
+    selected_elements = set(Configuration(elements).get_selected_elements())
+    # Avoid decided variation points
+    for vp, variants in group_variation_points.items():
+        if vp in selected_elements and any(v in selected_elements for v in variants):
+            for variant in variants:
+                if variant not in selected_elements:
+                    elements[variant] = False
+    return elements
+
+
+def group_variation_points_index(fm_model: FeatureModel) -> dict[str, list[str]]:
+    """Map each group variation point (feature with a group of variants) to its variants."""
+    return {vp.name: [variant.name for variant in variants]
+            for vp, variants in FMVariationPoints().execute(fm_model).get_result().items()
+            if vp.is_group()}
+
+
+def ancestors_index(fm_model: FeatureModel) -> dict[str, frozenset[str]]:
+    """Map each feature name to the names of all its ancestors in the feature model."""
+    ancestors: dict[str, frozenset[str]] = {}
+    for feature in fm_model.get_features():
+        parent = feature.get_parent()
+        if parent is None:
+            ancestors[feature.name] = frozenset()
+            continue
+        path = []
+        while parent is not None and parent.name not in ancestors:
+            path.append(parent)
+            parent = parent.get_parent()
+        # Fill the ancestors of the uncomputed parents, from the top down
+        inherited = frozenset() if parent is None else ancestors[parent.name] | {parent.name}
+        for node in reversed(path):
+            ancestors[node.name] = inherited
+            inherited = inherited | {node.name}
+        ancestors[feature.name] = inherited
+    return ancestors
+
+
+def enumerate_configurations(solver: Solver,
+                             features: dict[int, str],
+                             assumptions: list[int],
+                             max_solutions: Optional[int] = None,
+                             timeout: Optional[float] = None,
+                             selector: Optional[int] = None,
+                             projection: Optional[list[int]] = None,
+                             n_vars: Optional[int] = None
+                             ) -> Iterator[Configuration]:
+    """Enumerate the models of the solver under the assumptions as configurations of the
+    features (variable -> feature name) (see `enumerate_models`).
+
+    With a projection, the configurations only contain the features of the projection
+    variables, and each one is returned once.
+    """
+    for solution in enumerate_models(solver, assumptions, max_solutions, timeout, selector,
+                                     projection, n_vars):
+        new_config = {}
+        if projection is None:
+            for variable in solution:
+                if variable > 0 and variable in features:
+                    new_config[features[variable]] = True
+        else:
+            for variable in projection:
+                if solution[variable - 1] > 0:
+                    new_config[features[variable]] = True
+        yield Configuration(new_config)
+
+
+def enumerate_models(solver: Solver,
+                     assumptions: list[int],
+                     max_solutions: Optional[int] = None,
+                     timeout: Optional[float] = None,
+                     selector: Optional[int] = None,
+                     projection: Optional[list[int]] = None,
+                     n_vars: Optional[int] = None) -> Iterator[list[int]]:
+    """Enumerate the models of the solver under the assumptions.
+
+    A blocking clause is added to the solver for each model found. With a projection (list of
+    variables), the blocking clause only contains the literals of the projection variables, so
+    the models are enumerated modulo the rest of the variables (e.g., abstract features or
+    auxiliary variables): no two models found agree on all the projection variables.
+    If a selector variable is given, it is assumed during the enumeration and the blocking
+    clauses are guarded by it, so that they can be disabled afterwards by adding the unit
+    clause [-selector]. The number of variables of the model (n_vars) must be given when the
+    solver is shared, so that the blocking clauses only contain the model variables and not the
+    selectors of other (possibly ongoing) enumerations.
+    The timeout is the wall-clock time in seconds since the enumeration started; when it
+    expires, the solver is interrupted and the enumeration stops.
+    """
+    if max_solutions is not None and max_solutions <= 0:
+        return
+    if selector is not None:
+        assumptions = assumptions + [selector]
+    timer = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+        timer = threading.Timer(timeout, solver.interrupt)
+        timer.daemon = True
+        timer.start()
+    try:
+        n_solutions = 0
+        while True:
+            count('solver_calls')
+            if not solver.solve_limited(assumptions=assumptions,
+                                        expect_interrupt=timer is not None):
+                break
+            count('models')
+            solution = solver.get_model()
+            yield solution
+            n_solutions += 1
+            if max_solutions is not None and n_solutions >= max_solutions:
+                break
+            if timer is not None and time.monotonic() >= deadline:
+                LOGGER.info('Enumeration stopped by timeout after %d solutions.', n_solutions)
+                break
+            solver.add_clause(blocking_clause(solution, selector, projection, n_vars))
+    finally:
+        if timer is not None:
+            timer.cancel()
+            solver.clear_interrupt()
+
+
+def blocking_clause(solution: list[int],
+                    selector: Optional[int] = None,
+                    projection: Optional[list[int]] = None,
+                    n_vars: Optional[int] = None) -> list[int]:
+    """Clause that excludes the model (only its projection, if any), guarded by the selector.
+
+    Only the first n_vars variables (all of them by default) are blocked.
+    """
+    # The models assign all the variables in order (model[i] is variable i + 1)
+    if projection is not None:
+        clause = [-solution[variable - 1] for variable in projection]
+    elif n_vars is not None:
+        clause = [-literal for literal in solution[:n_vars]]
+    elif selector is None:
+        clause = [-literal for literal in solution]
+    else:
+        clause = [-literal for literal in solution if abs(literal) < selector]
+    return clause if selector is None else clause + [-selector]
@@ -0,0 +1,90 @@
+from typing import Iterable
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.core.exceptions import FlamaException
+from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
+from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.productline_metamodel.operations.bdd_counting import BDDCounter
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext
+)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_sampling import (
+    completion_assignment,
+    completion_rules
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+class FullConfigurationsCount(Operation):
+    """Number of full configurations that can be derived from a partial configuration, that is,
+    the number of configurations returned by FullConfigurations, without enumerating them.
+
+    With a BDD model (FmToBDD), the partial configuration is extended with the same rules as in
+    FullConfigurations, the BDD is restricted to it, and the models of the restriction are
+    counted exactly. Many partial configurations (e.g., all the products of a portfolio) can be
+    counted with `count_many`, which shares the counts of the nodes of the BDD among all the
+    restrictions.
+    With a SAT model (FmToPysat), e.g., when the BDD cannot be built, the count is NOT exact
+    counting: it enumerates the full configurations with the shared solver of the model, so it
+    takes time O(#completions) (one solver call per full configuration) and may not finish for
+    partial configurations with many completions. Use a BDD model whenever possible.
+    """
+
+    def __init__(self) -> None:
+        self.result: int = 0
+        self.configuration: Configuration = Configuration({})
+
+    def set_configuration(self, configuration: Configuration) -> None:
+        self.configuration = configuration
+
+    @profiled('FullConfigurationsCount')
+    def execute(self, model: VariabilityModel) -> 'FullConfigurationsCount':
+        self.result = count_many([self.configuration], model)[0]
+        return self
+
+    def get_result(self) -> int:
+        return self.result
+
+    def full_configurations_count(self) -> int:
+        return self.get_result()
+
+    @profiled('FullConfigurationsCount')
+    def count_many(self,
+                   configurations: Iterable[Configuration],
+                   model: VariabilityModel) -> list[int]:
+        """Count the full configurations of a batch of partial configurations of the model."""
+        return count_many(configurations, model)
+
+
+def count_full_configurations(configuration: Configuration, model: VariabilityModel) -> int:
+    return count_many([configuration], model)[0]
+
+
+def count_many(configurations: Iterable[Configuration], model: VariabilityModel) -> list[int]:
+    if isinstance(model, BDDModel):
+        return bdd_count_many(configurations, model)
+    if isinstance(model, PySATModel):
+        return sat_enumeration_count_many(configurations, model)
+    raise FlamaException(f'Unsupported model {type(model).__name__} to count configurations.')
+
+
+def bdd_count_many(configurations: Iterable[Configuration], bdd_model: BDDModel) -> list[int]:
+    counter = BDDCounter(bdd_model)
+    rules = completion_rules(bdd_model, counter)
+    counts = []
+    for configuration in configurations:
+        assignment = completion_assignment(configuration, bdd_model, rules)
+        restriction = bdd_model.bdd.let(assignment, bdd_model.root)
+        # The assigned variables are free in the restriction
+        counts.append(counter.count_function(restriction) >> len(assignment))
+    return counts
+
+
+def sat_enumeration_count_many(configurations: Iterable[Configuration],
+                               sat_model: PySATModel) -> list[int]:
+    """Count by enumeration: O(#completions) solver calls for each partial configuration."""
+    context = FullConfigurationsContext.get(sat_model)
+    return [sum(1 for _ in context.iter_full_configurations(configuration))
+            for configuration in configurations]
@@ -0,0 +1,326 @@
+import logging
+import multiprocessing
+import time
+from typing import Any, Iterable, Iterator, Optional, cast
+
+from pysat.solvers import Solver
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
+from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.fm_metamodel.operations import FMVariationPoints
+from flamapy.metamodels.productline_metamodel.operations.full_configurations import get_context
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext,
+    ancestors_index,
+    blocking_clause,
+    enumerate_models
+)
+from flamapy.metamodels.productline_metamodel.operations.parallel import run_in_pool
+from flamapy.metamodels.productline_metamodel.profiling import profiled, count
+
+
+LOGGER = logging.getLogger('FullConfigurationsCubes')
+
+
+CUBE_SOLVER = 'minisat22'  # Solver used to conquer each cube
+CUBE_LIMIT = 2000  # Models enumerated by a solver before its cube is split
+DEFAULT_CUBES = 64
+COUNTER_STEP = 100  # Solutions of a worker between updates of the shared counter
+
+
+class FullConfigurationsCubes(Operation):
+    """Same result as FullConfigurations, but enumerated by cube-and-conquer instead of with a
+    single solver.
+
+    The enumeration with a single solver adds a blocking clause for each configuration found,
+    so the solver slows down as the number of configurations grows. Here, the space of the
+    full configurations is first partitioned into disjoint cubes (assignments of some
+    variation point variables), splitting on the variants of the undecided variation points
+    from the root of the feature model down (see `split_variables`), and pruning the cubes
+    that unit propagation refutes. Then each cube is enumerated with a fresh solver, which is
+    discarded afterwards; a cube with more than `cube_limit` configurations is split further
+    while it is enumerated (see `conquer_cube`), so no solver accumulates many blocking
+    clauses.
+
+    The cubes are independent, so they can be enumerated by a pool of worker processes (see
+    `set_processes`). In lazy mode, the configurations are yielded cube by cube, in the order
+    of the cubes. The enumeration can be bounded by a maximum number of solutions and by a
+    timeout in seconds, and projected onto some features, as in FullConfigurations (with a
+    projection, only the projected features are split on, so the cubes stay disjoint).
+    """
+
+    def __init__(self) -> None:
+        self.result: Iterable[Configuration] = []
+        self.configuration: Configuration = Configuration({})
+        self.max_solutions: Optional[int] = None
+        self.timeout: Optional[float] = None
+        self.lazy: bool = False
+        self.cubes: int = DEFAULT_CUBES
+        self.cube_limit: int = CUBE_LIMIT
+        self.processes: Optional[int] = 1
+        self.projection: Optional[list[str]] = None
+
+    def set_configuration(self, configuration: Configuration) -> None:
+        self.configuration = configuration
+
+    def set_max_solutions(self, max_solutions: Optional[int]) -> None:
+        """Maximum number of full configurations to be returned (None for no limit)."""
+        self.max_solutions = max_solutions
+
+    def set_timeout(self, timeout: Optional[float]) -> None:
+        """Maximum time in seconds for the enumeration (None for no limit)."""
+        self.timeout = timeout
+
+    def set_lazy(self, lazy: bool) -> None:
+        """If True, the result is an iterator of the full configurations instead of a list."""
+        self.lazy = lazy
+
+    def set_projection(self, projection: Optional[Iterable[str]]) -> None:
+        """Features onto which the full configurations are projected (None for all)."""
+        self.projection = None if projection is None else list(projection)
+
+    def set_cubes(self, cubes: int) -> None:
+        """Number of cubes the space is split into, at least (if there are enough variation
+        points)."""
+        self.cubes = cubes
+
+    def set_cube_limit(self, cube_limit: int) -> None:
+        """Number of configurations enumerated by a solver before its cube is split."""
+        self.cube_limit = cube_limit
+
+    def set_processes(self, processes: Optional[int]) -> None:
+        """Number of worker processes (None for the number of CPUs, 1 to run in-process)."""
+        self.processes = processes
+
+    @profiled('FullConfigurationsCubes')
+    def execute(self, model: VariabilityModel) -> 'FullConfigurationsCubes':
+        sat_model = cast(PySATModel, model)
+        configurations = iter_full_configurations_cubes(self.configuration,
+                                                        sat_model.original_model,
+                                                        sat_model,
+                                                        self.cubes,
+                                                        self.processes,
+                                                        self.max_solutions,
+                                                        self.timeout,
+                                                        self.cube_limit,
+                                                        self.projection)
+        self.result = configurations if self.lazy else list(configurations)
+        return self
+
+    def full_configurations(self) -> Iterable[Configuration]:
+        return self.get_result()
+
+    def get_result(self) -> Iterable[Configuration]:
+        return self.result
+
+
+def iter_full_configurations_cubes(configuration: Configuration,
+                                   fm_model: FeatureModel,
+                                   sat_model: PySATModel,
+                                   n_cubes: int = DEFAULT_CUBES,
+                                   processes: Optional[int] = 1,
+                                   max_solutions: Optional[int] = None,
+                                   timeout: Optional[float] = None,
+                                   cube_limit: int = CUBE_LIMIT,
+                                   projection: Optional[Iterable[str]] = None
+                                   ) -> Iterator[Configuration]:
+    """Yield the full configurations derived from the partial configuration, cube by cube
+    (projected onto the given features, if any)."""
+    if max_solutions is not None and max_solutions <= 0:
+        return
+    context = get_context(fm_model, sat_model)
+    deadline = None if timeout is None else time.time() + timeout
+    variables = [context.variables[feature] for feature in split_variables(fm_model)]
+    variables.extend(sorted(set(context.features) - set(variables)))
+    projection_variables = None
+    if projection is not None:
+        projection_variables = context.projection_variables(projection)
+        projected = set(projection_variables)
+        variables = [variable for variable in variables if variable in projected]
+    cubes = generate_cubes(context.solver, context.assumptions(configuration), variables,
+                           n_cubes)
+    LOGGER.debug('Enumerating the full configurations of %s in %d cubes',
+                 configuration, len(cubes))
+    n_solutions = 0
+    if processes == 1:
+        for cube in cubes:
+            remaining = None if max_solutions is None else max_solutions - n_solutions
+            for solution in conquer_cube(context.clauses, cube, variables, cube_limit,
+                                         remaining, deadline, projection_variables):
+                yield _configuration(context.features,
+                                     _selected(solution, context.features, projection_variables))
+                n_solutions += 1
+            if max_solutions is not None and n_solutions >= max_solutions:
+                return
+            if deadline is not None and time.time() >= deadline:
+                return
+        return
+    tasks = ((cube, variables, cube_limit, max_solutions, deadline, projection_variables)
+             for cube in cubes)
+    # Number of solutions found by all the workers, so that they stop at max_solutions
+    counter = multiprocessing.Value('q', 0)
+    for solutions in run_in_pool(tasks, (context, counter), _conquer, processes):
+        for solution in solutions:
+            yield _configuration(context.features, solution)
+            n_solutions += 1
+            if max_solutions is not None and n_solutions >= max_solutions:
+                return
+
+
+def split_variables(fm_model: FeatureModel) -> list[str]:
+    """Features to split the space on: the variants of the variation points, from the root of
+    the feature model down (the variants of shallower variation points first), since they
+    decide the largest subtrees."""
+    ancestors = ancestors_index(fm_model)
+    variation_points = FMVariationPoints().execute(fm_model).get_result()
+    variants: dict[str, None] = {}
+    for vp in sorted(variation_points, key=lambda vp: len(ancestors[vp.name])):
+        variants.update(dict.fromkeys(variant.name for variant in variation_points[vp]))
+    return list(variants)
+
+
+def generate_cubes(solver: Solver,
+                   assumptions: list[int],
+                   variables: list[int],
+                   n_cubes: int) -> list[list[int]]:
+    """Split the models of the solver under the assumptions into disjoint cubes (lists of
+    literals, starting with the assumptions), until there are at least `n_cubes` cubes or
+    there are no variables left to split on.
+
+    A variable is not split in the cubes where unit propagation already assigns it, and the
+    cubes refuted by unit propagation are discarded.
+    """
+    count('propagations')
+    consistent, implied = solver.propagate(assumptions=assumptions)
+    if not consistent:
+        return []
+    # (cube, variables assigned in the cube by unit propagation)
+    cubes = [(list(assumptions), {abs(literal) for literal in implied})]
+    for variable in variables:
+        if len(cubes) >= n_cubes:
+            break
+        split_cubes = []
+        for cube, assigned in cubes:
+            if variable in assigned:
+                split_cubes.append((cube, assigned))
+                continue
+            for literal in (variable, -variable):
+                count('propagations')
+                consistent, implied = solver.propagate(assumptions=cube + [literal])
+                if consistent:
+                    split_cubes.append((cube + [literal], {abs(lit) for lit in implied}))
+        cubes = split_cubes
+    count('cubes', len(cubes))
+    return [cube for cube, _ in cubes]
+
+
+def conquer_cube(clauses: list[list[int]],
+                 cube: list[int],
+                 variables: list[int],
+                 cube_limit: int = CUBE_LIMIT,
+                 max_solutions: Optional[int] = None,
+                 deadline: Optional[float] = None,
+                 projection: Optional[list[int]] = None) -> Iterator[list[int]]:
+    """Yield the models of the clauses in the cube, each one exactly once (or one model for
+    each assignment of the projection variables, with a projection).
+
+    The cube is enumerated with a fresh solver until `cube_limit` models are found. If the
+    cube is not exhausted by then, the solver is discarded and the cube is split on its next
+    unassigned variables, until each part has at most `cube_limit` of the models already found;
+    each part is enumerated with a fresh solver that only blocks the models already found in
+    that part. So no solver holds more than two times `cube_limit` blocking clauses, however
+    many models the cube has (except the solvers of cubes that assign all the variables to
+    split on, which have few models).
+    """
+    n_solutions = 0
+    # (cube, models of the cube already found, whether the enumeration is limited)
+    stack: list[tuple[list[int], list[list[int]], bool]] = [(cube, [], True)]
+    while stack:
+        cube, found, limited = stack.pop()
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                return
+        limit = cube_limit if limited else None
+        if max_solutions is not None:
+            limit = max_solutions - n_solutions if limit is None else min(
+                limit, max_solutions - n_solutions)
+        count('cube_solvers')
+        solver = Solver(name=CUBE_SOLVER, bootstrap_with=clauses)
+        try:
+            for solution in found:
+                solver.add_clause(blocking_clause(solution, projection=projection))
+            new_solutions = []
+            for solution in enumerate_models(solver, cube, limit, timeout,
+                                             projection=projection):
+                new_solutions.append(solution)
+                yield solution
+        finally:
+            solver.delete()
+        n_solutions += len(new_solutions)
+        if max_solutions is not None and n_solutions >= max_solutions:
+            return
+        if limit is None or len(new_solutions) < limit:
+            continue  # The cube is exhausted (or the time is over)
+        stack.extend(split_cube(cube, found + new_solutions, variables, cube_limit))
+
+
+def split_cube(cube: list[int],
+               found: list[list[int]],
+               variables: list[int],
+               cube_limit: int) -> list[tuple[list[int], list[list[int]], bool]]:
+    """Split the cube on its next unassigned variables until each part has at most
+    `cube_limit` of the models found, and return the parts as (cube, models of the cube
+    already found, whether the enumeration is limited)."""
+    parts = []
+    pending = [(cube, found)]
+    while pending:
+        cube, found = pending.pop()
+        assigned = {abs(literal) for literal in cube}
+        variable = next((var for var in variables if var not in assigned), None)
+        if variable is None:
+            parts.append((cube, found, False))
+            continue
+        for literal in (-variable, variable):
+            # The models assign all the variables in order (model[i] is variable i + 1)
+            half = [solution for solution in found if solution[variable - 1] == literal]
+            if len(half) > cube_limit:
+                pending.append((cube + [literal], half))
+            else:
+                parts.append((cube + [literal], half, True))
+    return parts
+
+
+def _selected(solution: list[int],
+              features: dict[int, str],
+              projection: Optional[list[int]]) -> list[int]:
+    """Variables of the selected features of the model (only the projected ones, if any)."""
+    if projection is None:
+        return [variable for variable in solution if variable > 0 and variable in features]
+    return [variable for variable in projection if solution[variable - 1] > 0]
+
+
+def _configuration(features: dict[int, str], selected: Iterable[int]) -> Configuration:
+    return Configuration({features[variable]: True for variable in selected})
+
+
+def _conquer(state: tuple[FullConfigurationsContext, Any],
+             task: tuple[list[int], list[int], int, Optional[int], Optional[float],
+                         Optional[list[int]]]) -> list[list[int]]:
+    cube, variables, cube_limit, max_solutions, deadline, projection = task
+    context, counter = state
+    solutions = []
+    for solution in conquer_cube(context.clauses, cube, variables, cube_limit, max_solutions,
+                                 deadline, projection):
+        # Only the selected features are sent back, to reduce the communication
+        solutions.append(_selected(solution, context.features, projection))
+        if max_solutions is not None and len(solutions) % COUNTER_STEP == 0:
+            with counter.get_lock():
+                counter.value += COUNTER_STEP
+                if counter.value >= max_solutions:
+                    break
+    return solutions
@@ -0,0 +1,268 @@
+import random
+from fractions import Fraction
+from typing import Any, Optional, Union, cast
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.core.exceptions import FlamaException
+from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.productline_metamodel.operations.bdd_counting import BDDCounter, _regular
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    ancestors_index,
+    decided_features,
+    group_variation_points_index
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+Weight = Union[int, Fraction]
+
+
+class FullConfigurationsSampling(Operation):
+    """Random sample of the full configurations that can be derived from a partial
+    configuration, without enumerating them.
+
+    The partial configuration is extended as in FullConfigurations (core features, ancestors
+    of the selected features, and unselected variants of the decided variation points), and the
+    BDD of the model is restricted to it (conjoined with the cube of the decided features). The
+    configurations are sampled from the restricted BDD by counting-based sampling: the
+    (weighted) number of configurations below each node is computed once, and then each
+    configuration is drawn top-down in time linear in the number of variables, regardless of
+    the number of completions.
+
+    By default the sample is uniform. With `set_weights`, each configuration is drawn with
+    probability proportional to the product of the weights of its selected features
+    (features without weight have weight 1); see `attribute_weights` to use the values of an
+    attribute of the features as weights.
+    The sample is without replacement (so its size is bounded by the number of completions with
+    positive weight) unless `set_with_replacement(True)` is used: each drawn configuration is
+    removed from the restricted BDD before drawing the next one.
+    """
+
+    def __init__(self) -> None:
+        self.result: list[Configuration] = []
+        self.configuration: Configuration = Configuration({})
+        self.sample_size: int = 0
+        self.weights: Optional[dict[Any, float]] = None
+        self.with_replacement: bool = False
+        self.seed: Optional[int] = None
+
+    def set_configuration(self, configuration: Configuration) -> None:
+        self.configuration = configuration
+
+    def set_sample_size(self, sample_size: int) -> None:
+        if sample_size < 0:
+            raise FlamaException(f'Sample size {sample_size} cannot be negative.')
+        self.sample_size = sample_size
+
+    def set_weights(self, weights: Optional[dict[Any, float]]) -> None:
+        """Non-negative weight of each feature (None for a uniform sample)."""
+        self.weights = weights
+
+    def set_with_replacement(self, with_replacement: bool) -> None:
+        self.with_replacement = with_replacement
+
+    def set_seed(self, seed: Optional[int]) -> None:
+        self.seed = seed
+
+    @profiled('FullConfigurationsSampling')
+    def execute(self, model: VariabilityModel) -> 'FullConfigurationsSampling':
+        bdd_model = cast(BDDModel, model)
+        self.result = sample_full_configurations(self.configuration,
+                                                 bdd_model,
+                                                 self.sample_size,
+                                                 self.weights,
+                                                 self.with_replacement,
+                                                 random.Random(self.seed))
+        return self
+
+    def get_result(self) -> list[Configuration]:
+        return self.result
+
+    def sample(self) -> list[Configuration]:
+        return self.get_result()
+
+
+def sample_full_configurations(configuration: Configuration,
+                               bdd_model: BDDModel,
+                               sample_size: int,
+                               weights: Optional[dict[Any, float]] = None,
+                               with_replacement: bool = False,
+                               rng: Optional[random.Random] = None) -> list[Configuration]:
+    assignment = completion_assignment(configuration, bdd_model)
+    root = bdd_model.root & bdd_model.bdd.cube(assignment)
+    variable_weights = None
+    if weights is not None:
+        variable_weights = {bdd_model.features_vars[feature]: weight
+                            for feature, weight in weights.items()
+                            if feature in bdd_model.features_vars}
+    sampler = BDDSampler(bdd_model, root, variable_weights, rng)
+    sample: list[Configuration] = []
+    while len(sample) < sample_size and sampler.total() > 0:
+        values = sampler.sample()
+        if not with_replacement:
+            # Remove the drawn configuration from the function, so the next one is drawn from
+            # the remaining configurations (only the nodes of the new path are weighted again)
+            sampler.exclude(values)
+        completion = Configuration({bdd_model.vars_features[var]: True
+                                    for var, value in values.items() if value})
+        completion.set_full(True)
+        sample.append(completion)
+    return sample
+
+
+CompletionRules = tuple[frozenset[str], dict[str, frozenset[str]], dict[str, list[str]]]
+
+
+def completion_rules(bdd_model: BDDModel,
+                     counter: Optional[BDDCounter] = None) -> CompletionRules:
+    """Core variables, ancestors and group variation points of the BDD model, in terms of its
+    variables, to extend partial configurations as in FullConfigurations."""
+    if counter is None:
+        counter = BDDCounter(bdd_model)
+    total = counter.count()
+    core = frozenset(var for var, frequency in counter.feature_inclusion_frequency().items()
+                     if total > 0 and frequency == total)
+    # The features of the original model of the BDD model are named as its variables
+    fm_model = cast(FeatureModel, bdd_model.original_model)
+    return core, ancestors_index(fm_model), group_variation_points_index(fm_model)
+
+
+def completion_assignment(configuration: Configuration,
+                          bdd_model: BDDModel,
+                          rules: Optional[CompletionRules] = None) -> dict[str, bool]:
+    """Assignment of the BDD variables decided by the partial configuration."""
+    for feature in configuration.elements:
+        if feature not in bdd_model.features_vars:
+            raise FlamaException(f'Feature {feature} not found')
+    if rules is None:
+        rules = completion_rules(bdd_model)
+    variables_configuration = Configuration({bdd_model.features_vars[feature]: selected
+                                             for feature, selected
+                                             in configuration.elements.items()})
+    return decided_features(variables_configuration, *rules)
+
+
+def attribute_weights(fm_model: FeatureModel,
+                      attribute_name: str,
+                      default: float = 1.0) -> dict[str, float]:
+    """Weights of the features given by the values of one of their attributes (default for the
+    features without the attribute)."""
+    weights = {}
+    for feature in fm_model.get_features():
+        weight = default
+        for attribute in feature.get_attributes():
+            if attribute.name == attribute_name and attribute.default_value is not None:
+                weight = float(attribute.default_value)
+        weights[feature.name] = weight
+    return weights
+
+
+class BDDSampler:
+    """Counting-based random sampling of the models of a BDD function over all the variables
+    of the BDD model, uniform or weighted (the weight of a model is the product of the weights
+    of its true variables).
+
+    The weighted count below each node is computed once (exact integers for the uniform case,
+    fractions otherwise), and each sample takes time linear in the number of variables.
+    """
+
+    def __init__(self,
+                 bdd_model: BDDModel,
+                 root: Optional[Any] = None,
+                 weights: Optional[dict[str, float]] = None,
+                 rng: Optional[random.Random] = None) -> None:
+        self.bdd = bdd_model.bdd
+        self.root = bdd_model.root if root is None else root
+        self.rng = rng if rng is not None else random.Random()
+        self.variables: list[str] = sorted(bdd_model.vars_order, key=self.bdd.level_of_var)
+        self.n_vars = len(self.variables)
+        self._var_index = {var: i for i, var in enumerate(self.variables)}
+        self._weights: list[Weight] = [1] * self.n_vars
+        if weights is not None:
+            for var, weight in weights.items():
+                if weight < 0:
+                    raise FlamaException(f'Weight {weight} of {var} cannot be negative.')
+                self._weights[self._var_index[var]] = Fraction(weight)
+        # _suffix[i]: total weight of the assignments of the variables i, ..., n_vars - 1
+        self._suffix: list[Weight] = [1] * (self.n_vars + 1)
+        for i in range(self.n_vars - 1, -1, -1):
+            self._suffix[i] = self._suffix[i + 1] * (1 + self._weights[i])
+        self._node_weights: dict[Any, Weight] = {}
+
+    def total(self) -> Weight:
+        """Total weight of the models of the function."""
+        return self._weight(self.root) * self._gap(0, self._index(self.root))
+
+    def sample(self) -> dict[str, bool]:
+        """Random model of the function (assignment of all the variables)."""
+        values: dict[str, bool] = {}
+        function = self.root
+        i = 0
+        while True:
+            node = _regular(function)
+            node_index = self._index(node)
+            for j in range(i, node_index):
+                weight = self._weights[j]
+                values[self.variables[j]] = self.rng.random() < weight / (1 + weight)
+            if node.var is None:
+                return values
+            low, high = node.low, node.high
+            if function.negated:
+                low, high = ~low, ~high
+            low_weight = self._weight(low) * self._gap(node_index + 1, self._index(low))
+            high_weight = (self._weights[node_index] * self._weight(high)
+                           * self._gap(node_index + 1, self._index(high)))
+            selected = self.rng.random() < high_weight / (low_weight + high_weight)
+            values[node.var] = selected
+            function = high if selected else low
+            i = node_index + 1
+
+    def exclude(self, values: dict[str, bool]) -> None:
+        """Remove the model (assignment of all the variables) from the function."""
+        self.root = self.root & ~self.bdd.cube(values)
+
+    def _index(self, function: Any) -> int:
+        var = _regular(function).var
+        return self.n_vars if var is None else self._var_index[var]
+
+    def _gap(self, first: int, last: int) -> Weight:
+        """Total weight of the assignments of the variables first, ..., last - 1."""
+        if isinstance(self._suffix[first], int):
+            return self._suffix[first] // self._suffix[last]
+        return self._suffix[first] / self._suffix[last]
+
+    def _weight(self, function: Any) -> Weight:
+        """Weighted count of the function over the variables from its level on."""
+        node = _regular(function)
+        if node.var is None:
+            weight: Weight = 1
+        else:
+            if node not in self._node_weights:
+                self._compute_weights(node)
+            weight = self._node_weights[node]
+        if function.negated:
+            weight = self._suffix[self._index(node)] - weight
+        return weight
+
+    def _compute_weights(self, root: Any) -> None:
+        # Iterative post-order traversal, to avoid deep recursion on large BDDs
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in self._node_weights:
+                continue
+            children = [_regular(node.low), _regular(node.high)]
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children
+                             if child.var is not None and child not in self._node_weights)
+                continue
+            node_index = self._index(node)
+            low_weight = self._weight(node.low) * self._gap(node_index + 1,
+                                                            self._index(node.low))
+            high_weight = (self._weights[node_index] * self._weight(node.high)
+                           * self._gap(node_index + 1, self._index(node.high)))
+            self._node_weights[node] = low_weight + high_weight
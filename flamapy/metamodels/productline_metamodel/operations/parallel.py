@@ -0,0 +1,43 @@
+import functools
+import multiprocessing
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def run_in_pool(tasks: Iterable[T],
+                state: Any,
+                function: Callable[[Any, T], R],
+                processes: Optional[int] = 1,
+                ordered: bool = True,
+                chunksize: int = 1) -> Iterator[R]:
+    """Yield `function(state, task)` for each task.
+
+    With `processes` 1, the tasks are run in-process, one by one, as the results are consumed.
+    Otherwise (None for the number of CPUs), they are run by a pool of worker processes: the
+    state (e.g., the context of a model) is sent once to each worker when it starts, instead of
+    with each task, and the results are yielded in the order of the tasks (or as they finish,
+    if `ordered` is False). The function must be defined at the top level of a module, so that
+    it can be sent to the workers.
+    """
+    if processes == 1:
+        for task in tasks:
+            yield function(state, task)
+        return
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(state,)) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(functools.partial(_run, function), tasks, chunksize)
+
+
+_WORKER_STATE: Any = None
+
+
+def _init_worker(state: Any) -> None:
+    global _WORKER_STATE  # pylint: disable=global-statement
+    _WORKER_STATE = state
+
+
+def _run(function: Callable[[Any, T], R], task: T) -> R:
+    return function(_WORKER_STATE, task)
@@ -0,0 +1,41 @@
+from typing import Any, cast
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.productline_metamodel.operations.bdd_counting import BDDCounter
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+class PLBDDFeatureInclusionFrequency(Operation):
+    """The Feature Inclusion Frecuency (FIF) operation determines the frequency
+    for a variable to be included in a valid solution.
+    That is, in how many products are present each variable.
+
+    This is the PLFeatureInclusionFrequency operation for the product line of all the valid
+    configurations of a feature model, represented as a BDD. The frequencies are exact and are
+    computed by dynamic programming over the BDD, without enumerating the configurations.
+
+    Ref.: [Heradio et al. 2019. Supporting the Statistical Analysis of Variability Models.
+    (https://doi.org/10.1109/ICSE.2019.00091)]
+    """
+
+    def __init__(self) -> None:
+        self._result: dict[Any, int] = {}
+
+    @profiled('PLBDDFeatureInclusionFrequency')
+    def execute(self, model: VariabilityModel) -> 'PLBDDFeatureInclusionFrequency':
+        bdd_model = cast(BDDModel, model)
+        self._result = feature_inclusion_frequency(bdd_model)
+        return self
+
+    def get_result(self) -> dict[Any, int]:
+        return self._result
+
+    def feature_inclusion_frequency(self) -> dict[Any, int]:
+        return self.get_result()
+
+
+def feature_inclusion_frequency(bdd_model: BDDModel) -> dict[Any, int]:
+    fif = BDDCounter(bdd_model).feature_inclusion_frequency()
+    return {bdd_model.vars_features[var]: frequency for var, frequency in fif.items()}
@@ -0,0 +1,54 @@
+from typing import Any, Optional, cast
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.productline_metamodel.operations.bdd_counting import BDDCounter
+from flamapy.metamodels.productline_metamodel.operations.pl_bdd_feature_inclusion_frequency import (
+    feature_inclusion_frequency
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+class PLBDDFeatureInclusionProbability(Operation):
+    """The Feature Inclusion Probability (FIP) operation determines the probability
+    for a variable to be included in a valid solution.
+
+    This is the PLFeatureInclusionProbability operation for the product line of all the valid
+    configurations of a feature model, represented as a BDD. The probabilities are derived from
+    the exact feature inclusion frequencies (see PLBDDFeatureInclusionFrequency), which can be
+    provided if they have already been computed.
+
+    Ref.: [Heradio et al. 2019. Supporting the Statistical Analysis of Variability Models.
+    (https://doi.org/10.1109/ICSE.2019.00091)]
+    """
+
+    def __init__(self) -> None:
+        self._result: dict[Any, float] = {}
+        self._feature_inclusion_frequency: Optional[dict[Any, int]] = None
+
+    def set_feature_inclusion_frequency(self, fif: dict[Any, int]) -> None:
+        """Result of PLBDDFeatureInclusionFrequency for the same model."""
+        self._feature_inclusion_frequency = fif
+
+    @profiled('PLBDDFeatureInclusionProbability')
+    def execute(self, model: VariabilityModel) -> 'PLBDDFeatureInclusionProbability':
+        bdd_model = cast(BDDModel, model)
+        self._result = feature_inclusion_probability(bdd_model, self._feature_inclusion_frequency)
+        return self
+
+    def get_result(self) -> dict[Any, float]:
+        return self._result
+
+    def feature_inclusion_probability(self) -> dict[Any, float]:
+        return self.get_result()
+
+
+def feature_inclusion_probability(bdd_model: BDDModel,
+                                  fif: Optional[dict[Any, int]] = None) -> dict[Any, float]:
+    n_configs = BDDCounter(bdd_model).count()
+    if fif is None:
+        fif = feature_inclusion_frequency(bdd_model)
+    if n_configs == 0:
+        return {feature: 0.0 for feature in fif}
+    return {feature: frequency / n_configs for feature, frequency in fif.items()}
@@ -0,0 +1,51 @@
+from typing import Any, cast
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.productline_metamodel.operations.bdd_counting import BDDCounter
+from flamapy.metamodels.productline_metamodel.operations.pl_product_distribution import (
+    descriptive_statistics
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+class PLBDDProductDistribution(Operation):
+    """The product distribution computes the number of activated features per product.
+
+    This is the PLProductDistribution operation for the product line of all the valid
+    configurations of a feature model, represented as a BDD. The distribution is exact and is
+    computed by dynamic programming over the BDD, without enumerating the configurations.
+
+     The operation returns a list that stores:
+        + In index 0, the number of products with 0 features activated.
+        + In index 1, the number of products with 1 feature activated.
+        ...
+        + In index n, the number of products with n features activated.
+
+    For detailed information, see the paper: 
+        Heradio, R., Fernandez-Amoros, D., Mayr-Dorn, C., Egyed, A.:
+        Supporting the statistical analysis of variability models. 
+        In: 41st International Conference on Software Engineering (ICSE), pp. 843-853. 2019.
+        DOI: https://doi.org/10.1109/ICSE.2019.00091
+    """
+
+    def __init__(self) -> None:
+        self._result: list[int] = []
+        self._desc_stats: dict[str, Any] = dict()
+
+    @profiled('PLBDDProductDistribution')
+    def execute(self, model: VariabilityModel) -> 'PLBDDProductDistribution':
+        bdd_model = cast(BDDModel, model)
+        self._result = BDDCounter(bdd_model).product_distribution()
+        self._desc_stats = descriptive_statistics(self._result)
+        return self
+
+    def get_result(self) -> list[int]:
+        return self._result
+
+    def product_distribution(self) -> list[int]:
+        return self.get_result()
+
+    def descriptive_statistics(self) -> dict[str, Any]:
+        return self._desc_stats
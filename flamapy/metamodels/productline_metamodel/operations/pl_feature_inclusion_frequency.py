@@ -1,9 +1,14 @@
-from typing import Any, cast
-from collections import defaultdict
+from typing import Any, Optional, cast
+
+import numpy as np
 
 from flamapy.core.models import VariabilityModel
 from flamapy.core.operations import Operation
 from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.operations.pl_inclusion_matrix import (
+    inclusion_counts
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
 
 
 class PLFeatureInclusionFrequency(Operation):
@@ -11,16 +16,26 @@ class PLFeatureInclusionFrequency(Operation):
     for a variable to be included in a valid solution.
     That is, in how many products are present each variable.
 
+    The frequencies are maintained by the product line as products are added or removed,
+    so they are obtained without scanning the products. Alternatively, they are the column
+    sums of an inclusion matrix of the product line (see PLInclusionMatrix) if one is provided.
+
     Ref.: [Heradio et al. 2019. Supporting the Statistical Analysis of Variability Models.
     (https://doi.org/10.1109/ICSE.2019.00091)]
     """
 
     def __init__(self) -> None:
         self._result: dict[Any, int] = {}
+        self._inclusion_matrix: Optional[tuple[list[Any], np.ndarray]] = None
+
+    def set_inclusion_matrix(self, matrix: tuple[list[Any], np.ndarray]) -> None:
+        """Inclusion matrix (features, matrix) of the product line, as in PLInclusionMatrix."""
+        self._inclusion_matrix = matrix
 
+    @profiled('PLFeatureInclusionFrequency')
     def execute(self, model: VariabilityModel) -> 'PLFeatureInclusionFrequency':
         pl_model = cast(ProductLineModel, model)
-        self._result = feature_inclusion_frequency(pl_model)
+        self._result = feature_inclusion_frequency(pl_model, self._inclusion_matrix)
         return self
 
     def get_result(self) -> dict[Any, int]:
@@ -30,12 +45,13 @@ class PLFeatureInclusionFrequency(Operation):
         return self.get_result()
 
 
-def feature_inclusion_frequency(pl_model: ProductLineModel) -> dict[Any, int]:
-    n_configs = len(pl_model.configurations)
-    if n_configs == 0:
+def feature_inclusion_frequency(pl_model: ProductLineModel,
+                                matrix: Optional[tuple[list[Any], np.ndarray]] = None
+                                ) -> dict[Any, int]:
+    if len(pl_model.configurations) == 0:
         return {feature: 0 for feature in pl_model.features()}
-    fip: dict[Any, int] = defaultdict(int)
-    for config in pl_model.configurations:
-        for feature in config.get_selected_elements():
-            fip[feature] += 1
-    return {feature: fip[feature] for feature in pl_model.features()}
+    if matrix is None:
+        fif = pl_model.feature_inclusion_frequency()
+    else:
+        fif = inclusion_counts(*matrix)
+    return {feature: fif.get(feature, 0) for feature in pl_model.features()}
@@ -1,25 +1,48 @@
-from typing import Any, cast
-from collections import defaultdict
+from typing import Any, Optional, cast
+
+import numpy as np
 
 from flamapy.core.models import VariabilityModel
 from flamapy.core.operations import Operation
 from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.operations.pl_feature_inclusion_frequency import (
+    feature_inclusion_frequency
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled
 
 
 class PLFeatureInclusionProbability(Operation):
     """The Feature Inclusion Probability (FIP) operation determines the probability
     for a variable to be included in a valid solution.
 
+    The probabilities are derived from the feature inclusion frequencies (FIF).
+    A FIF result or an inclusion matrix already computed for the same product line can be
+    provided, so that FIF and FIP are obtained with a single pass over the products.
+
     Ref.: [Heradio et al. 2019. Supporting the Statistical Analysis of Variability Models.
     (https://doi.org/10.1109/ICSE.2019.00091)]
     """
 
     def __init__(self) -> None:
         self._result: dict[Any, float] = {}
+        self._inclusion_matrix: Optional[tuple[list[Any], np.ndarray]] = None
+        self._feature_inclusion_frequency: Optional[dict[Any, int]] = None
+
+    def set_inclusion_matrix(self, matrix: tuple[list[Any], np.ndarray]) -> None:
+        """Inclusion matrix (features, matrix) of the product line, as in PLInclusionMatrix."""
+        self._inclusion_matrix = matrix
+
+    def set_feature_inclusion_frequency(self, fif: dict[Any, int]) -> None:
+        """Result of PLFeatureInclusionFrequency for the same product line."""
+        self._feature_inclusion_frequency = fif
 
+    @profiled('PLFeatureInclusionProbability')
     def execute(self, model: VariabilityModel) -> 'PLFeatureInclusionProbability':
         pl_model = cast(ProductLineModel, model)
-        self._result = feature_inclusion_probability(pl_model)
+        fif = self._feature_inclusion_frequency
+        if fif is None:
+            fif = feature_inclusion_frequency(pl_model, self._inclusion_matrix)
+        self._result = feature_inclusion_probability(pl_model, fif)
         return self
 
     def get_result(self) -> dict[Any, float]:
@@ -29,12 +52,11 @@ class PLFeatureInclusionProbability(Operation):
         return self.get_result()
 
 
-def feature_inclusion_probability(pl_model: ProductLineModel) -> dict[Any, float]:
+def feature_inclusion_probability(pl_model: ProductLineModel,
+                                  fif: Optional[dict[Any, int]] = None) -> dict[Any, float]:
     n_configs = len(pl_model.configurations)
     if n_configs == 0:
         return {feature: 0.0 for feature in pl_model.features()}
-    fip: dict[Any, float] = defaultdict(float)
-    for config in pl_model.configurations:
-        for feature in config.get_selected_elements():
-            fip[feature] += 1
-    return {feature: fip[feature] / n_configs for feature in pl_model.features()}
+    if fif is None:
+        fif = feature_inclusion_frequency(pl_model)
+    return {feature: fif.get(feature, 0) / n_configs for feature in pl_model.features()}
@@ -0,0 +1,64 @@
+from typing import Any, cast
+
+import numpy as np
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+class PLInclusionMatrix(Operation):
+    """The inclusion matrix of a product line is a boolean matrix of products x features,
+    where the cell (i, j) is True if the product i includes the feature j.
+
+    The result is a tuple with the list of features (the columns of the matrix) and the matrix.
+    It can be computed once and shared by the operations that aggregate over the products
+    (e.g., PLFeatureInclusionFrequency and PLFeatureInclusionProbability).
+    """
+
+    def __init__(self) -> None:
+        self._result: tuple[list[Any], np.ndarray] = ([], np.zeros((0, 0), dtype=bool))
+
+    @profiled('PLInclusionMatrix')
+    def execute(self, model: VariabilityModel) -> 'PLInclusionMatrix':
+        pl_model = cast(ProductLineModel, model)
+        self._result = inclusion_matrix(pl_model)
+        return self
+
+    def get_result(self) -> tuple[list[Any], np.ndarray]:
+        return self._result
+
+    def inclusion_matrix(self) -> tuple[list[Any], np.ndarray]:
+        return self.get_result()
+
+
+def inclusion_matrix(pl_model: ProductLineModel) -> tuple[list[Any], np.ndarray]:
+    if pl_model.is_compact():
+        return _inclusion_matrix_from_masks(pl_model)
+    features = list(pl_model.features())
+    features_index = {feature: i for i, feature in enumerate(features)}
+    selected = [config.get_selected_elements() for config in pl_model.configurations]
+    matrix = np.zeros((len(selected), len(features)), dtype=bool)
+    rows = np.repeat(np.arange(len(selected)), [len(elements) for elements in selected])
+    columns = np.fromiter((features_index[f] for elements in selected for f in elements),
+                          dtype=np.intp, count=len(rows))
+    matrix[rows, columns] = True
+    return features, matrix
+
+
+def _inclusion_matrix_from_masks(pl_model: ProductLineModel) -> tuple[list[Any], np.ndarray]:
+    features_index = pl_model.feature_index()
+    features = sorted(features_index, key=features_index.__getitem__)
+    masks = pl_model.masks()
+    n_bytes = (len(features) + 7) // 8
+    packed = np.frombuffer(b''.join(mask.to_bytes(n_bytes, 'little') for mask in masks),
+                           dtype=np.uint8).reshape(len(masks), n_bytes)
+    matrix = np.unpackbits(packed, axis=1, count=len(features), bitorder='little')
+    return features, matrix.astype(bool)
+
+
+def inclusion_counts(features: list[Any], matrix: np.ndarray) -> dict[Any, int]:
+    """Number of products that include each feature (column sums of the inclusion matrix)."""
+    counts = np.count_nonzero(matrix, axis=0)
+    return {feature: int(count) for feature, count in zip(features, counts)}
@@ -1,10 +1,15 @@
-import statistics
+import math
 from collections import defaultdict
-from typing import cast, Any, Optional
+from fractions import Fraction
+from typing import cast, Any, Union
 
 from flamapy.core.models import VariabilityModel
 from flamapy.core.operations import Operation
 from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+PERCENTILES = [5, 25, 50, 75, 95]
 
 
 class PLProductDistribution(Operation):
@@ -28,11 +33,12 @@ class PLProductDistribution(Operation):
         self._prod_dist: dict[int, int] = dict()
         self._desc_stats: dict[str, Any] = dict()
 
+    @profiled('PLProductDistribution')
     def execute(self, model: VariabilityModel) -> 'PLProductDistribution':
         pl_model = cast(ProductLineModel, model)
         self._prod_dist = product_distribution(pl_model)
         self._desc_stats = descriptive_statistics(self._prod_dist)
-        self._result = [self._prod_dist[i] for i in range(0, len(pl_model.features()) + 1)]
+        self._result = [self._prod_dist.get(i, 0) for i in range(0, len(pl_model.features()) + 1)]
         return self
 
     def get_result(self) -> list[int]:
@@ -46,22 +52,73 @@ class PLProductDistribution(Operation):
 
 
 def product_distribution(pl_model: ProductLineModel) -> dict[int, int]:
-    dist: dict[int, int] = defaultdict(int)
-    for config in pl_model.configurations:
-        dist[len(config.get_selected_elements())] += 1
-    return dist
-   
+    """Number of products per number of selected features, as maintained by the product line."""
+    return pl_model.size_histogram()
+
+
+def descriptive_statistics(prod_dist: Union[dict[int, int], list[int]]) -> dict[str, Any]:
+    """Descriptive statistics of the number of features per product.
 
-def descriptive_statistics(prod_dist: dict[int, int]) -> dict[str, Any]:
+    The statistics are computed directly from the histogram (size -> number of products) with
+    exact integer and Fraction arithmetic, so the number of products can be arbitrarily large
+    (e.g., counts obtained from a BDD). The histogram can be given as a dict or as a list
+    indexed by size.
+    """
+    if isinstance(prod_dist, list):
+        prod_dist = dict(enumerate(prod_dist))
+    histogram = sorted((size, count) for size, count in prod_dist.items() if count > 0)
+    total = sum(count for _, count in histogram)
     desc_stats: dict[str, Any] = dict()
-    desc_stats['Min'] = min(prod_dist.keys())
-    desc_stats['Max'] = max(prod_dist.keys())
+    if total == 0:
+        for stat in ['Min', 'Max', 'Range', 'Mode', 'Mean', 'Standard deviation', 'Median',
+                     'Median absolute deviation', 'Percentiles']:
+            desc_stats[stat] = None
+        return desc_stats
+    desc_stats['Min'] = histogram[0][0]
+    desc_stats['Max'] = histogram[-1][0]
     desc_stats['Range'] = desc_stats['Max'] - desc_stats['Min']
-    desc_stats['Mode'] = max(prod_dist, key=prod_dist.get)
-    expanded_list = [elem for list in ([i] * count for i, count in prod_dist.items()) 
-                     for elem in list]
-    desc_stats['Mean'] = statistics.mean(expanded_list)
-    desc_stats['Standard deviation'] = statistics.stdev(expanded_list)
-    desc_stats['Median'] = statistics.median(expanded_list)
-    #desc_stats['Median absolute deviation'] = None
+    desc_stats['Mode'] = max(histogram, key=lambda item: item[1])[0]
+    mean = Fraction(sum(size * count for size, count in histogram), total)
+    desc_stats['Mean'] = float(mean)
+    # Sample standard deviation, as statistics.stdev
+    squared_deviations = sum(count * (size - mean) ** 2 for size, count in histogram)
+    desc_stats['Standard deviation'] = (math.sqrt(squared_deviations / (total - 1))
+                                        if total > 1 else 0.0)
+    median = _quantile(histogram, total, Fraction(1, 2))
+    desc_stats['Median'] = _to_number(median)
+    abs_deviations: dict[Fraction, int] = defaultdict(int)
+    for size, count in histogram:
+        abs_deviations[abs(size - median)] += count
+    desc_stats['Median absolute deviation'] = _to_number(
+        _quantile(sorted(abs_deviations.items()), total, Fraction(1, 2)))
+    desc_stats['Percentiles'] = {p: _to_number(_quantile(histogram, total, Fraction(p, 100)))
+                                 for p in PERCENTILES}
     return desc_stats
+
+
+def _quantile(histogram: list[tuple[Any, int]], total: int, q: Fraction) -> Fraction:
+    """Quantile q of a sorted histogram, with linear interpolation between the closest ranks.
+
+    It is equivalent to the quantile of the expanded list of values, without expanding it.
+    """
+    position = (total - 1) * q
+    lower = math.floor(position)
+    lower_value = _kth_value(histogram, lower)
+    if position == lower:
+        return Fraction(lower_value)
+    upper_value = _kth_value(histogram, lower + 1)
+    return lower_value + (position - lower) * (upper_value - lower_value)
+
+
+def _kth_value(histogram: list[tuple[Any, int]], k: int) -> Any:
+    """Value at position k (0-based) of the expanded list of values of the histogram."""
+    cumulative = 0
+    for value, count in histogram:
+        cumulative += count
+        if k < cumulative:
+            return value
+    return histogram[-1][0]
+
+
+def _to_number(value: Fraction) -> Union[int, float]:
+    return value.numerator if value.denominator == 1 else float(value)
@@ -0,0 +1,202 @@
+import logging
+from typing import Iterable, Iterator, NamedTuple, Optional, Union, cast
+
+from flamapy.core.models import VariabilityModel
+from flamapy.core.operations import Operation
+from flamapy.core.exceptions import FlamaException
+from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
+from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.operations.full_configurations import get_context
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext
+)
+from flamapy.metamodels.productline_metamodel.operations.parallel import run_in_pool
+from flamapy.metamodels.productline_metamodel.profiling import profiled, count
+
+
+LOGGER = logging.getLogger('PortfolioValidity')
+
+
+class ValidityResult(NamedTuple):
+    """Validity of the product at position `index` of the portfolio.
+
+    For an invalid product, the diagnosis includes the selected features whose ancestors are
+    not selected (feature -> missing ancestors), the violated relations and cross-tree
+    constraints of the feature model, and the conflicting features (the features of the
+    product that the solver found in an unsatisfiable core).
+    """
+    index: int
+    configuration: Configuration
+    valid: bool
+    missing_ancestors: dict[str, list[str]]
+    violated_relations: list[str]
+    violated_constraints: list[str]
+    conflict: list[str]
+    error: Optional[str] = None
+
+
+class PortfolioValidity(Operation):
+    """Check the validity of all the products of a portfolio against the feature model.
+
+    The products can be given as any iterable of configurations (e.g., a list of the products
+    of a portfolio file, or a reader stream), and the results follow its order, duplicates
+    included. A ProductLineModel can also be given, but its products are deduplicated and
+    unordered. All the products are checked with the shared solver of the model
+    (see FullConfigurationsContext), and the diagnosis of the invalid products is computed
+    from the relations and constraints of the feature model, which are extracted once.
+
+    By default the products are full configurations: the features not selected are
+    deselected. With `set_full(False)`, they are partial configurations: a product is valid if
+    it can be extended to a valid full configuration, and only the explicitly decided features
+    are used in the diagnosis.
+
+    The products are checked in-process by default, since each check is fast; with
+    `set_processes`, they are distributed among worker processes.
+    """
+
+    def __init__(self) -> None:
+        self.result: list[ValidityResult] = []
+        self.configurations: Iterable[Configuration] = []
+        self.full: bool = True
+        self.processes: Optional[int] = 1
+
+    def set_configurations(self,
+                           configurations: Union[ProductLineModel, Iterable[Configuration]]
+                           ) -> None:
+        if isinstance(configurations, ProductLineModel):
+            configurations = configurations.configurations
+        self.configurations = configurations
+
+    def set_full(self, full: bool) -> None:
+        """If True, the products are full configurations; otherwise, partial ones."""
+        self.full = full
+
+    def set_processes(self, processes: Optional[int]) -> None:
+        """Number of worker processes (None for the number of CPUs, 1 to run in-process)."""
+        self.processes = processes
+
+    @profiled('PortfolioValidity')
+    def execute(self, model: VariabilityModel) -> 'PortfolioValidity':
+        sat_model = cast(PySATModel, model)
+        self.result = list(check_portfolio(self.configurations,
+                                           sat_model.original_model,
+                                           sat_model,
+                                           self.full,
+                                           self.processes))
+        return self
+
+    def get_result(self) -> list[ValidityResult]:
+        return self.result
+
+    def portfolio_validity(self) -> list[ValidityResult]:
+        return self.get_result()
+
+    def invalid_products(self) -> list[ValidityResult]:
+        return [result for result in self.result if not result.valid]
+
+
+class ValidityChecker:
+    """Shared state to check products: the context of the SAT model, and the relations and
+    the clauses of the constraints of the feature model."""
+
+    def __init__(self, context: FullConfigurationsContext, fm_model: FeatureModel) -> None:
+        self.context = context
+        # (description, parent, children, card_min, card_max)
+        self.relations: list[tuple[str, str, list[str], int, int]] = [
+            (str(relation), relation.parent.name, [child.name for child in relation.children],
+             relation.card_min, relation.card_max)
+            for relation in fm_model.get_relations()]
+        # (name, clauses as lists of (feature, value))
+        self.constraints: list[tuple[str, list[list[tuple[str, bool]]]]] = [
+            (constraint.name, [[_literal(literal) for literal in clause]
+                               for clause in constraint.ast.get_clauses()])
+            for constraint in fm_model.get_constraints()]
+
+    def check(self, index: int, configuration: Configuration, full: bool) -> ValidityResult:
+        elements = self._decided_elements(configuration, full)
+        assumptions = [self.context.variables[feature] if selected
+                       else -self.context.variables[feature]
+                       for feature, selected in elements.items()]
+        solver = self.context.solver
+        count('solver_calls')
+        if solver.solve(assumptions=assumptions):
+            return ValidityResult(index, configuration, True, {}, [], [], [])
+        core = solver.get_core() or []
+        conflict = sorted({self.context.features[abs(literal)] for literal in core
+                           if abs(literal) in self.context.features})
+        return ValidityResult(index, configuration, False,
+                              self._missing_ancestors(elements) if full else {},
+                              self._violated_relations(elements),
+                              self._violated_constraints(elements),
+                              conflict)
+
+    def _decided_elements(self, configuration: Configuration, full: bool) -> dict[str, bool]:
+        for feature in configuration.elements:
+            if feature not in self.context.variables:
+                raise FlamaException(f'Feature {feature} not found')
+        if not full:
+            return {feature: configuration.is_selected(feature)
+                    for feature in configuration.elements}
+        selected = set(configuration.get_selected_elements())
+        return {feature: feature in selected for feature in self.context.features.values()}
+
+    def _missing_ancestors(self, elements: dict[str, bool]) -> dict[str, list[str]]:
+        missing = {}
+        for feature, selected in elements.items():
+            if selected:
+                ancestors = [ancestor for ancestor in self.context.ancestors[feature]
+                             if not elements.get(ancestor, False)]
+                if ancestors:
+                    missing[feature] = sorted(ancestors)
+        return missing
+
+    def _violated_relations(self, elements: dict[str, bool]) -> list[str]:
+        """Relations whose parent is selected and whose number of selected children is out
+        of the cardinality (only if all the children are decided in a partial product)."""
+        violated = []
+        for description, parent, children, card_min, card_max in self.relations:
+            if not elements.get(parent, False):
+                continue
+            n_selected = sum(elements.get(child, False) for child in children)
+            n_undecided = sum(child not in elements for child in children)
+            if n_selected > card_max or n_selected + n_undecided < card_min:
+                violated.append(description)
+        return violated
+
+    def _violated_constraints(self, elements: dict[str, bool]) -> list[str]:
+        """Constraints with a clause whose literals are all false."""
+        return [name for name, clauses in self.constraints
+                if any(all(feature in elements and elements[feature] != value
+                           for feature, value in clause)
+                       for clause in clauses)]
+
+
+def check_portfolio(configurations: Iterable[Configuration],
+                    fm_model: FeatureModel,
+                    sat_model: PySATModel,
+                    full: bool = True,
+                    processes: Optional[int] = 1,
+                    chunksize: int = 64) -> Iterator[ValidityResult]:
+    """Yield the validity of each product, in the order of the products."""
+    checker = ValidityChecker(get_context(fm_model, sat_model), fm_model)
+    tasks = ((index, config, full) for index, config in enumerate(configurations))
+    yield from run_in_pool(tasks, checker, _check, processes, chunksize=chunksize)
+
+
+def _check(checker: ValidityChecker, task: tuple[int, Configuration, bool]) -> ValidityResult:
+    index, configuration, full = task
+    try:
+        return checker.check(index, configuration, full)
+    except Exception as exception:  # pylint: disable=broad-except
+        LOGGER.warning('Error checking the validity of %s: %s', configuration, exception)
+        return ValidityResult(index, configuration, False, {}, [], [], [],
+                              f'{type(exception).__name__}: {exception}')
+
+
+def _literal(literal: str) -> tuple[str, bool]:
+    """Feature and value of a literal of the clauses of a constraint ('-' for negation)."""
+    if literal.startswith('-'):
+        return literal[1:], False
+    return literal, True
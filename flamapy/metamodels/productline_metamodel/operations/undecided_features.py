@@ -1,111 +1,94 @@
 import logging
 from typing import cast, Any
 
-from pysat.solvers import Solver
-
 from flamapy.core.models import VariabilityModel
 from flamapy.core.operations import Operation
 from flamapy.core.exceptions import FlamaException
 from flamapy.metamodels.configuration_metamodel.models.configuration import Configuration
 from flamapy.metamodels.pysat_metamodel.models.pysat_model import PySATModel
-from flamapy.metamodels.fm_metamodel.models import FeatureModel, Feature
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext
+)
+from flamapy.metamodels.productline_metamodel.profiling import profiled, count
 
 
-LOGGER = logging.getLogger('CompleteConfiguration')
+LOGGER = logging.getLogger('UndecidedFeatures')
 
 
 class UndecidedFeatures(Operation):
     """Features that have not been selected in a partial configuration but they may be incoporated
      to form a full configuration.
+
+    Each feature that is not decided in the partial configuration is classified as forced
+    (selected or deselected in all the full configurations derived from the partial
+    configuration) or free (it can be either selected or deselected). The result is the list of
+    free features, and the forced ones are available with `forced_features`.
+
+    This is a backbone computation on the shared solver of the model
+    (see FullConfigurationsContext). Each model found by the solver discards as forced all the
+    candidates that take a different value than in the first model, so the number of solver
+    calls is usually much lower than two per feature.
     """
 
     def __init__(self) -> None:
-        self.result: list[Any] = None
+        self.result: list[Any] = []
+        self.forced: dict[Any, bool] = {}
         self.configuration: Configuration = None
-        self.sat_model = None
-        self.solver = None
 
     def set_configuration(self, configuration: Configuration) -> None:
         self.configuration = configuration
 
+    @profiled('UndecidedFeatures')
     def execute(self, model: VariabilityModel) -> 'UndecidedFeatures':
         sat_model = cast(PySATModel, model)
-        self.result = self._complete_configuration(sat_model)
+        self.result, self.forced = undecided_features(self.configuration, sat_model)
         return self
 
     def undecided_features(self) -> list[Any]:
         return self.get_result()
 
+    def forced_features(self) -> dict[Any, bool]:
+        """Features not decided in the partial configuration whose value is forced
+        (True if forced to be selected, False if forced to be deselected)."""
+        return self.forced
+
     def get_result(self) -> list[Any]:
         return self.result
 
-    def _undecided_features(self, sat_model: PySATModel) -> list[Any]:
-        try:
-            fm_model = cast(FeatureModel, sat_model.original_model)
-        except FlamaException:
-            LOGGER.exception("The transformation didn't attach the source model, " 
-                             "which is required for this operation.")
-        # For efficiency, reuse of model and solver
-        if self.sat_model is None or self.sat_model != sat_model:
-            self.sat_model = sat_model
-            self.solver = Solver(name='glucose3')
-            for clause in sat_model.get_all_clauses():
-                self.solver.add_clause(clause)
-
-        configuration = self.configuration
-        # First check if the configuration is full
-        assumptions = []
-        for feature in sat_model.features.values():
-            if configuration.elements.get(feature, False):
-                assumptions.append(sat_model.variables[feature])
-            else:
-                assumptions.append(-sat_model.variables[feature])
-                
-        if not self.solver.solve(assumptions=assumptions):
-            selected_elements = configuration.get_selected_elements()
-            all_selected_elements = list(selected_elements)
-            new_selected_elements = []
-            for element in selected_elements:
-                feature = fm_model.get_feature_by_name(element)
-                parent = feature.get_parent()
-                while parent is not None:
-                    if parent not in all_selected_elements:
-                        new_selected_elements.append(parent.name)
-                        all_selected_elements.append(parent.name)
-                        configuration.elements[parent.name] = True
-                        assumptions.append(sat_model.variables[parent.name])
-                        assumptions.remove(-sat_model.variables[parent.name])
-                    parent = parent.get_parent()
-                
-        if not self.solver.solve(assumptions=assumptions):
-            # Select children for each parent
-
-                configuration = complete_configuration_with_parents(configuration, feature_model)
-            
-
-
-
-def complete_configuration_with_parents(configuration: Configuration, fm_model: FeatureModel) -> Configuration:
-    configs_elements = dict(configuration.elements)
-    for element in configuration.get_selected_elements():
-        feature = fm_model.get_feature_by_name(element)
-        configs_elements.update({parent: True for parent in get_all_parents(feature)})
-    return Configuration(configs_elements)
-
-
-def get_all_parents(feature: Feature) -> list[str]:
-    parent = feature.get_parent()
-    return [] if parent is None  else [parent.name] + get_all_parents(parent)
-
-    
-
-def check_satisfiability(configuration: Configuration, 
-                         sat_model: PySATModel, 
-                         solver: Solver) -> bool:
+
+def undecided_features(configuration: Configuration,
+                       sat_model: PySATModel) -> tuple[list[Any], dict[Any, bool]]:
+    """Return the free features and the forced features (feature -> forced value) among the
+    features not decided in the partial configuration."""
+    context = FullConfigurationsContext.get(sat_model)
+    solver = context.solver
     assumptions = []
-    for feature in sat_model.features.values():
-        if configuration.elements.get(feature, False):
-            assumptions.append(sat_model.variables[feature])
+    for feature in configuration.elements:
+        variable = context.variables.get(feature)
+        if variable is None:
+            raise FlamaException(f'Feature {feature} not found')
+        assumptions.append(variable if configuration.is_selected(feature) else -variable)
+    count('solver_calls')
+    if not solver.solve(assumptions=assumptions):
+        LOGGER.warning('The partial configuration %s is not satisfiable.', configuration)
+        return [], {}
+    reference = solver.get_model()
+    candidates = [variable for variable, feature in context.features.items()
+                  if feature not in configuration.elements]
+    free: set[int] = set()
+    forced: dict[Any, bool] = {}
+    for variable in candidates:
+        if variable in free:
+            continue
+        literal = reference[variable - 1]
+        count('solver_calls')
+        if solver.solve(assumptions=assumptions + [-literal]):
+            # Model-based filtering: every candidate that flips w.r.t. the reference is free
+            model = solver.get_model()
+            free.update(candidate for candidate in candidates
+                        if model[candidate - 1] != reference[candidate - 1])
         else:
-            assumptions.append(-sat_model.variables[feature])
-    return solver.solve(assumptions=assumptions)
\ No newline at end of file
+            forced[context.features[variable]] = literal > 0
+            assumptions.append(literal)
+    return [context.features[variable] for variable in candidates if variable in free], forced
+
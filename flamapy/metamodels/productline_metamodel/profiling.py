@@ -0,0 +1,170 @@
+import contextlib
+import functools
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+PATH_SEPARATOR = ' > '  # Between the names of the spans of a path in the report
+
+
+class Span:
+    """A timed stage of the analysis, with its counters (e.g., solver calls) and the peak of
+    memory allocated during the stage (if memory tracing is enabled)."""
+
+    def __init__(self, name: str, parent: Optional['Span'] = None) -> None:
+        self.name = name
+        self.parent = parent
+        self.path: tuple[str, ...] = (name,) if parent is None else parent.path + (name,)
+        self.seconds: float = 0.0
+        self.counters: dict[str, int] = {}
+        self.peak_bytes: int = 0
+        self._start: float = 0.0
+        self._start_memory: int = 0
+        self._running_peak: int = 0
+
+
+class Profiler:
+    """Lightweight instrumentation of the analysis pipeline.
+
+    Stages are delimited with `span(name)` (a context manager, or the `profiled` decorator),
+    which can be nested, and events are counted with `count(counter, n)`; the counters are
+    attributed to the innermost open span and also to its ancestors. The profiler is disabled
+    by default, and then spans and counters cost a single attribute check.
+
+    The report aggregates the spans with the same path (names from the outermost span):
+    number of calls, total wall-clock time, counters, and peak memory allocated above the
+    memory in use when the span started (only with `trace_memory`, using tracemalloc).
+    The reports of other profilers (e.g., of worker processes) can be added with `merge`.
+    """
+
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self.trace_memory: bool = False
+        self._stack: list[Span] = []
+        self._report: dict[tuple[str, ...], dict[str, Any]] = {}
+
+    def enable(self, trace_memory: bool = True) -> None:
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    def reset(self) -> None:
+        self._stack = []
+        self._report = {}
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[Optional[Span]]:
+        if not self.enabled:
+            yield None
+            return
+        parent = self._stack[-1] if self._stack else None
+        current = Span(name, parent)
+        self._entry(current.path)  # Entries are reported in the order the spans start
+        if self.trace_memory:
+            memory, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent._running_peak = max(parent._running_peak, peak)
+            tracemalloc.reset_peak()
+            current._start_memory = memory
+        self._stack.append(current)
+        current._start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            current.seconds = time.perf_counter() - current._start
+            self._stack.pop()
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, current._running_peak)
+                current.peak_bytes = peak - current._start_memory
+                if parent is not None:
+                    parent._running_peak = max(parent._running_peak, peak)
+            self._record(current)
+
+    def count(self, counter: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        for span in self._stack:
+            span.counters[counter] = span.counters.get(counter, 0) + n
+
+    def _entry(self, path: tuple[str, ...]) -> dict[str, Any]:
+        entry = self._report.get(path)
+        if entry is None:
+            entry = {'span': PATH_SEPARATOR.join(path), 'depth': len(path) - 1, 'calls': 0,
+                     'seconds': 0.0, 'peak_bytes': 0, 'counters': {}}
+            self._report[path] = entry
+        return entry
+
+    def _record(self, span: Span) -> None:
+        entry = self._entry(span.path)
+        entry['calls'] += 1
+        entry['seconds'] += span.seconds
+        entry['peak_bytes'] = max(entry['peak_bytes'], span.peak_bytes)
+        for counter, value in span.counters.items():
+            entry['counters'][counter] = entry['counters'].get(counter, 0) + value
+
+    def merge(self, report: list[dict[str, Any]]) -> None:
+        """Add the entries of the report of another profiler (e.g., of a worker process)."""
+        for other in report:
+            entry = self._entry(tuple(other['span'].split(PATH_SEPARATOR)))
+            entry['calls'] += other['calls']
+            entry['seconds'] += other['seconds']
+            entry['peak_bytes'] = max(entry['peak_bytes'], other['peak_bytes'])
+            for counter, value in other['counters'].items():
+                entry['counters'][counter] = entry['counters'].get(counter, 0) + value
+
+    def report(self) -> list[dict[str, Any]]:
+        """Aggregated spans, in the order they started."""
+        return [entry for entry in self._report.values() if entry['calls'] > 0]
+
+    def format_report(self) -> str:
+        lines = [f'{"Stage":50} {"Calls":>7} {"Time (s)":>10} {"Peak (MiB)":>11}  Counters']
+        for entry in self.report():
+            name = '  ' * entry['depth'] + entry['span'].rsplit(PATH_SEPARATOR, 1)[-1]
+            counters = ', '.join(f'{counter}={value}'
+                                 for counter, value in sorted(entry['counters'].items()))
+            lines.append(f'{name[:50]:50} {entry["calls"]:7} {entry["seconds"]:10.4f} '
+                         f'{entry["peak_bytes"] / 2**20:11.2f}  {counters}')
+        return '\n'.join(lines)
+
+    def export_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+
+
+PROFILER = Profiler()
+
+
+def span(name: str) -> contextlib.AbstractContextManager[Optional[Span]]:
+    """Span of the shared profiler."""
+    return PROFILER.span(name)
+
+
+def count(counter: str, n: int = 1) -> None:
+    """Count an event in the shared profiler."""
+    if PROFILER.enabled:
+        PROFILER.count(counter, n)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator that runs the function inside a span of the shared profiler."""
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with PROFILER.span(name):
+                return function(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
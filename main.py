@@ -1,125 +1,294 @@
 import argparse
+import glob
+import json
+import os
+import sys
+from typing import Any, Optional
 
-from flamapy.metamodels.fm_metamodel.transformations import UVLReader, UVLWriter
 from flamapy.metamodels.fm_metamodel.operations import FMVariationPoints
-from flamapy.metamodels.bdd_metamodel.transformations import FmToBDD
 from flamapy.metamodels.bdd_metamodel.operations import BDDConfigurationsNumber, BDDSampling, BDDCoreFeatures
-from flamapy.metamodels.pysat_metamodel.transformations import FmToPysat
-from flamapy.metamodels.pysat_metamodel.operations import PySATSatisfiableConfiguration
-from flamapy.metamodels.bdd_metamodel.operations import BDDSatisfiableConfiguration
+from flamapy.metamodels.configuration_metamodel.models import Configuration
 from utils import (
-    ConfigurationsCSVWriter, 
-    ConfigurationsCSVReader, 
-    ConfigurationsListWriter, 
-    ConfigurationsListReader,
-    ConfigurationsAttributesReader
+    ConfigurationsAttributesReader,
+    ModelCache
 )
-from utils import utils
 from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.profiling import PROFILER, span
 from flamapy.metamodels.productline_metamodel.operations import (
-    FullConfigurations,
+    FullConfigurationsBatch,
+    PortfolioValidity,
     PLProductDistribution,
     PLFeatureInclusionFrequency,
-    PLFeatureInclusionProbability
+    PLFeatureInclusionProbability,
+    PLBDDProductDistribution,
+    PLBDDFeatureInclusionFrequency,
+    PLBDDFeatureInclusionProbability
 )
+from flamapy.metamodels.productline_metamodel.operations.full_configurations import (
+    concrete_features
+)
+from flamapy.metamodels.productline_metamodel.operations.parallel import run_in_pool
 
 
-def main(fm_filepath: str) -> None:
-    fm = UVLReader(fm_filepath).transform()
-
-    print(f'#Features: {len(fm.get_features())}')
-    print(f'#Constraints: {len(fm.get_constraints())}')
-    print(fm)
-    print(f'#Food with omega-3: {sum(attribute.name == 'Omega-3' for feature in fm.get_features() for attribute in feature.get_attributes())}')
-    UVLWriter('mi-model.uvl', fm).transform()
-    raise Exception
-
-    sat_model = FmToPysat(fm).transform()
-    bdd_model = FmToBDD(fm).transform()
-
-    n_configs = BDDConfigurationsNumber().execute(bdd_model).get_result()
-    print(f'#Configs: {utils.int_to_scientific_notation(n_configs)}')
-
-    core_features = BDDCoreFeatures().execute(bdd_model).get_result()
-    print(f'Core features: ({len(core_features)}) {core_features}')
-
-    variation_points = FMVariationPoints().execute(fm).get_result()
-    print(f'Variations points:')
-    for vp, variant in variation_points.items():
-        print(f'{vp} -> {variant}')
-
-    sampling_op = BDDSampling()
-    sampling_op.set_sample_size(5)
-    sample = sampling_op.execute(bdd_model).get_result()
-    configs_writer = ConfigurationsCSVWriter('configs.csv')
-    configs_writer.set_elements([f.name for f in fm.get_features()])
-    configs_writer.set_configurations(sample)
-    configs_writer.transform()
-
-    configs_reader = ConfigurationsCSVReader('configs.csv')
-    configs_reader.store_only_selected_elements(False)
-    sample2 = configs_reader.transform()
-    print(f'Equals: {set(sample) == set(sample2)}')
-
-    config_writer = ConfigurationsListWriter('configs.txt')
-    config_writer.set_configurations(sample)
-    config_writer.transform()
-
-    configs_reader.store_only_selected_elements(True)
-    sample3 = configs_reader.transform()
-    sample4 = ConfigurationsListReader('configs.txt').transform()
-    print(f'Equals: {set(sample3) == set(sample4)}')
-    
-    configs_attributes = ConfigurationsAttributesReader('models/NamasteRincon_configs_simple.csv').transform()
-    print(f'#Products in portfolio: {len(configs_attributes)}')
-
-    pl_model = ProductLineModel()
-    pl_model.configurations = {config[0] for config in configs_attributes}
-    print(pl_model)
-    prod_dist_op = PLProductDistribution().execute(pl_model)
-    prod_dist = prod_dist_op.get_result()
-    desc_stats = prod_dist_op.descriptive_statistics()
-    print(f'Product distribution: {prod_dist}')
-    print(f'#Product dist: {sum(prod_dist)}')
-    print(desc_stats)
-    
-    fif = PLFeatureInclusionFrequency().execute(pl_model).get_result()
-    fif = dict(sorted(fif.items(), key=lambda item: item[1]))
-    print(f'Feature Inclusion Frequency:\n')
-    for feature, freq in fif.items():
-        print(f'{feature}: {freq}')
-    raise Exception
-    
-    for config_attr in configs_attributes:
-        satis_config_op = BDDSatisfiableConfiguration()
-        satis_config_op.set_configuration(config_attr[0], is_full=False)
-        satis = satis_config_op.execute(bdd_model).get_result()
-        print(f'{config_attr[0]} -> {satis}')
-    
-    print("full configurations:")
-    false_configs = []
-    full_configs = []
-    for config_attr in configs_attributes:
-        full_config_op = FullConfigurations()
-        full_config_op.set_configuration(config_attr[0])
-        new_configs = full_config_op.execute(sat_model).get_result()
-        print(new_configs)
-        full_configs.extend(new_configs)
-        for config in new_configs:
-            satis_config_op = BDDSatisfiableConfiguration()
-            satis_config_op.set_configuration(config, is_full=True)
-            satis = satis_config_op.execute(bdd_model).get_result()
-            print(f'{config} -> {satis}')
-            if not satis:
-                false_configs.append((config_attr, config))
-    config_writer = ConfigurationsListWriter('full_configs.txt')
-    config_writer.set_configurations(full_configs)
-    config_writer.transform()
-    print(f'Invalid configs: {false_configs}')
+MODEL_EXTENSION = '.uvl'
+PORTFOLIO_SUFFIX = '_configs*.csv'  # Portfolios next to a model: <model>_configs*.csv
 
-if __name__ == '__main__':
+# Commands that analyze the portfolios of a model, and those that only need the model.
+# fif, fip and distribution analyze the portfolios if there are any, or all the
+# configurations of the model otherwise (or with --all-configurations).
+PORTFOLIO_COMMANDS = ['fif', 'fip', 'distribution', 'expand', 'validate']
+MODEL_COMMANDS = ['count', 'core', 'vps', 'sample']
+COMMANDS = MODEL_COMMANDS + PORTFOLIO_COMMANDS
+
+
+def find_models(paths: list[str]) -> list[str]:
+    """UVL files given as files, directories (all the UVL files in them) or glob patterns."""
+    models = []
+    for path in paths:
+        if os.path.isdir(path):
+            models.extend(sorted(glob.glob(os.path.join(path, f'*{MODEL_EXTENSION}'))))
+        elif glob.has_magic(path):
+            models.extend(sorted(glob.glob(path)))
+        else:
+            models.append(path)
+    return list(dict.fromkeys(models))
+
+
+def find_portfolios(fm_filepath: str, patterns: Optional[list[str]]) -> list[str]:
+    """Portfolio files of the model: the given files or glob patterns, or by default the files
+    named <model>_configs*.csv in the directory of the model."""
+    if patterns is None:
+        stem = os.path.splitext(fm_filepath)[0]
+        return sorted(glob.glob(glob.escape(stem) + PORTFOLIO_SUFFIX))
+    portfolios = []
+    for pattern in patterns:
+        portfolios.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    return portfolios
+
+
+def make_tasks(args: argparse.Namespace) -> list[tuple[str, Optional[str]]]:
+    """Pairs (model, portfolio) to analyze (portfolio is None for model-level analyses)."""
+    tasks: list[tuple[str, Optional[str]]] = []
+    for fm_filepath in find_models(args.models):
+        portfolios = []
+        if args.command in PORTFOLIO_COMMANDS and not args.all_configurations:
+            portfolios = find_portfolios(fm_filepath, args.portfolios)
+        if portfolios:
+            tasks.extend((fm_filepath, portfolio) for portfolio in portfolios)
+        elif args.command in ['expand', 'validate']:
+            print(f'No portfolio found for {fm_filepath}.', file=sys.stderr)
+        else:
+            tasks.append((fm_filepath, None))
+    return tasks
+
+
+_CACHES: dict[str, ModelCache] = {}  # Per process, to reuse the models of the same files
+
+
+def get_cache(cache_dir: str) -> ModelCache:
+    if cache_dir not in _CACHES:
+        _CACHES[cache_dir] = ModelCache(cache_dir)
+    return _CACHES[cache_dir]
+
+
+def read_portfolio(portfolio_filepath: str) -> list[Configuration]:
+    """Products of the portfolio, in the order of the file."""
+    configurations = ConfigurationsAttributesReader(portfolio_filepath).transform()
+    return [config for config, _ in configurations]
+
+
+def selected_features(configuration: Configuration) -> list[str]:
+    return sorted(configuration.get_selected_elements())
+
+
+def analyze(command: str,
+            fm_filepath: str,
+            portfolio_filepath: Optional[str],
+            options: dict[str, Any]) -> Any:
+    """Result of the command for the model (and portfolio), as JSON-serializable data."""
+    cache = get_cache(options['cache_dir'])
+    fm = cache.feature_model(fm_filepath)
+    if command == 'vps':
+        with span('FMVariationPoints'):
+            variation_points = FMVariationPoints().execute(fm).get_result()
+        return {vp.name: [variant.name for variant in variants]
+                for vp, variants in variation_points.items()}
+    if portfolio_filepath is None:
+        bdd_model = cache.bdd_model(fm_filepath, fm)
+        if command == 'count':
+            with span('BDDConfigurationsNumber'):
+                return BDDConfigurationsNumber().execute(bdd_model).get_result()
+        if command == 'core':
+            with span('BDDCoreFeatures'):
+                return sorted(BDDCoreFeatures().execute(bdd_model).get_result())
+        if command == 'sample':
+            sampling_op = BDDSampling()
+            sampling_op.set_sample_size(options['sample_size'])
+            with span('BDDSampling'):
+                sample = sampling_op.execute(bdd_model).get_result()
+            # Depending on the flamapy version, the sample is made of configurations or dicts
+            return [selected_features(Configuration(config) if isinstance(config, dict)
+                                      else config)
+                    for config in sample]
+        if command == 'fif':
+            return PLBDDFeatureInclusionFrequency().execute(bdd_model).get_result()
+        if command == 'fip':
+            return PLBDDFeatureInclusionProbability().execute(bdd_model).get_result()
+        if command == 'distribution':
+            distribution_op = PLBDDProductDistribution().execute(bdd_model)
+            return {'distribution': distribution_op.get_result(),
+                    'statistics': distribution_op.descriptive_statistics()}
+        raise ValueError(f'The command {command} needs a portfolio.')
+    # The products in the order of the file, duplicates included
+    products = read_portfolio(portfolio_filepath)
+    if command in ('fif', 'fip', 'distribution'):
+        pl_model = ProductLineModel()
+        pl_model.configurations = products
+        if command == 'fif':
+            return PLFeatureInclusionFrequency().execute(pl_model).get_result()
+        if command == 'fip':
+            return PLFeatureInclusionProbability().execute(pl_model).get_result()
+        distribution_op = PLProductDistribution().execute(pl_model)
+        return {'distribution': distribution_op.get_result(),
+                'statistics': distribution_op.descriptive_statistics()}
+    sat_model = cache.sat_model(fm_filepath, fm)
+    if command == 'expand':
+        expand_op = FullConfigurationsBatch()
+        expand_op.set_configurations(products)
+        expand_op.set_processes(1)  # The models are already distributed among the workers
+        expand_op.set_max_solutions(options['max_solutions'])
+        expand_op.set_timeout(options['timeout'])
+        if options['concrete']:
+            expand_op.set_projection(concrete_features(fm))
+        return [{'product': selected_features(result.configuration),
+                 'full_configurations': [selected_features(config)
+                                         for config in result.full_configurations],
+                 'error': result.error}
+                for result in expand_op.execute(sat_model).get_result()]
+    if command == 'validate':
+        validity_op = PortfolioValidity()
+        validity_op.set_configurations(products)
+        validity_op.set_full(options['full'])
+        return [{'product': selected_features(result.configuration),
+                 'valid': result.valid,
+                 'missing_ancestors': result.missing_ancestors,
+                 'violated_relations': result.violated_relations,
+                 'violated_constraints': result.violated_constraints,
+                 'conflict': result.conflict,
+                 'error': result.error}
+                for result in validity_op.execute(sat_model).get_result()]
+    raise ValueError(f'Unknown command {command}.')
+
+
+def run_task(task: tuple[str, str, Optional[str], dict[str, Any]]) -> dict[str, Any]:
+    command, fm_filepath, portfolio_filepath, options = task
+    output: dict[str, Any] = {'command': command, 'model': fm_filepath,
+                              'portfolio': portfolio_filepath}
+    try:
+        with span(f'{command} {os.path.basename(portfolio_filepath or fm_filepath)}'):
+            output['result'] = analyze(command, fm_filepath, portfolio_filepath, options)
+    except Exception as exception:  # pylint: disable=broad-except
+        output['error'] = f'{type(exception).__name__}: {exception}'
+        print(f'Error in {command} of {portfolio_filepath or fm_filepath}: {exception}',
+              file=sys.stderr)
+    return output
+
+
+def run_worker_task(profile: bool,
+                    task: tuple[str, str, Optional[str], dict[str, Any]]
+                    ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Run the task in a worker process, and return its output and its profiling report (empty
+    if not profiling), to be merged into the report of the main process."""
+    if not profile:
+        return run_task(task), []
+    # The profiler of a forked worker is a copy of the one of the main process
+    PROFILER.reset()
+    if not PROFILER.enabled:
+        PROFILER.enable()
+    output = run_task(task)
+    report = PROFILER.report()
+    PROFILER.reset()
+    return output, report
+
+
+def main(args: argparse.Namespace) -> None:
+    options = {'cache_dir': args.cache_dir,
+               'sample_size': args.sample_size,
+               'max_solutions': args.max_solutions,
+               'timeout': args.timeout,
+               'full': args.full,
+               'concrete': args.concrete}
+    tasks = [(args.command, fm_filepath, portfolio_filepath, options)
+             for fm_filepath, portfolio_filepath in make_tasks(args)]
+    if args.workers == 1 or len(tasks) <= 1:
+        results = [run_task(task) for task in tasks]
+    else:
+        # The workers share the compiled models through the on-disk cache
+        results = []
+        for output, report in run_in_pool(tasks, PROFILER.enabled, run_worker_task,
+                                          args.workers):
+            PROFILER.merge(report)
+            results.append(output)
+    # Remove the entries of the models that changed, once no worker uses the cache
+    get_cache(args.cache_dir).prune()
+    content = json.dumps(results, indent=2, default=str)
+    if args.output is None:
+        print(content)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='Product Line analysis.')
-    parser.add_argument(metavar='fm', dest='fm_filepath', type=str, help='Input feature model (.uvl).')
-    args = parser.parse_args()
+    parser.add_argument(metavar='command', dest='command', choices=COMMANDS,
+                        help=f'Analysis to perform: {", ".join(COMMANDS)}.')
+    parser.add_argument(metavar='models', dest='models', type=str, nargs='+',
+                        help='Input feature models (.uvl): files, directories or glob patterns.')
+    parser.add_argument('-p', '--portfolio', dest='portfolios', type=str, nargs='+',
+                        default=None,
+                        help=f'Portfolio files (.csv) or glob patterns (default: the files '
+                             f'<model>{PORTFOLIO_SUFFIX} next to each model).')
+    parser.add_argument('--all-configurations', dest='all_configurations', action='store_true',
+                        help='For fif, fip and distribution, analyze all the configurations of '
+                             'the model instead of the portfolios.')
+    parser.add_argument('-o', '--output', dest='output', type=str, default=None,
+                        help='Output JSON file (default: standard output).')
+    parser.add_argument('-w', '--workers', dest='workers', type=int, default=1,
+                        help='Number of worker processes (0 for the number of CPUs).')
+    parser.add_argument('--cache-dir', dest='cache_dir', type=str, default='.flamapy_cache',
+                        help='Directory of the cache of compiled models.')
+    parser.add_argument('--sample-size', dest='sample_size', type=int, default=5,
+                        help='Number of configurations of the sample command.')
+    parser.add_argument('--max-solutions', dest='max_solutions', type=int, default=None,
+                        help='Maximum number of full configurations per product in expand.')
+    parser.add_argument('--timeout', dest='timeout', type=float, default=None,
+                        help='Maximum time in seconds to expand each product.')
+    parser.add_argument('--concrete', action='store_true',
+                        help='In expand, project the full configurations onto the concrete '
+                             'features (without duplicates).')
+    parser.add_argument('--full', dest='full', action='store_true',
+                        help='In validate, the products are full configurations '
+                             '(by default they are partial configurations).')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the time, solver calls, models and peak memory of each stage '
+                             '(aggregated over the worker processes).')
+    parser.add_argument('--profile-output', dest='profile_output', type=str, default=None,
+                        help='Export the profiling report as JSON to this file.')
+    args = parser.parse_args(argv)
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    return args
+
 
-    main(args.fm_filepath)
+if __name__ == '__main__':
+    args = parse_args()
+    if args.profile or args.profile_output:
+        PROFILER.enable()
+    try:
+        main(args)
+    finally:
+        if args.profile:
+            print(PROFILER.format_report(), file=sys.stderr)
+        if args.profile_output:
+            PROFILER.export_json(args.profile_output)
@@ -1,18 +1,17 @@
 import argparse
 
-from flamapy.metamodels.fm_metamodel.transformations import UVLReader
-from flamapy.metamodels.bdd_metamodel.transformations import FmToBDD
 from flamapy.metamodels.bdd_metamodel.operations import BDDConfigurationsNumber, BDDSampling
-from utils import ConfigurationsCSVWriter, ConfigurationsCSVReader, ConfigurationsListWriter, ConfigurationsListReader
+from utils import ConfigurationsCSVWriter, ConfigurationsCSVReader, ConfigurationsListWriter, ConfigurationsListReader, ModelCache
 
 
 def main(fm_filepath: str) -> None:
-    fm = UVLReader(fm_filepath).transform()
+    cache = ModelCache()
+    fm = cache.feature_model(fm_filepath)
 
     print(f'#Features: {len(fm.get_features())}')
     print(f'#Constraints: {len(fm.get_constraints())}')
 
-    bdd_model = FmToBDD(fm).transform()
+    bdd_model = cache.bdd_model(fm_filepath, fm)
     n_configs = BDDConfigurationsNumber().execute(bdd_model).get_result()
     print(f'#Configs: {n_configs}')
 
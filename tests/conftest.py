@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.fm_metamodel.transformations import UVLReader
+from flamapy.metamodels.pysat_metamodel.models import PySATModel
+from flamapy.metamodels.pysat_metamodel.transformations import FmToPysat
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.bdd_metamodel.transformations import FmToBDD
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+MODELS = ['NamasteRincon', 'LaGondolaDeYdai']
+
+# The utils package lives at the root of the repository
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def model_path(name: str) -> str:
+    return os.path.join(MODELS_DIR, f'{name}.uvl')
+
+
+def portfolio_path(name: str) -> str:
+    return os.path.join(MODELS_DIR, f'{name}_configs.csv')
+
+
+@pytest.fixture(scope='session', params=MODELS)
+def model_name(request: pytest.FixtureRequest) -> str:
+    return request.param
+
+
+@pytest.fixture(scope='session')
+def fm_model(model_name: str) -> FeatureModel:
+    return UVLReader(model_path(model_name)).transform()
+
+
+@pytest.fixture(scope='session')
+def sat_model(fm_model: FeatureModel) -> PySATModel:
+    return FmToPysat(fm_model).transform()
+
+
+@pytest.fixture(scope='session')
+def bdd_model(fm_model: FeatureModel) -> BDDModel:
+    return FmToBDD(fm_model).transform()
+
+
+@pytest.fixture(scope='session')
+def portfolio(model_name: str) -> list[Configuration]:
+    from utils import ConfigurationsAttributesReader
+    configurations = ConfigurationsAttributesReader(portfolio_path(model_name)).transform()
+    return [config for config, _ in configurations]
+
+
+def selected(configuration: Configuration) -> frozenset[str]:
+    return frozenset(configuration.get_selected_elements())
+
+
+def reference_full_configurations(sat_model: PySATModel,
+                                  configuration: Configuration) -> set[frozenset[str]]:
+    """Full configurations of the partial configuration by plain enumeration of the models
+    with a private solver, as sets of selected features."""
+    from pysat.solvers import Solver
+    from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+        FullConfigurationsContext)
+    context = FullConfigurationsContext(sat_model)
+    assumptions = context.assumptions(configuration)
+    result = set()
+    with Solver(name='glucose3', bootstrap_with=context.clauses) as solver:
+        while solver.solve(assumptions=assumptions):
+            model = solver.get_model()
+            result.add(frozenset(sat_model.features[literal] for literal in model
+                                 if literal > 0 and literal in sat_model.features))
+            solver.add_clause([-literal for literal in model[:context.n_vars]])
+    return result
@@ -0,0 +1,91 @@
+import itertools
+import random
+
+import pytest
+
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.productline_metamodel.operations import (
+    PLBDDFeatureInclusionFrequency,
+    PLBDDFeatureInclusionProbability,
+    PLBDDProductDistribution
+)
+from flamapy.metamodels.productline_metamodel.operations.bdd_counting import BDDCounter
+
+
+VARIABLES = ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+def random_bdd_model(seed: int) -> BDDModel:
+    """BDD model over VARIABLES of a random function (which may skip variables, including the
+    first ones, and have complemented edges)."""
+    rng = random.Random(seed)
+    bdd_model = BDDModel()
+    bdd_model.bdd.declare(*VARIABLES)
+    bdd_model.vars_order = list(VARIABLES)
+    bdd_model.vars_features = {var: var.upper() for var in VARIABLES}
+    bdd_model.features_vars = {var.upper(): var for var in VARIABLES}
+    clauses = []
+    for _ in range(rng.randint(1, 4)):
+        literals = rng.sample(VARIABLES[rng.randint(0, 2):], rng.randint(1, 3))
+        clauses.append(' \\/ '.join(var if rng.random() < 0.5 else f'~{var}'
+                                    for var in literals))
+    bdd_model.root = bdd_model.bdd.add_expr(' /\\ '.join(f'({clause})' for clause in clauses))
+    return bdd_model
+
+
+def enumerate_models(bdd_model: BDDModel) -> list[dict[str, bool]]:
+    models = []
+    for values in itertools.product([False, True], repeat=len(VARIABLES)):
+        assignment = dict(zip(VARIABLES, values))
+        if bdd_model.bdd.let(assignment, bdd_model.root) == bdd_model.bdd.true:
+            models.append(assignment)
+    return models
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_counts_match_enumeration(seed):
+    bdd_model = random_bdd_model(seed)
+    models = enumerate_models(bdd_model)
+    counter = BDDCounter(bdd_model)
+    assert counter.count() == len(models)
+    assert counter.feature_inclusion_frequency() == {
+        var: sum(1 for model in models if model[var]) for var in VARIABLES}
+    distribution = [0] * (len(VARIABLES) + 1)
+    for model in models:
+        distribution[sum(model.values())] += 1
+    assert counter.product_distribution() == distribution
+
+
+def test_count_function_of_restrictions():
+    bdd_model = random_bdd_model(0)
+    counter = BDDCounter(bdd_model)
+    for var in VARIABLES:
+        restriction = bdd_model.bdd.let({var: True}, bdd_model.root)
+        # The assigned variable is free in the restriction
+        expected = 2 * sum(1 for model in enumerate_models(bdd_model) if model[var])
+        assert counter.count_function(restriction) == expected
+
+
+def test_operations_on_feature_models(bdd_model):
+    bdd = bdd_model.bdd
+    n_vars = len(bdd_model.vars_order)
+    n_configs = BDDCounter(bdd_model).count()
+    assert n_configs == int(bdd.count(bdd_model.root, nvars=n_vars))
+
+    fif = PLBDDFeatureInclusionFrequency().execute(bdd_model).get_result()
+    assert fif == {bdd_model.vars_features[var]:
+                   int(bdd.count(bdd_model.root & bdd.var(var), nvars=n_vars))
+                   for var in bdd_model.vars_order}
+
+    fip = PLBDDFeatureInclusionProbability()
+    fip.set_feature_inclusion_frequency(fif)
+    assert fip.execute(bdd_model).get_result() == {
+        feature: frequency / n_configs for feature, frequency in fif.items()}
+    assert PLBDDFeatureInclusionProbability().execute(bdd_model).get_result() \
+        == fip.get_result()
+
+    distribution = PLBDDProductDistribution().execute(bdd_model).get_result()
+    assert len(distribution) == n_vars + 1
+    assert sum(distribution) == n_configs
+    # Each product with k features adds k to the frequencies
+    assert sum(k * count for k, count in enumerate(distribution)) == sum(fif.values())
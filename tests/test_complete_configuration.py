@@ -0,0 +1,37 @@
+from flamapy.metamodels.productline_metamodel.operations import (
+    CompleteConfiguration,
+    FullConfigurations
+)
+from flamapy.metamodels.productline_metamodel.operations.complete_configuration import (
+    complete_many)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext)
+
+from conftest import reference_full_configurations, selected
+
+
+def full_configurations(sat_model, product):
+    operation = FullConfigurations()
+    operation.set_configuration(product)
+    return [selected(config) for config in operation.execute(sat_model).get_result()]
+
+
+def test_completions_are_full_configurations(sat_model, portfolio):
+    products = portfolio[:20]
+    for product, completion in zip(products, complete_many(products, sat_model)):
+        expected = reference_full_configurations(sat_model, product)
+        if completion is None:
+            assert not expected
+        else:
+            assert selected(completion) in expected
+
+
+def test_completion_does_not_use_the_enumeration_solver(sat_model, portfolio):
+    product = portfolio[0]
+    before = full_configurations(sat_model, product)
+    operation = CompleteConfiguration()
+    operation.set_configuration(product)
+    operation.execute(sat_model)
+    context = FullConfigurationsContext.get(sat_model)
+    assert context.completion_solver is not context.solver
+    assert sorted(full_configurations(sat_model, product), key=sorted) == sorted(before, key=sorted)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from utils import ConfigurationsAttributesReader
+from utils.configurations_attributes_reader import parse_column
+
+
+CONTENT = '''Configuration,Price,Size,Vegan,Code,Big
+"['Pizza', 'Cheese']",1,2.5,True,3,99999999999999999999
+"['Pizza', 'Tuna']",2.5,3,false,abc,1
+'''
+
+
+def test_transform_parses_each_value(tmp_path):
+    path = tmp_path / 'attributes.csv'
+    path.write_text(CONTENT, encoding='utf-8')
+    result = ConfigurationsAttributesReader(str(path)).transform()
+    assert [sorted(config.get_selected_elements()) for config, _ in result] == [
+        ['Cheese', 'Pizza'], ['Pizza', 'Tuna']]
+    first, second = (attributes for _, attributes in result)
+    assert first == {'Price': 1, 'Size': 2.5, 'Vegan': True, 'Code': 3,
+                     'Big': 99999999999999999999}
+    assert isinstance(first['Price'], int) and isinstance(first['Code'], int)
+    assert second == {'Price': 2.5, 'Size': 3, 'Vegan': False, 'Code': 'abc', 'Big': 1}
+
+
+def test_transform_columns_types_whole_columns(tmp_path):
+    path = tmp_path / 'attributes.csv'
+    path.write_text(CONTENT, encoding='utf-8')
+    _, columns = ConfigurationsAttributesReader(str(path)).transform_columns()
+    assert columns['Price'].dtype == np.float64
+    assert columns['Vegan'].dtype == bool
+    assert columns['Code'].tolist() == ['3', 'abc']
+    assert columns['Big'].tolist() == [99999999999999999999, 1]
+
+
+def test_parse_column():
+    assert parse_column(['1', '2']).dtype == np.int64
+    assert parse_column(['9223372036854775808', '1']).tolist() == [9223372036854775808, 1]
+    assert parse_column(['99999999999999999999', '1.5']).dtype == np.float64
+    assert parse_column(['99999999999999999999', 'x']).tolist() == ['99999999999999999999', 'x']
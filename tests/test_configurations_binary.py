@@ -0,0 +1,82 @@
+import pytest
+
+from flamapy.core.exceptions import FlamaException, ParsingException
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry, ProductLineModel
+
+from utils import ConfigurationsBinaryReader, ConfigurationsBinaryWriter
+
+
+def selected_sets(configurations):
+    return {frozenset(config.get_selected_elements()) for config in configurations}
+
+
+def test_round_trip(tmp_path, fm_model, portfolio):
+    path = str(tmp_path / 'configs.plb')
+    writer = ConfigurationsBinaryWriter(path)
+    writer.set_elements([feature.name for feature in fm_model.get_features()])
+    writer.set_configurations(iter(portfolio))
+    assert writer.write() == len(portfolio)
+    pl_model = ConfigurationsBinaryReader(path).transform()
+    assert selected_sets(pl_model.configurations) == selected_sets(portfolio)
+
+
+def test_transform_writes_the_file(tmp_path, fm_model, portfolio):
+    path = str(tmp_path / 'configs.plb')
+    writer = ConfigurationsBinaryWriter(path)
+    writer.set_elements([feature.name for feature in fm_model.get_features()])
+    writer.set_configurations(portfolio)
+    assert writer.transform() is None
+    reader = ConfigurationsBinaryReader(path)
+    assert len(list(reader.iter_ids())) == len(portfolio)
+
+
+def test_round_trip_of_product_lines(tmp_path, fm_model, portfolio):
+    for compact in (False, True):
+        pl_model = ProductLineModel(compact=compact)
+        pl_model.configurations = portfolio
+        path = str(tmp_path / f'pl_{compact}.plb')
+        writer = ConfigurationsBinaryWriter(path)
+        writer.set_product_line(pl_model)
+        writer.write()
+        assert ConfigurationsBinaryReader(path).transform() == pl_model
+
+
+def test_round_trip_of_id_rows(tmp_path, fm_model, portfolio):
+    registry = FeatureRegistry.from_feature_model(fm_model)
+    rows = [sorted(registry.ids(config.get_selected_elements())) for config in portfolio]
+    path = str(tmp_path / 'ids.plb')
+    writer = ConfigurationsBinaryWriter(path)
+    writer.set_id_rows(registry, rows)
+    writer.write()
+    reader = ConfigurationsBinaryReader(path)
+    reader.set_registry(registry)
+    assert [sorted(ids) for ids in reader.iter_ids()] == rows
+
+
+def test_unknown_selected_element_is_rejected(tmp_path):
+    writer = ConfigurationsBinaryWriter(str(tmp_path / 'configs.plb'))
+    writer.set_elements(['A', 'B'])
+    writer.set_configurations([Configuration({'A': True, 'C': False}),
+                               Configuration({'A': True, 'C': True})])
+    with pytest.raises(FlamaException):
+        writer.write()
+
+
+def test_truncated_files_are_rejected(tmp_path, fm_model, portfolio):
+    path = tmp_path / 'configs.plb'
+    writer = ConfigurationsBinaryWriter(str(path))
+    writer.set_elements([feature.name for feature in fm_model.get_features()])
+    writer.set_configurations(portfolio)
+    writer.write()
+    content = path.read_bytes()
+    # Empty, in the header, in the elements table, and in the rows
+    for size in (0, 10, 30, len(content) - 1):
+        truncated = tmp_path / f'truncated_{size}.plb'
+        truncated.write_bytes(content[:size])
+        with pytest.raises(ParsingException):
+            ConfigurationsBinaryReader(str(truncated)).transform()
+    invalid = tmp_path / 'invalid.plb'
+    invalid.write_bytes(b'x' * len(content))
+    with pytest.raises(ParsingException):
+        ConfigurationsBinaryReader(str(invalid)).read_packed_rows()
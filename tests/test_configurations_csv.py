@@ -0,0 +1,31 @@
+from utils import ConfigurationsCSVReader, ConfigurationsCSVWriter
+
+
+def write_csv(path, fm_model, portfolio):
+    writer = ConfigurationsCSVWriter(str(path))
+    writer.set_elements([feature.name for feature in fm_model.get_features()])
+    writer.set_configurations(portfolio)
+    return writer
+
+
+def test_transform_returns_the_content(tmp_path, fm_model, portfolio):
+    path = tmp_path / 'configs.csv'
+    content = write_csv(path, fm_model, portfolio).transform()
+    assert path.read_text(encoding='utf-8') == content
+
+
+def test_write_streams_the_same_content(tmp_path, fm_model, portfolio):
+    content = write_csv(tmp_path / 'configs.csv', fm_model, portfolio).transform()
+    writer = write_csv(tmp_path / 'streamed.csv', fm_model, iter(portfolio))
+    assert writer.write() == len(portfolio)
+    assert (tmp_path / 'streamed.csv').read_text(encoding='utf-8') == content
+
+
+def test_round_trip(tmp_path, fm_model, portfolio):
+    path = tmp_path / 'configs.csv'
+    write_csv(path, fm_model, portfolio).write()
+    reader = ConfigurationsCSVReader(str(path))
+    reader.store_only_selected_elements(True)
+    configurations = reader.transform()
+    assert ([set(config.get_selected_elements()) for config in configurations]
+            == [set(config.get_selected_elements()) for config in portfolio])
@@ -0,0 +1,35 @@
+import io
+
+from utils import ConfigurationsListReader, ConfigurationsListWriter
+from utils.configurations_list_writer import write_configurations_list
+
+from flamapy.metamodels.productline_metamodel.operations import FullConfigurations
+
+from conftest import reference_full_configurations, selected
+
+
+def test_write_streams_the_same_content(tmp_path, portfolio):
+    writer = ConfigurationsListWriter(str(tmp_path / 'configs.txt'))
+    writer.set_configurations(portfolio)
+    content = writer.transform()
+    assert (tmp_path / 'configs.txt').read_text(encoding='utf-8') == content
+    writer = ConfigurationsListWriter(str(tmp_path / 'streamed.txt'))
+    writer.set_configurations(iter(portfolio))
+    assert writer.write() == len(portfolio)
+    assert (tmp_path / 'streamed.txt').read_text(encoding='utf-8') == content
+    file = io.StringIO()
+    assert write_configurations_list(file, iter(portfolio), chunk_size=3) == len(portfolio)
+    assert file.getvalue() == content
+
+
+def test_write_lazy_full_configurations(tmp_path, sat_model, portfolio):
+    product = portfolio[0]
+    operation = FullConfigurations()
+    operation.set_configuration(product)
+    operation.set_lazy(True)
+    writer = ConfigurationsListWriter(str(tmp_path / 'full.txt'))
+    writer.set_configurations(operation.execute(sat_model).get_result())
+    expected = reference_full_configurations(sat_model, product)
+    assert writer.write() == len(expected)
+    configurations = ConfigurationsListReader(str(tmp_path / 'full.txt')).transform()
+    assert {selected(config) for config in configurations} == expected
@@ -0,0 +1,50 @@
+import pytest
+
+from flamapy.core.exceptions import ParsingException
+
+from utils.configurations_list_parser import parse_elements_list
+
+
+@pytest.mark.parametrize('elements', [
+    [],
+    ['A'],
+    ['A', 'B', 'C'],
+    ['Feature with spaces', 'Ñandú'],
+    ["It's", 'quoted "name"'],
+    ['back\\slash', 'tab\tand\nnewline'],
+    ["', '", '[', ']'],
+])
+def test_parses_the_output_of_str(elements):
+    assert parse_elements_list(str(elements)) == elements
+    assert parse_elements_list(f'  {elements}\n') == elements
+
+
+def test_parses_other_spellings():
+    assert parse_elements_list('["A", "B"]') == ['A', 'B']
+    assert parse_elements_list("[ 'A' ,'B', ]") == ['A', 'B']
+    assert parse_elements_list('[ ]') == []
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    'A, B',
+    "['A', 'B'",
+    "['A' 'B']",
+    "['A', B]",
+    "['A', 1]",
+    "[__import__('os').system('true')]",
+    "['A'] + ['B']",
+    "['A', 'B'] ['C']",
+])
+def test_rejects_anything_else(text):
+    with pytest.raises(ParsingException):
+        parse_elements_list(text)
+
+
+def test_interned_names_are_shared():
+    interned: dict[str, str] = {}
+    first = parse_elements_list("['Feature', 'Other']", interned)
+    second = parse_elements_list("['Other', 'Feature']", interned)
+    assert first[0] is second[1]
+    assert first[1] is second[0]
+    assert interned == {'Feature': 'Feature', 'Other': 'Other'}
@@ -0,0 +1,69 @@
+import pytest
+
+from flamapy.core.exceptions import FlamaException
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry, ProductLineModel
+from flamapy.metamodels.productline_metamodel.models import feature_registry
+
+from utils import ConfigurationsCSVReader, ConfigurationsCSVWriter
+
+
+def test_shared_registry_is_frozen(fm_model):
+    registry = FeatureRegistry.get(fm_model)
+    assert FeatureRegistry.get(fm_model) is registry
+    assert registry.frozen
+    assert registry.features() == [feature.name for feature in fm_model.get_features()]
+    with pytest.raises(FlamaException):
+        registry.intern('NotAFeature')
+    assert registry.intern(registry.feature(0)) == 0
+
+
+def test_overlay_keeps_the_ids(fm_model):
+    registry = FeatureRegistry.get(fm_model)
+    overlay = registry.with_features(['NotAFeature'])
+    assert overlay is not registry and not overlay.frozen
+    assert overlay.features()[:len(registry)] == registry.features()
+    assert overlay.get_id('NotAFeature') == len(registry)
+    assert 'NotAFeature' not in registry
+    assert registry.with_features(registry.features()[:3]) is registry
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_product_line_does_not_modify_the_shared_registry(fm_model, portfolio, compact):
+    registry = FeatureRegistry.get(fm_model)
+    size = len(registry)
+    pl_model = ProductLineModel(registry=registry) if compact else ProductLineModel()
+    pl_model.configurations = portfolio
+    product = Configuration(dict.fromkeys(['NotAFeature', registry.feature(0)], True))
+    pl_model.add(product)
+    assert len(registry) == size
+    assert product in pl_model.configurations
+    rows = list(pl_model.id_rows())
+    registry_size = len(pl_model.registry())
+    assert list(pl_model.id_rows()) == rows
+    assert len(pl_model.registry()) == registry_size
+    if compact:
+        assert pl_model.registry().get_id(registry.feature(0)) == 0
+
+
+def test_readers_do_not_modify_the_shared_registry(tmp_path, fm_model, portfolio):
+    registry = FeatureRegistry.get(fm_model)
+    size = len(registry)
+    path = str(tmp_path / 'configs.csv')
+    writer = ConfigurationsCSVWriter(path)
+    writer.set_elements(['NotAFeature'] + registry.features())
+    writer.set_configurations(portfolio)
+    writer.write()
+    reader = ConfigurationsCSVReader(path)
+    reader.set_registry(registry)
+    rows = list(reader.iter_ids())
+    assert len(registry) == size
+    assert reader.registry.get_id('NotAFeature') == size
+    assert ([set(reader.registry.features(ids)) for ids in rows]
+            == [set(config.get_selected_elements()) for config in portfolio])
+
+
+def test_finalizer_only_discards_its_own_registry(fm_model):
+    registry = FeatureRegistry.get(fm_model)
+    feature_registry._discard_registry(id(fm_model), FeatureRegistry())
+    assert FeatureRegistry.get(fm_model) is registry
@@ -0,0 +1,106 @@
+import itertools
+
+import pytest
+
+from flamapy.metamodels.productline_metamodel.operations import (
+    FullConfigurations,
+    FullConfigurationsBatch
+)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext)
+
+from conftest import reference_full_configurations, selected
+
+
+def test_full_configurations_match_reference(sat_model, portfolio):
+    for product in portfolio[:10]:
+        operation = FullConfigurations()
+        operation.set_configuration(product)
+        result = [selected(config) for config in operation.execute(sat_model).get_result()]
+        assert len(result) == len(set(result))
+        assert set(result) == reference_full_configurations(sat_model, product)
+
+
+def test_interleaved_enumerations_on_shared_solver(sat_model, portfolio):
+    context = FullConfigurationsContext.get(sat_model)
+    product = max(portfolio[:20],
+                  key=lambda config: len(reference_full_configurations(sat_model, config)))
+    expected = reference_full_configurations(sat_model, product)
+    first = context.iter_full_configurations(product)
+    second = context.iter_full_configurations(product)
+    found_first, found_second = [], []
+    for config_first, config_second in itertools.zip_longest(first, second):
+        if config_first is not None:
+            found_first.append(selected(config_first))
+        if config_second is not None:
+            found_second.append(selected(config_second))
+    assert sorted(found_first, key=sorted) == sorted(expected, key=sorted)
+    assert sorted(found_second, key=sorted) == sorted(expected, key=sorted)
+    # A later enumeration is not affected by the blocking clauses of the previous ones
+    assert {selected(config) for config in context.iter_full_configurations(product)} == expected
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_batch_matches_reference(sat_model, portfolio, processes):
+    products = portfolio[:10]
+    operation = FullConfigurationsBatch()
+    operation.set_configurations(products)
+    operation.set_processes(processes)
+    results = list(operation.execute(sat_model).get_result())
+    assert [result.index for result in results] == list(range(len(products)))
+    for result, product in zip(results, products):
+        assert result.error is None
+        assert ({selected(config) for config in result.full_configurations}
+                == reference_full_configurations(sat_model, product))
+
+
+def largest_product(sat_model, portfolio):
+    return max(portfolio[:20],
+               key=lambda config: len(reference_full_configurations(sat_model, config)))
+
+
+def lazy_full_configurations(sat_model, product, max_solutions=None, timeout=None):
+    operation = FullConfigurations()
+    operation.set_configuration(product)
+    operation.set_lazy(True)
+    operation.set_max_solutions(max_solutions)
+    operation.set_timeout(timeout)
+    return operation.execute(sat_model).get_result()
+
+
+def test_lazy_enumeration_can_stop_early(sat_model, portfolio):
+    product = largest_product(sat_model, portfolio)
+    expected = reference_full_configurations(sat_model, product)
+    result = lazy_full_configurations(sat_model, product)
+    assert not isinstance(result, list)
+    first = next(result)
+    assert selected(first) in expected
+    result.close()
+    # The shared solver is not affected by the interrupted enumeration
+    assert {selected(config) for config in lazy_full_configurations(sat_model, product)} \
+        == expected
+
+
+@pytest.mark.parametrize('max_solutions', [0, 1, 3, None])
+def test_max_solutions(sat_model, portfolio, max_solutions):
+    product = largest_product(sat_model, portfolio)
+    expected = reference_full_configurations(sat_model, product)
+    result = [selected(config)
+              for config in lazy_full_configurations(sat_model, product, max_solutions)]
+    limit = len(expected) if max_solutions is None else min(max_solutions, len(expected))
+    assert len(result) == len(set(result)) == limit
+    assert set(result) <= expected
+
+
+def test_timeout_expiry(sat_model, portfolio):
+    product = largest_product(sat_model, portfolio)
+    expected = reference_full_configurations(sat_model, product)
+    assert len(expected) > 1
+    # The deadline has passed when the first solution is found
+    result = [selected(config)
+              for config in lazy_full_configurations(sat_model, product, timeout=0)]
+    assert len(result) <= 1
+    assert set(result) <= expected
+    # The interrupt of the shared solver is cleared after the timeout
+    assert {selected(config)
+            for config in lazy_full_configurations(sat_model, product, timeout=60)} == expected
@@ -0,0 +1,21 @@
+from flamapy.metamodels.productline_metamodel.operations import FullConfigurationsCount
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_count import (
+    count_many)
+
+from conftest import reference_full_configurations
+
+
+def test_bdd_count_matches_enumeration(sat_model, bdd_model, portfolio):
+    products = portfolio[:20]
+    expected = [len(reference_full_configurations(sat_model, product)) for product in products]
+    assert count_many(products, bdd_model) == expected
+    operation = FullConfigurationsCount()
+    operation.set_configuration(products[0])
+    assert operation.execute(bdd_model).get_result() == expected[0]
+    assert FullConfigurationsCount().count_many(products, bdd_model) == expected
+
+
+def test_sat_count_matches_bdd_count(sat_model, bdd_model, portfolio):
+    products = portfolio[:5]
+    assert count_many(products, sat_model) == count_many(products, bdd_model)
+
@@ -0,0 +1,82 @@
+import pytest
+
+from flamapy.metamodels.productline_metamodel.operations import (
+    FullConfigurations,
+    FullConfigurationsCubes
+)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations import (
+    concrete_features)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_cubes import (
+    split_cube)
+
+from conftest import reference_full_configurations, selected
+
+
+def largest_product(sat_model, portfolio):
+    return max(portfolio[:20],
+               key=lambda config: len(reference_full_configurations(sat_model, config)))
+
+
+def cubes(sat_model, product, **options):
+    operation = FullConfigurationsCubes()
+    operation.set_configuration(product)
+    operation.set_cubes(options.get('cubes', 4))
+    operation.set_cube_limit(options.get('cube_limit', 3))
+    operation.set_processes(options.get('processes', 1))
+    operation.set_max_solutions(options.get('max_solutions'))
+    operation.set_projection(options.get('projection'))
+    return [selected(config) for config in operation.execute(sat_model).get_result()]
+
+
+def test_cubes_match_reference(sat_model, portfolio):
+    for product in portfolio[:10]:
+        result = cubes(sat_model, product)
+        assert len(result) == len(set(result))
+        assert set(result) == reference_full_configurations(sat_model, product)
+
+
+@pytest.mark.parametrize('cube_limit', [1, 2, 1000])
+def test_cubes_split_while_enumerating(sat_model, portfolio, cube_limit):
+    product = largest_product(sat_model, portfolio)
+    result = cubes(sat_model, product, cubes=1, cube_limit=cube_limit)
+    assert len(result) == len(set(result))
+    assert set(result) == reference_full_configurations(sat_model, product)
+
+
+def test_cubes_in_worker_processes(sat_model, portfolio):
+    product = largest_product(sat_model, portfolio)
+    result = cubes(sat_model, product, processes=2)
+    assert sorted(result, key=sorted) == sorted(cubes(sat_model, product), key=sorted)
+
+
+def test_cubes_max_solutions(sat_model, portfolio):
+    product = largest_product(sat_model, portfolio)
+    expected = reference_full_configurations(sat_model, product)
+    result = cubes(sat_model, product, max_solutions=2)
+    assert len(result) == min(2, len(expected))
+    assert set(result) <= expected
+
+
+def test_projection_parity(fm_model, sat_model, portfolio):
+    projection = concrete_features(fm_model)
+    for product in portfolio[:10]:
+        expected = {configuration & set(projection)
+                    for configuration in reference_full_configurations(sat_model, product)}
+        operation = FullConfigurations()
+        operation.set_configuration(product)
+        operation.set_projection(projection)
+        projected = [selected(config) for config in operation.execute(sat_model).get_result()]
+        assert len(projected) == len(set(projected))
+        assert set(projected) == expected
+        projected_cubes = cubes(sat_model, product, projection=projection)
+        assert len(projected_cubes) == len(set(projected_cubes))
+        assert set(projected_cubes) == expected
+
+
+def test_split_cube_bounds_the_blocked_models():
+    variables = [1, 2, 3, 4]
+    found = [[-1, 2, -3, 4], [-1, 2, 3, 4], [1, 2, -3, 4], [1, -2, 3, -4], [1, 2, 3, -4]]
+    parts = split_cube([], found, variables, 1)
+    assert all(len(part_found) <= 1 for _, part_found, _ in parts)
+    assert sorted(solution for _, part_found, _ in parts for solution in part_found) == \
+        sorted(found)
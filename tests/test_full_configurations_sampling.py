@@ -0,0 +1,64 @@
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.operations import FullConfigurationsSampling
+
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_context import (
+    FullConfigurationsContext)
+from flamapy.metamodels.productline_metamodel.operations.full_configurations_sampling import (
+    completion_assignment)
+
+from conftest import reference_full_configurations, selected
+
+
+def sample(bdd_model, product, sample_size, weights=None, with_replacement=False, seed=1):
+    operation = FullConfigurationsSampling()
+    operation.set_configuration(product)
+    operation.set_sample_size(sample_size)
+    operation.set_weights(weights)
+    operation.set_with_replacement(with_replacement)
+    operation.set_seed(seed)
+    return [selected(config) for config in operation.execute(bdd_model).get_result()]
+
+
+def test_sample_without_replacement_is_exhaustive(sat_model, bdd_model, portfolio):
+    for product in portfolio[:10]:
+        expected = reference_full_configurations(sat_model, product)
+        result = sample(bdd_model, product, len(expected) + 5)
+        assert len(result) == len(set(result)) == len(expected)
+        assert set(result) == expected
+
+
+def test_sample_with_replacement(sat_model, bdd_model, portfolio):
+    product = portfolio[0]
+    expected = reference_full_configurations(sat_model, product)
+    result = sample(bdd_model, product, 3 * len(expected), with_replacement=True)
+    assert len(result) == 3 * len(expected)
+    assert set(result) <= expected
+
+
+def test_sample_is_reproducible(bdd_model, portfolio):
+    assert sample(bdd_model, portfolio[0], 5, seed=7) == sample(bdd_model, portfolio[0], 5, seed=7)
+
+
+def test_skewed_weights_without_replacement(fm_model, sat_model, bdd_model, portfolio):
+    product = max(portfolio[:20],
+                  key=lambda config: len(reference_full_configurations(sat_model, config)))
+    expected = reference_full_configurations(sat_model, product)
+    weights = {feature.name: 1e-4 for feature in fm_model.get_features()[:10]}
+    result = sample(bdd_model, product, len(expected), weights=weights)
+    assert len(result) == len(set(result))
+    assert set(result) == expected
+
+
+def test_zero_weights_bound_the_sample(fm_model, bdd_model, portfolio):
+    product = portfolio[0]
+    weights = {feature.name: 0 for feature in fm_model.get_features()}
+    result = sample(bdd_model, product, 10, weights=weights)
+    # Only the completions without selected weighted features can be drawn
+    assert result == []
+
+
+def test_completion_assignment_selects_the_core(sat_model, bdd_model, portfolio):
+    core = FullConfigurationsContext.get(sat_model).core_features
+    for product in [Configuration({}), portfolio[0]]:
+        assignment = completion_assignment(product, bdd_model)
+        assert all(assignment.get(bdd_model.features_vars[feature]) for feature in core)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import main
+from conftest import model_path, portfolio_path
+
+
+MODEL = model_path('NamasteRincon')
+
+
+def run(tmp_path, command, *options):
+    """Run the command of the CLI on the model with a temporary cache, and return its JSON
+    output."""
+    output = tmp_path / 'output.json'
+    args = main.parse_args([command, MODEL, *options, '--cache-dir', str(tmp_path / 'cache'),
+                            '-o', str(output)])
+    main.main(args)
+    results = json.loads(output.read_text(encoding='utf-8'))
+    for result in results:
+        assert 'error' not in result
+        assert result['model'] == MODEL
+    return results
+
+
+def test_count(tmp_path):
+    [result] = run(tmp_path, 'count')
+    assert result['portfolio'] is None
+    assert result['result'] > 0
+
+
+def test_core(tmp_path):
+    [result] = run(tmp_path, 'core')
+    assert 'Pizza' in result['result']
+    assert result['result'] == sorted(result['result'])
+
+
+def test_vps(tmp_path):
+    [result] = run(tmp_path, 'vps')
+    assert result['result']
+    assert all(isinstance(variants, list) for variants in result['result'].values())
+
+
+def test_sample(tmp_path):
+    [result] = run(tmp_path, 'sample', '--sample-size', '3')
+    assert len(result['result']) == 3
+    assert all('Pizza' in configuration for configuration in result['result'])
+
+
+@pytest.mark.parametrize('command', ['fif', 'fip', 'distribution'])
+def test_portfolio_statistics(tmp_path, command):
+    results = run(tmp_path, command, '-p', portfolio_path('NamasteRincon'))
+    assert [result['portfolio'] for result in results] == [portfolio_path('NamasteRincon')]
+    n_products = len(main.read_portfolio(portfolio_path('NamasteRincon')))
+    result = results[0]['result']
+    if command == 'fif':
+        assert max(result.values()) <= n_products
+    elif command == 'fip':
+        assert all(0 <= probability <= 1 for probability in result.values())
+    else:
+        assert sum(result['distribution']) == n_products
+        assert result['statistics']['Mean'] > 0
+
+
+@pytest.mark.parametrize('command', ['fif', 'fip', 'distribution'])
+def test_all_configurations_statistics(tmp_path, command):
+    [result] = run(tmp_path, command, '--all-configurations')
+    assert result['portfolio'] is None
+    if command == 'distribution':
+        [count] = run(tmp_path, 'count')
+        assert sum(result['result']['distribution']) == count['result']
+
+
+def test_expand(tmp_path):
+    [result] = run(tmp_path, 'expand', '-p', portfolio_path('NamasteRincon'),
+                   '--max-solutions', '2')
+    products = main.read_portfolio(portfolio_path('NamasteRincon'))
+    assert len(result['result']) == len(products)
+    for expansion in result['result']:
+        assert expansion['error'] is None
+        assert 1 <= len(expansion['full_configurations']) <= 2
+        assert all(set(expansion['product']) <= set(full)
+                   for full in expansion['full_configurations'])
+
+
+def test_validate(tmp_path):
+    [result] = run(tmp_path, 'validate', '-p', portfolio_path('NamasteRincon'))
+    assert all(validity['valid'] for validity in result['result'])
+
+
+def test_default_portfolios_and_workers(tmp_path):
+    sequential = run(tmp_path, 'validate')
+    # The default portfolios are the files <model>_configs*.csv next to the model
+    assert len(sequential) > 1
+    assert run(tmp_path, 'validate', '-w', '2') == sequential
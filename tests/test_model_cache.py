@@ -0,0 +1,39 @@
+import os
+import shutil
+
+from utils import ModelCache
+
+from conftest import model_path
+
+
+def test_cache_round_trip_and_prune(tmp_path):
+    fm_filepath = str(tmp_path / 'model.uvl')
+    shutil.copy(model_path('NamasteRincon'), fm_filepath)
+    cache_dir = str(tmp_path / 'cache')
+    sat_model = ModelCache(cache_dir).sat_model(fm_filepath)
+    old_key = ModelCache(cache_dir).key(fm_filepath)
+    loaded = ModelCache(cache_dir).sat_model(fm_filepath)
+    assert loaded.get_all_clauses().clauses == sat_model.get_all_clauses().clauses
+    assert loaded.features == sat_model.features
+    # A new version of the file gets a new entry; the old one stays until it is pruned
+    with open(fm_filepath, 'a', encoding='utf-8') as file:
+        file.write('\n')
+    cache = ModelCache(cache_dir)
+    cache.sat_model(fm_filepath)
+    new_key = cache.key(fm_filepath)
+    assert new_key != old_key
+    assert os.path.isdir(os.path.join(cache_dir, old_key))
+    assert cache.prune() == [old_key]
+    assert os.path.isdir(os.path.join(cache_dir, new_key))
+    assert not os.path.isdir(os.path.join(cache_dir, old_key))
+
+
+def test_key_is_recomputed_when_the_file_changes(tmp_path):
+    fm_filepath = str(tmp_path / 'model.uvl')
+    shutil.copy(model_path('NamasteRincon'), fm_filepath)
+    cache = ModelCache(str(tmp_path / 'cache'))
+    key = cache.key(fm_filepath)
+    assert cache.key(fm_filepath) == key
+    with open(fm_filepath, 'a', encoding='utf-8') as file:
+        file.write('\n')
+    assert cache.key(fm_filepath) != key
@@ -0,0 +1,62 @@
+import pytest
+
+from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.operations import (
+    PLFeatureInclusionFrequency,
+    PLFeatureInclusionProbability,
+    PLInclusionMatrix
+)
+
+
+def product_line(portfolio, compact):
+    pl_model = ProductLineModel(compact=compact)
+    pl_model.configurations = portfolio
+    return pl_model
+
+
+def matrix_rows(features, matrix):
+    return sorted(sorted(feature for feature, included in zip(features, row) if included)
+                  for row in matrix)
+
+
+def test_same_matrix_in_both_modes(portfolio):
+    features, matrix = PLInclusionMatrix().execute(product_line(portfolio, False)).get_result()
+    compact_features, compact_matrix = \
+        PLInclusionMatrix().execute(product_line(portfolio, True)).get_result()
+    assert matrix.shape == compact_matrix.shape == (len(set(portfolio)), len(features))
+    assert matrix.dtype == compact_matrix.dtype == bool
+    assert set(features) == set(compact_features)
+    assert matrix_rows(features, matrix) == matrix_rows(compact_features, compact_matrix)
+    assert matrix_rows(features, matrix) == sorted(
+        sorted(config.get_selected_elements()) for config in set(portfolio))
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_fif_and_fip_with_and_without_precomputed_results(portfolio, compact):
+    pl_model = product_line(portfolio, compact)
+    matrix = PLInclusionMatrix().execute(pl_model).get_result()
+
+    fif = PLFeatureInclusionFrequency().execute(pl_model).get_result()
+    operation = PLFeatureInclusionFrequency()
+    operation.set_inclusion_matrix(matrix)
+    assert operation.execute(pl_model).get_result() == fif
+    assert fif == {feature: sum(1 for config in pl_model.configurations
+                                if config.is_selected(feature))
+                   for feature in pl_model.features()}
+
+    fip = PLFeatureInclusionProbability().execute(pl_model).get_result()
+    operation = PLFeatureInclusionProbability()
+    operation.set_inclusion_matrix(matrix)
+    assert operation.execute(pl_model).get_result() == fip
+    operation = PLFeatureInclusionProbability()
+    operation.set_feature_inclusion_frequency(fif)
+    assert operation.execute(pl_model).get_result() == fip
+    assert fip == {feature: frequency / len(pl_model.configurations)
+                   for feature, frequency in fif.items()}
+
+
+def test_empty_product_line():
+    features, matrix = PLInclusionMatrix().execute(ProductLineModel()).get_result()
+    assert features == []
+    assert matrix.shape == (0, 0)
+    assert PLFeatureInclusionFrequency().execute(ProductLineModel()).get_result() == {}
@@ -0,0 +1,83 @@
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import ProductLineModel
+from flamapy.metamodels.productline_metamodel.operations import PLProductDistribution
+from flamapy.metamodels.productline_metamodel.operations.pl_product_distribution import (
+    PERCENTILES,
+    descriptive_statistics
+)
+
+
+def random_histogram(seed):
+    rng = random.Random(seed)
+    return {size: rng.randint(0, 20) for size in rng.sample(range(30), rng.randint(1, 8))}
+
+
+def expand(histogram):
+    return sorted(size for size, count in histogram.items() for _ in range(count))
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_statistics_match_the_expanded_list(seed):
+    histogram = random_histogram(seed)
+    values = expand(histogram)
+    if not values:
+        histogram[0] = 1
+        values = [0]
+    stats = descriptive_statistics(histogram)
+    assert stats['Min'] == min(values)
+    assert stats['Max'] == max(values)
+    assert stats['Range'] == max(values) - min(values)
+    assert histogram[stats['Mode']] == max(histogram.values())
+    assert stats['Mean'] == pytest.approx(statistics.mean(values))
+    assert stats['Median'] == statistics.median(values)
+    if len(values) > 1:
+        assert stats['Standard deviation'] ** 2 == pytest.approx(statistics.variance(values))
+    else:
+        assert stats['Standard deviation'] == 0.0
+    median = statistics.median(values)
+    assert stats['Median absolute deviation'] == pytest.approx(
+        statistics.median(abs(value - median) for value in values))
+    assert stats['Percentiles'] == pytest.approx(
+        {p: np.percentile(values, p) for p in PERCENTILES})
+
+
+def test_quantiles_interpolate_between_ranks():
+    stats = descriptive_statistics({1: 1, 2: 1, 4: 1, 10: 1})
+    assert stats['Median'] == 3
+    assert stats['Percentiles'] == pytest.approx({5: 1.15, 25: 1.75, 50: 3, 75: 5.5, 95: 9.1})
+    assert stats['Mean'] == 4.25
+
+
+def test_list_and_dict_histograms_are_equivalent():
+    assert descriptive_statistics([0, 2, 0, 3]) == descriptive_statistics({1: 2, 3: 3})
+
+
+def test_large_counts():
+    big = 10 ** 30
+    stats = descriptive_statistics({3: big, 5: big + 1})
+    assert stats['Median'] == 5
+    assert stats['Mode'] == 5
+    assert stats['Mean'] == pytest.approx(4.0)
+    assert stats['Standard deviation'] == pytest.approx(1.0)
+    assert stats['Percentiles'] == {5: 3, 25: 3, 50: 5, 75: 5, 95: 5}
+    assert stats['Median absolute deviation'] == 0
+
+
+def test_empty_histogram():
+    stats = descriptive_statistics({})
+    assert all(value is None for value in stats.values())
+
+
+def test_operation_on_a_product_line():
+    pl_model = ProductLineModel()
+    pl_model.configurations = [Configuration(dict.fromkeys(features, True))
+                               for features in ['A', 'AB', 'BC', 'ABC']]
+    operation = PLProductDistribution().execute(pl_model)
+    assert operation.get_result() == [0, 1, 2, 1]
+    assert operation.descriptive_statistics()['Mean'] == 2
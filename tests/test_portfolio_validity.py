@@ -0,0 +1,44 @@
+import pytest
+
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.operations import PortfolioValidity
+
+from conftest import model_path, portfolio_path, reference_full_configurations, selected
+
+
+def validate(sat_model, products, full=False, processes=1):
+    operation = PortfolioValidity()
+    operation.set_configurations(products)
+    operation.set_full(full)
+    operation.set_processes(processes)
+    return operation.execute(sat_model).get_result()
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_results_follow_the_products(sat_model, portfolio, processes):
+    products = portfolio[:10] + portfolio[:2]
+    results = validate(sat_model, products, processes=processes)
+    assert [result.index for result in results] == list(range(len(products)))
+    assert [result.configuration for result in results] == products
+    for result, product in zip(results, products):
+        assert result.error is None
+        assert result.valid == bool(reference_full_configurations(sat_model, product))
+
+
+def test_invalid_product_is_diagnosed(fm_model, sat_model):
+    leaf = next(feature for feature in fm_model.get_features()
+                if not feature.get_children() and feature.get_parent() is not None)
+    product = Configuration({leaf.name: True})
+    result, = validate(sat_model, [product], full=True)
+    assert not result.valid
+    assert leaf.get_parent().name in result.missing_ancestors.get(leaf.name, [])
+
+
+def test_validate_command_keeps_the_order_of_the_file(tmp_path, model_name):
+    import main
+    options = {'cache_dir': str(tmp_path / 'cache'), 'full': False}
+    result = main.analyze('validate', model_path(model_name), portfolio_path(model_name),
+                          options)
+    products = main.read_portfolio(portfolio_path(model_name))
+    assert [entry['product'] for entry in result] == \
+        [sorted(selected(product)) for product in products]
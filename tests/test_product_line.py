@@ -0,0 +1,114 @@
+import pytest
+
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry, ProductLineModel
+
+
+def configuration(*features):
+    return Configuration(dict.fromkeys(features, True))
+
+
+def statistics(pl_model):
+    return (len(pl_model.configurations), pl_model.fingerprint(),
+            pl_model.feature_inclusion_frequency(), pl_model.size_histogram(),
+            pl_model.features())
+
+
+def rebuilt(pl_model, compact):
+    other = ProductLineModel(compact=compact)
+    other.configurations = list(pl_model.configurations)
+    return other
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_incremental_statistics_match_a_rebuild(portfolio, compact):
+    pl_model = ProductLineModel(compact=compact)
+    for product in portfolio:
+        pl_model.add(product)
+    for product in portfolio[::3]:
+        assert pl_model.remove(product)
+        assert not pl_model.remove(product)
+    assert statistics(pl_model) == statistics(rebuilt(pl_model, compact))
+    assert pl_model.feature_inclusion_frequency() == {
+        feature: sum(1 for config in pl_model.configurations if config.is_selected(feature))
+        for feature in pl_model.features()}
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_add_duplicate(compact):
+    pl_model = ProductLineModel(compact=compact)
+    assert pl_model.add(configuration('A', 'B'))
+    assert not pl_model.add(configuration('A', 'B'))
+    assert len(pl_model.configurations) == 1
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_update(compact):
+    pl_model = ProductLineModel(compact=compact)
+    pl_model.configurations = [configuration('A'), configuration('A', 'B')]
+    assert pl_model.update(configuration('A'), configuration('A', 'C'))
+    assert statistics(pl_model) == statistics(rebuilt(pl_model, compact))
+    assert configuration('A', 'C') in pl_model.configurations
+    assert configuration('A') not in pl_model.configurations
+    # The old configuration is not in the product line
+    assert not pl_model.update(configuration('D'), configuration('E'))
+    # Replacing a configuration by itself changes nothing
+    assert pl_model.update(configuration('A', 'B'), configuration('A', 'B'))
+    assert len(pl_model.configurations) == 2
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_update_to_a_duplicate_does_nothing(compact):
+    pl_model = ProductLineModel(compact=compact)
+    pl_model.configurations = [configuration('A'), configuration('A', 'B')]
+    before = statistics(pl_model)
+    assert not pl_model.update(configuration('A'), configuration('A', 'B'))
+    assert statistics(pl_model) == before
+    assert configuration('A') in pl_model.configurations
+
+
+def test_equal_product_lines_have_equal_hashes(fm_model, portfolio):
+    features = [feature.name for feature in fm_model.get_features()]
+    product_lines = [ProductLineModel(), ProductLineModel(compact=True),
+                     ProductLineModel(registry=FeatureRegistry.get(fm_model)),
+                     ProductLineModel(registry=FeatureRegistry(reversed(features)))]
+    for i, pl_model in enumerate(product_lines):
+        # Each product line gets the products in a different order
+        pl_model.configurations = portfolio[::-1] if i % 2 else portfolio
+    for pl_model in product_lines:
+        for other in product_lines:
+            assert pl_model == other
+            assert hash(pl_model) == hash(other)
+            assert pl_model.fingerprint() == other.fingerprint()
+    assert len({hash(pl_model) for pl_model in product_lines}) == 1
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_fingerprint_collision_compares_the_products(monkeypatch, compact):
+    # All the products have the same digest, and both product lines have the same statistics
+    monkeypatch.setattr(ProductLineModel, '_digest', lambda self, features: 1)
+    pl_model = ProductLineModel(compact=compact)
+    pl_model.configurations = [configuration('A', 'B'), configuration('C', 'D')]
+    other = ProductLineModel(compact=compact)
+    other.configurations = [configuration('A', 'C'), configuration('B', 'D')]
+    assert pl_model.fingerprint() == other.fingerprint()
+    assert hash(pl_model) == hash(other)
+    assert pl_model != other
+    same = ProductLineModel(compact=not compact)
+    same.configurations = [configuration('C', 'D'), configuration('A', 'B')]
+    assert pl_model == same
+
+
+def test_equality_between_modes_ignores_unselected_features():
+    configurations = [Configuration({'A': True, 'B': False}), Configuration({'A': True, 'C': True})]
+    pl_model = ProductLineModel()
+    pl_model.configurations = configurations
+    compact = ProductLineModel(compact=True)
+    compact.configurations = configurations
+    assert pl_model == compact
+    assert compact == pl_model
+    assert hash(pl_model) == hash(compact)
+    other = ProductLineModel(compact=True)
+    other.configurations = [configuration('A'), configuration('A', 'B')]
+    assert pl_model != other
+    assert other != pl_model
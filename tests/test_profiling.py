@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from flamapy.metamodels.productline_metamodel import profiling
+from flamapy.metamodels.productline_metamodel.profiling import PROFILER, Profiler
+
+import main
+from conftest import model_path
+
+
+@pytest.fixture
+def shared_profiler():
+    PROFILER.reset()
+    PROFILER.enable(trace_memory=False)
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def entries(profiler):
+    return {entry['span']: entry for entry in profiler.report()}
+
+
+def test_nested_spans_and_counters():
+    profiler = Profiler()
+    profiler.enable(trace_memory=False)
+    with profiler.span('outer'):
+        profiler.count('calls')
+        for _ in range(3):
+            with profiler.span('inner') as span:
+                assert span.path == ('outer', 'inner')
+                profiler.count('calls', 2)
+    with profiler.span('outer'):
+        pass
+    profiler.disable()
+    report = entries(profiler)
+    assert list(report) == ['outer', 'outer > inner']
+    assert report['outer']['calls'] == 2
+    assert report['outer']['depth'] == 0
+    # The counters of a span are also attributed to the enclosing spans
+    assert report['outer']['counters'] == {'calls': 7}
+    assert report['outer > inner'] == {'span': 'outer > inner', 'depth': 1, 'calls': 3,
+                                       'seconds': report['outer > inner']['seconds'],
+                                       'peak_bytes': 0, 'counters': {'calls': 6}}
+    assert report['outer']['seconds'] >= report['outer > inner']['seconds'] >= 0
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.span('stage') as span:
+        assert span is None
+        profiler.count('calls')
+    assert not profiler.report()
+
+
+def test_memory_peak():
+    profiler = Profiler()
+    profiler.enable(trace_memory=True)
+    try:
+        with profiler.span('outer'):
+            with profiler.span('allocate'):
+                data = bytearray(4 * 2**20)
+            del data
+    finally:
+        profiler.disable()
+    report = entries(profiler)
+    assert report['outer > allocate']['peak_bytes'] >= 4 * 2**20
+    assert report['outer']['peak_bytes'] >= report['outer > allocate']['peak_bytes']
+
+
+def test_profiled_and_count(shared_profiler):
+    @profiling.profiled('Stage')
+    def stage(n):
+        profiling.count('events', n)
+        return n
+
+    with profiling.span('Pipeline'):
+        assert stage(2) == 2
+        assert stage(3) == 3
+    report = entries(shared_profiler)
+    assert report['Pipeline > Stage']['calls'] == 2
+    assert report['Pipeline > Stage']['counters'] == {'events': 5}
+    assert stage.__name__ == 'stage'
+
+
+def test_export_json(tmp_path, shared_profiler):
+    with profiling.span('Stage'):
+        profiling.count('events')
+    path = tmp_path / 'profile.json'
+    shared_profiler.export_json(str(path))
+    report = json.loads(path.read_text(encoding='utf-8'))
+    assert isinstance(report, list) and len(report) == 1
+    assert set(report[0]) == {'span', 'depth', 'calls', 'seconds', 'peak_bytes', 'counters'}
+    assert report[0]['span'] == 'Stage'
+    assert report[0]['calls'] == 1
+    assert report[0]['counters'] == {'events': 1}
+    assert isinstance(report[0]['seconds'], float)
+
+
+def test_merge():
+    profiler = Profiler()
+    profiler.enable(trace_memory=False)
+    with profiler.span('task'):
+        profiler.count('calls')
+    worker = Profiler()
+    worker.enable(trace_memory=False)
+    with worker.span('task'):
+        with worker.span('stage'):
+            worker.count('calls', 2)
+    profiler.merge(worker.report())
+    report = entries(profiler)
+    assert report['task']['calls'] == 2
+    assert report['task']['counters'] == {'calls': 3}
+    assert report['task > stage']['depth'] == 1
+    assert report['task > stage']['counters'] == {'calls': 2}
+
+
+def test_reports_of_the_workers_are_merged(tmp_path, shared_profiler):
+    args = main.parse_args(['expand', model_path('NamasteRincon'), '-w', '2',
+                            '--max-solutions', '5', '--cache-dir', str(tmp_path / 'cache'),
+                            '-o', str(tmp_path / 'output.json')])
+    main.main(args)
+    report = entries(shared_profiler)
+    tasks = [entry for entry in report.values() if entry['depth'] == 0]
+    assert len(tasks) == 2
+    assert all(task['counters'].get('models', 0) > 0 for task in tasks)
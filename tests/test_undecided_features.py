@@ -0,0 +1,45 @@
+import pytest
+from pysat.solvers import Solver
+
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.operations import UndecidedFeatures
+
+
+def reference_undecided_features(sat_model, configuration):
+    """Free and forced features by two SAT checks per undecided feature, with a private
+    solver."""
+    variables = {feature: variable for variable, feature in sat_model.features.items()}
+    assumptions = [variables[feature] if selected else -variables[feature]
+                   for feature, selected in configuration.elements.items()]
+    free, forced = set(), {}
+    with Solver(name='glucose3', bootstrap_with=sat_model.get_all_clauses().clauses) as solver:
+        for variable, feature in sat_model.features.items():
+            if feature in configuration.elements:
+                continue
+            can_select = solver.solve(assumptions=assumptions + [variable])
+            can_deselect = solver.solve(assumptions=assumptions + [-variable])
+            if can_select and can_deselect:
+                free.add(feature)
+            else:
+                forced[feature] = can_select
+    return free, forced
+
+
+def partial_configurations(portfolio):
+    product = portfolio[0]
+    features = sorted(product.get_selected_elements())
+    return [Configuration({}),
+            Configuration(dict.fromkeys(features[:2], True)),
+            product]
+
+
+@pytest.mark.parametrize('index', range(3))
+def test_matches_per_feature_checks(sat_model, portfolio, index):
+    configuration = partial_configurations(portfolio)[index]
+    operation = UndecidedFeatures()
+    operation.set_configuration(configuration)
+    operation.execute(sat_model)
+    free, forced = reference_undecided_features(sat_model, configuration)
+    assert set(operation.get_result()) == free
+    assert len(operation.get_result()) == len(free)
+    assert operation.forced_features() == forced
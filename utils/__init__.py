@@ -3,10 +3,16 @@ from .configurations_csv_reader import ConfigurationsCSVReader
 from .configurations_list_writer import ConfigurationsListWriter
 from .configurations_list_reader import ConfigurationsListReader
 from .configurations_attributes_reader import ConfigurationsAttributesReader
+from .configurations_binary_writer import ConfigurationsBinaryWriter
+from .configurations_binary_reader import ConfigurationsBinaryReader
+from .model_cache import ModelCache
 
 
 __all__ = ['ConfigurationsCSVWriter',
            'ConfigurationsCSVReader',
            'ConfigurationsListWriter',
            'ConfigurationsListReader',
-           'ConfigurationsAttributesReader']
+           'ConfigurationsAttributesReader',
+           'ConfigurationsBinaryWriter',
+           'ConfigurationsBinaryReader',
+           'ModelCache']
@@ -0,0 +1,128 @@
+import os
+import struct
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+from flamapy.core.exceptions import ParsingException
+from flamapy.core.transformations import TextToModel
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry, ProductLineModel
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+from .configurations_binary_writer import (
+    MAGIC,
+    VERSION,
+    HEADER_FORMAT,
+    ELEMENT_LENGTH_FORMAT,
+    DATA_ALIGNMENT,
+    row_bytes
+)
+
+
+class ConfigurationsBinaryReader(TextToModel):
+    """Read a list of configurations from a binary file with packed bits.
+
+    See ConfigurationsBinaryWriter for the description of the format.
+    The rows are memory-mapped, so opening a file is fast regardless of its size:
+    `read_packed_rows` gives direct (zero-copy) access to the packed rows, `inclusion_matrix`
+    unpacks them into a boolean matrix, and `transform` loads them into a compact
+    ProductLineModel, whose feature table is the registry of the reader (see `set_registry`).
+    `iter_ids` reads the configurations as arrays of ids of the elements in the registry.
+    """
+
+    @staticmethod
+    def get_source_extension() -> str:
+        return 'plb'
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.registry: FeatureRegistry = FeatureRegistry()
+
+    def set_registry(self, registry: FeatureRegistry) -> None:
+        """Registry of the ids of the elements. A frozen registry (e.g., the one of the feature
+        model) is not modified: if the file has elements that are not in it, `registry`
+        becomes an overlay of it with them."""
+        self.registry = registry
+
+    @profiled('ConfigurationsBinaryReader')
+    def transform(self) -> ProductLineModel:
+        elements, packed_rows = self.read_packed_rows()
+        self.registry = self.registry.with_features(elements)
+        element_ids = self.registry.ids(elements, add=False)
+        masks = _masks(packed_rows)
+        if element_ids != list(range(len(element_ids))):
+            # The bits of the file are not the ids of the registry
+            masks = (self.registry.mask(element_ids[i] for i in self.registry.mask_ids(mask))
+                     for mask in masks)
+        pl_model = ProductLineModel(registry=self.registry)
+        pl_model.set_masks(self.registry, masks)
+        return pl_model
+
+    def iter_ids(self) -> Iterator[list[int]]:
+        """Yield each configuration as the array of ids (in the registry) of its selected
+        elements."""
+        elements, packed_rows = self.read_packed_rows()
+        self.registry = self.registry.with_features(elements)
+        element_ids = self.registry.ids(elements, add=False)
+        for mask in _masks(packed_rows):
+            yield [element_ids[i] for i in self.registry.mask_ids(mask)]
+
+    def read_packed_rows(self) -> tuple[list[str], np.ndarray]:
+        """Return the elements and the read-only memory-mapped matrix of packed rows
+        (configurations x bytes)."""
+        with open(self.path, 'rb') as file:
+            elements, n_rows, data_offset = read_header(file)
+        row_size = row_bytes(len(elements))
+        if n_rows * row_size > 0 and os.path.getsize(self.path) < data_offset + n_rows * row_size:
+            raise ParsingException(f'Truncated configurations binary file: {self.path}')
+        if n_rows == 0 or row_size == 0:
+            return elements, np.zeros((n_rows, row_size), dtype=np.uint8)
+        packed_rows = np.memmap(self.path, dtype=np.uint8, mode='r', offset=data_offset,
+                                shape=(n_rows, row_size))
+        return elements, packed_rows
+
+    def inclusion_matrix(self) -> tuple[list[str], np.ndarray]:
+        """Return the elements and the boolean matrix of configurations x elements,
+        as in the PLInclusionMatrix operation."""
+        elements, packed_rows = self.read_packed_rows()
+        matrix = np.unpackbits(packed_rows, axis=1, count=len(elements), bitorder='little')
+        return elements, matrix.astype(bool)
+
+
+def read_header(file: BinaryIO) -> tuple[list[str], int, int]:
+    """Return the elements, the number of rows, and the offset of the rows in the file."""
+    magic, version, n_elements, n_rows = struct.unpack(HEADER_FORMAT,
+                                                       _read(file, struct.calcsize(HEADER_FORMAT)))
+    if magic != MAGIC:
+        raise ParsingException(f'Invalid configurations binary file: {file.name}')
+    if version != VERSION:
+        raise ParsingException(f'Unsupported version {version} of configurations binary file.')
+    elements = []
+    for _ in range(n_elements):
+        (length,) = struct.unpack(ELEMENT_LENGTH_FORMAT,
+                                  _read(file, struct.calcsize(ELEMENT_LENGTH_FORMAT)))
+        try:
+            elements.append(_read(file, length).decode('utf-8'))
+        except UnicodeDecodeError as exception:
+            raise ParsingException(f'Invalid element name in configurations binary file: '
+                                   f'{file.name}') from exception
+    position = file.tell()
+    return elements, n_rows, position + (-position % DATA_ALIGNMENT)
+
+
+def _read(file: BinaryIO, size: int) -> bytes:
+    """Next `size` bytes of the file, which must not end before."""
+    data = file.read(size)
+    if len(data) != size:
+        raise ParsingException(f'Truncated configurations binary file: {file.name}')
+    return data
+
+
+def _masks(packed_rows: np.ndarray) -> Iterator[int]:
+    n_rows, row_size = packed_rows.shape
+    if row_size == 0:
+        yield from (0 for _ in range(n_rows))
+        return
+    data = memoryview(np.ascontiguousarray(packed_rows)).cast('B')
+    for start in range(0, n_rows * row_size, row_size):
+        yield int.from_bytes(data[start:start + row_size], 'little')
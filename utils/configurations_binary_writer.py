@@ -0,0 +1,143 @@
+import struct
+from typing import BinaryIO, Iterable, Optional
+
+from flamapy.core.exceptions import FlamaException
+from flamapy.core.transformations import ModelToText
+from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry, ProductLineModel
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+
+MAGIC = b'PLBITS'
+VERSION = 1
+HEADER_FORMAT = '<6sHIQ'  # magic, version, number of elements, number of configurations
+ELEMENT_LENGTH_FORMAT = '<I'
+DATA_ALIGNMENT = 8
+
+
+class ConfigurationsBinaryWriter(ModelToText):
+    """Write a list of configurations to a binary file with packed bits.
+
+    The binary format is as follows (little-endian):
+    - Header: magic b'PLBITS', version (uint16), number of elements N (uint32),
+      number of configurations M (uint64).
+    - Elements table: for each element, the length (uint32) and the UTF-8 bytes of its name.
+    - Padding with zeros up to a multiple of 8 bytes.
+    - M rows of ceil(N / 8) bytes each. The bit i of a row (bit i % 8 of the byte i // 8)
+      is set if the element i is selected in the configuration.
+
+    The rows have a fixed width, so the file can be memory-mapped (see
+    ConfigurationsBinaryReader). The content is binary, so `transform` writes the file and
+    returns nothing; `write` does the same and returns the number of rows. The configurations
+    are written as they are consumed, so they can be a generator. All their selected elements
+    must be in the elements of the file. The configurations can also be given as arrays of ids
+    of a FeatureRegistry (see `set_id_rows`), whose features are the elements of the file.
+    """
+
+    @staticmethod
+    def get_destination_extension() -> str:
+        return 'plb'
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.elements: list[str] = []
+        self.configurations: Iterable[Configuration] = []
+        self.product_line: Optional[ProductLineModel] = None
+        self.registry: Optional[FeatureRegistry] = None
+        self.id_rows: Iterable[Iterable[int]] = []
+
+    def set_elements(self, elements: list[str]) -> None:
+        """Elements of the configurations, in the order of the bits of the rows."""
+        self.elements = elements
+
+    def set_configurations(self, configurations: Iterable[Configuration]) -> None:
+        """Configurations to be serialized (any iterable, e.g., a generator)."""
+        self.configurations = configurations
+
+    def set_product_line(self, pl_model: ProductLineModel) -> None:
+        """Product line to be serialized, instead of elements and configurations.
+
+        The rows of a compact product line are written directly from its masks.
+        """
+        self.product_line = pl_model
+
+    def set_id_rows(self, registry: FeatureRegistry, id_rows: Iterable[Iterable[int]]) -> None:
+        """Configurations to be serialized as arrays of ids of the registry, instead of
+        elements and configurations."""
+        self.registry = registry
+        self.id_rows = id_rows
+
+    def transform(self) -> None:
+        self.write()
+
+    @profiled('ConfigurationsBinaryWriter')
+    def write(self) -> int:
+        """Write the file and return the number of rows written."""
+        with open(self.path, 'wb') as file:
+            if self.registry is not None:
+                return write_masks_binary(file, self.registry.features(),
+                                          map(self.registry.mask, self.id_rows))
+            if self.product_line is None:
+                return write_configurations_binary(file, self.elements, self.configurations)
+            if self.product_line.is_compact():
+                return write_masks_binary(file,
+                                          self.product_line.registry().features(),
+                                          self.product_line.masks())
+            return write_configurations_binary(file,
+                                               sorted(self.product_line.features()),
+                                               self.product_line.configurations)
+
+
+def write_configurations_binary(file: BinaryIO,
+                                elements: list[str],
+                                configurations: Iterable[Configuration]) -> int:
+    """Write the configurations to the file and return the number of rows written.
+
+    A selected element that is not in the elements raises a FlamaException, since the file
+    could not represent the configuration.
+    """
+    elements_index = {element: i for i, element in enumerate(elements)}
+
+    def masks() -> Iterable[int]:
+        for config in configurations:
+            mask = 0
+            for element in config.get_selected_elements():
+                index = elements_index.get(element)
+                if index is None:
+                    raise FlamaException(f'Element {element} not found in the elements of '
+                                         f'the file')
+                mask |= 1 << index
+            yield mask
+
+    return write_masks_binary(file, elements, masks())
+
+
+def write_masks_binary(file: BinaryIO, elements: list[str], masks: Iterable[int]) -> int:
+    """Write the rows given as bitmasks (bit i for elements[i]) and return the number of rows.
+
+    The number of rows in the header is updated at the end, so the file must be seekable.
+    """
+    header_position = file.tell()
+    file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(elements), 0))
+    size = struct.calcsize(HEADER_FORMAT)
+    for element in elements:
+        name = element.encode('utf-8')
+        file.write(struct.pack(ELEMENT_LENGTH_FORMAT, len(name)))
+        file.write(name)
+        size += struct.calcsize(ELEMENT_LENGTH_FORMAT) + len(name)
+    file.write(bytes(-size % DATA_ALIGNMENT))
+    row_size = row_bytes(len(elements))
+    n_rows = 0
+    for mask in masks:
+        file.write(mask.to_bytes(row_size, 'little'))
+        n_rows += 1
+    end_position = file.tell()
+    file.seek(header_position)
+    file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(elements), n_rows))
+    file.seek(end_position)
+    return n_rows
+
+
+def row_bytes(n_elements: int) -> int:
+    """Number of bytes of each row."""
+    return (n_elements + 7) // 8
@@ -1,7 +1,10 @@
 import csv
+from typing import Iterator
 
 from flamapy.core.transformations import TextToModel
 from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry
+from flamapy.metamodels.productline_metamodel.profiling import profiled
 
 
 class ConfigurationsCSVReader(TextToModel):
@@ -16,6 +19,9 @@ class ConfigurationsCSVReader(TextToModel):
 
     It has a "store_only_selected_elements" parameter (default to False) to indicate that configurations
     save only those elements with a True value.
+
+    `iter_ids` reads the configurations as arrays of ids of the selected elements in a
+    FeatureRegistry (see `set_registry`), without building a dictionary per row.
     """
 
     @staticmethod
@@ -25,10 +31,18 @@ class ConfigurationsCSVReader(TextToModel):
     def __init__(self, path: str) -> None:
         self.path: str = path
         self._only_selected_elements: bool = False
+        self.registry: FeatureRegistry = FeatureRegistry()
 
     def store_only_selected_elements(self, only_selected_elements: bool = False) -> None:
         self._only_selected_elements = only_selected_elements
 
+    def set_registry(self, registry: FeatureRegistry) -> None:
+        """Registry of the ids of the elements used by `iter_ids`. A frozen registry (e.g., the
+        one of the feature model) is not modified: if the header has elements that are not in
+        it, `registry` becomes an overlay of it with them."""
+        self.registry = registry
+
+    @profiled('ConfigurationsCSVReader')
     def transform(self) -> list[Configuration]:
         with open(self.path, newline='', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile, delimiter=',', quotechar='"', skipinitialspace=True)
@@ -39,6 +53,21 @@ class ConfigurationsCSVReader(TextToModel):
                                                                 self._only_selected_elements))
         return configurations
 
+    def iter_ids(self) -> Iterator[list[int]]:
+        """Yield each configuration as the array of ids (in the registry) of its selected
+        elements."""
+        with open(self.path, newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile, delimiter=',', quotechar='"', skipinitialspace=True)
+            header = next(reader, None)
+            if header is None:
+                return
+            self.registry = self.registry.with_features(header)
+            header_ids = self.registry.ids(header, add=False)
+            for row in reader:
+                if row:
+                    yield [element_id for element_id, value in zip(header_ids, row)
+                           if value.lower() == 'true']
+
 
 def from_csv_to_configuration(content: dict[str, str],
                               store_only_selected_elements: bool) -> Configuration:
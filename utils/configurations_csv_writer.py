@@ -1,9 +1,14 @@
+from typing import Iterable, Iterator, Optional, TextIO
+
 from flamapy.core.transformations import ModelToText
 from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry
+from flamapy.metamodels.productline_metamodel.profiling import profiled
 
 
 CSV_SEPARATOR = ','
 LINE_SEPARATOR = '\n'
+CHUNK_SIZE = 10000  # Number of rows written at once
 
 
 class ConfigurationsCSVWriter(ModelToText):
@@ -15,7 +20,13 @@ class ConfigurationsCSVWriter(ModelToText):
     True, False, False,..., False
     True, True, True,..., True
     ...
-    
+
+    `transform` writes the file and returns its content. To write large numbers of
+    configurations, use `write` instead: the rows are written to the file in chunks as the
+    configurations are consumed, so the configurations can be a generator and the memory used
+    does not depend on their number.
+    The configurations can also be given as arrays of ids of a FeatureRegistry (see
+    `set_id_rows`), whose features are the header of the file.
     """
 
     @staticmethod
@@ -26,28 +37,117 @@ class ConfigurationsCSVWriter(ModelToText):
         self.path = path
         self.elements = []
         self.configurations = []
+        self.registry: Optional[FeatureRegistry] = None
+        self.id_rows: Iterable[Iterable[int]] = []
 
     def set_elements(self, elements: list[str]) -> None:
         """Elements to be appeared as header in the CSV file."""
         self.elements = elements
 
-    def set_configurations(self, configurations: list[Configuration]) -> None:
-        """Configurations to be serialized."""
+    def set_configurations(self, configurations: Iterable[Configuration]) -> None:
+        """Configurations to be serialized (any iterable, e.g., a generator)."""
         self.configurations = configurations
 
+    def set_id_rows(self, registry: FeatureRegistry, id_rows: Iterable[Iterable[int]]) -> None:
+        """Configurations to be serialized as arrays of ids of the registry, instead of
+        elements and configurations."""
+        self.registry = registry
+        self.id_rows = id_rows
+
+    @profiled('ConfigurationsCSVWriter')
     def transform(self) -> str:
-        configs_str = configurations_to_csv(self.elements, self.configurations)
+        elements, rows = self._header_and_rows()
+        configs_str = csv_text(elements, rows)
         with open(self.path, 'w', encoding='utf-8') as file:
             file.write(configs_str)
         return configs_str
 
+    @profiled('ConfigurationsCSVWriter')
+    def write(self) -> int:
+        """Write the file in chunks of rows, without keeping its content in memory, and return
+        the number of rows written."""
+        elements, rows = self._header_and_rows()
+        with open(self.path, 'w', encoding='utf-8') as file:
+            return write_csv_rows(file, elements, rows)
+
+    def _header_and_rows(self) -> tuple[list[str], Iterable[str]]:
+        if self.registry is None:
+            return self.elements, csv_rows(self.elements, self.configurations)
+        elements = self.registry.features()
+        return elements, csv_id_rows(len(elements), self.id_rows)
+
+
+def write_configurations_csv(file: TextIO,
+                             elements: list[str],
+                             configurations: Iterable[Configuration],
+                             chunk_size: int = CHUNK_SIZE) -> int:
+    """Write the CSV to the file in chunks of rows, and return the number of rows written."""
+    return write_csv_rows(file, elements, csv_rows(elements, configurations), chunk_size)
+
+
+def write_csv_rows(file: TextIO,
+                   elements: list[str],
+                   rows: Iterable[str],
+                   chunk_size: int = CHUNK_SIZE) -> int:
+    """Write the header and the given rows to the file in chunks of rows, and return the
+    number of rows written."""
+    file.write(CSV_SEPARATOR.join(elements))
+    file.write(LINE_SEPARATOR)
+    n_rows = 0
+    chunk: list[str] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            file.write(_join_rows(chunk, n_rows))
+            n_rows += len(chunk)
+            chunk = []
+    if chunk:
+        file.write(_join_rows(chunk, n_rows))
+        n_rows += len(chunk)
+    return n_rows
 
-def configurations_to_csv(elements: list[str], configurations: list[Configuration]) -> str:
-    header = CSV_SEPARATOR.join(elements)
 
-    configs_str = []
+def _join_rows(rows: list[str], n_previous_rows: int) -> str:
+    # The rows are separated (not terminated) by the line separator
+    text = LINE_SEPARATOR.join(rows)
+    return text if n_previous_rows == 0 else f'{LINE_SEPARATOR}{text}'
+
+
+def csv_rows(elements: list[str], configurations: Iterable[Configuration]) -> Iterator[str]:
+    """Rows of the CSV (without the header) for the configurations.
+
+    The cells of each row are filled from the selected elements of the configuration using
+    the index of the elements in the header.
+    """
+    header_index: dict[str, list[int]] = {}
+    for i, element in enumerate(elements):
+        header_index.setdefault(element, []).append(i)
+    false_row = [str(False)] * len(elements)
+    true_str = str(True)
     for config in configurations:
-        configs_elements = [f for f in config.get_selected_elements()]
-        row = CSV_SEPARATOR.join((str(f in configs_elements) for f in elements))
-        configs_str.append(row)
-    return f'{header}{LINE_SEPARATOR}{LINE_SEPARATOR.join(configs_str)}'
+        row = list(false_row)
+        for element in config.get_selected_elements():
+            for i in header_index.get(element, ()):
+                row[i] = true_str
+        yield CSV_SEPARATOR.join(row)
+
+
+def csv_id_rows(n_elements: int, id_rows: Iterable[Iterable[int]]) -> Iterator[str]:
+    """Rows of the CSV (without the header) for the configurations given as arrays of ids,
+    where the id i is the element of the column i."""
+    false_row = [str(False)] * n_elements
+    true_str = str(True)
+    for ids in id_rows:
+        row = list(false_row)
+        for element_id in ids:
+            row[element_id] = true_str
+        yield CSV_SEPARATOR.join(row)
+
+
+def configurations_to_csv(elements: list[str], configurations: Iterable[Configuration]) -> str:
+    return csv_text(elements, csv_rows(elements, configurations))
+
+
+def csv_text(elements: list[str], rows: Iterable[str]) -> str:
+    header = CSV_SEPARATOR.join(elements)
+    return f'{header}{LINE_SEPARATOR}{LINE_SEPARATOR.join(rows)}'
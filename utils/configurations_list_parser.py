@@ -0,0 +1,43 @@
+import ast
+import re
+from typing import Optional
+
+from flamapy.core.exceptions import ParsingException
+
+
+STRING = r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*\""""
+LIST_PATTERN = re.compile(rf'\s*\[\s*(?:(?:{STRING})\s*(?:,\s*(?:{STRING})\s*)*,?\s*)?\]\s*')
+STRING_PATTERN = re.compile(STRING)
+
+
+def parse_elements_list(text: str, interned: Optional[dict[str, str]] = None) -> list[str]:
+    """Parse a list of elements written as a Python list of strings: ['A', 'B', ...].
+
+    Only lists of string literals are accepted, so, unlike `eval`, no code is executed.
+    If a dictionary `interned` is provided, equal names share the same string object
+    (the dictionary is updated with the new names), which reduces the memory used by large
+    sets of configurations.
+    """
+    elements = _parse_simple_list(text.strip())
+    if elements is None:
+        if LIST_PATTERN.fullmatch(text) is None:
+            raise ParsingException(f'Invalid list of elements: {text!r}')
+        elements = [ast.literal_eval(token) if '\\' in token else token[1:-1]
+                    for token in STRING_PATTERN.findall(text)]
+    if interned is not None:
+        elements = [interned.setdefault(element, element) for element in elements]
+    return elements
+
+
+def _parse_simple_list(text: str) -> Optional[list[str]]:
+    """Fast path for the lists written by `str(list)` whose elements have no quotes nor
+    escape sequences: ['A', 'B', ...]. Return None for any other text."""
+    if text == '[]':
+        return []
+    if not (text.startswith("['") and text.endswith("']")) or '\\' in text or '"' in text:
+        return None
+    elements = text[2:-2].split("', '")
+    # Any other quote in the text would be part of a different separator
+    if text.count("'") != 2 * len(elements):
+        return None
+    return elements
@@ -1,5 +1,11 @@
+from typing import Iterator
+
 from flamapy.core.transformations import TextToModel
 from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry
+from flamapy.metamodels.productline_metamodel.profiling import profiled
+
+from .configurations_list_parser import parse_elements_list
 
 
 class ConfigurationsListReader(TextToModel):
@@ -12,6 +18,10 @@ class ConfigurationsListReader(TextToModel):
     ...
 
     Each list represents the selected elements in a configuration.
+    The file is parsed line by line without evaluating its content, and the names of the
+    elements are shared among configurations. Use `iter_configurations` to read the
+    configurations one by one in constant memory, or `iter_ids` to read them as arrays of ids
+    of the elements in a FeatureRegistry (see `set_registry`).
     """
 
     @staticmethod
@@ -20,12 +30,33 @@ class ConfigurationsListReader(TextToModel):
 
     def __init__(self, path: str) -> None:
         self.path = path
+        self.registry: FeatureRegistry = FeatureRegistry()
+
+    def set_registry(self, registry: FeatureRegistry) -> None:
+        """Registry of the ids of the elements used by `iter_ids`. A frozen registry (e.g., the
+        one of the feature model) is not modified: if the file has elements that are not in it,
+        `registry` becomes an overlay of it with them."""
+        self.registry = registry
 
+    @profiled('ConfigurationsListReader')
     def transform(self) -> list[Configuration]:
+        return list(self.iter_configurations())
+
+    def iter_configurations(self) -> Iterator[Configuration]:
+        interned: dict[str, str] = {}
+        with open(self.path, newline='', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    elements = {element: True for element in parse_elements_list(line, interned)}
+                    yield Configuration(elements)
+
+    def iter_ids(self) -> Iterator[list[int]]:
+        """Yield each configuration as the array of ids (in the registry) of its selected
+        elements."""
+        interned: dict[str, str] = {}
         with open(self.path, newline='', encoding='utf-8') as file:
-            configurations = []
-            for line in file.readlines():
-                elements = {element: True for element in eval(line)}
-                config = Configuration(elements)
-                configurations.append(config)
-        return configurations
+            for line in file:
+                if line.strip():
+                    elements = parse_elements_list(line, interned)
+                    self.registry = self.registry.with_features(elements)
+                    yield list(dict.fromkeys(self.registry.ids(elements, add=False)))
@@ -1,8 +1,12 @@
+from typing import Iterable, TextIO
+
 from flamapy.core.transformations import ModelToText
 from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.productline_metamodel.profiling import profiled
 
 
 LINE_SEPARATOR = '\n'
+CHUNK_SIZE = 10000  # Number of lines written at once
 
 
 class ConfigurationsListWriter(ModelToText):
@@ -15,6 +19,10 @@ class ConfigurationsListWriter(ModelToText):
     ...
 
     Each list represents the selected elements in a configuration.
+
+    `transform` writes the file and returns its content. To write large numbers of
+    configurations (e.g., the lazy result of FullConfigurations), use `write` instead: the
+    lines are written to the file in chunks as the configurations are consumed.
     """
 
     @staticmethod
@@ -25,12 +33,46 @@ class ConfigurationsListWriter(ModelToText):
         self.path = path
         self.configurations = []
 
-    def set_configurations(self, configurations: list[Configuration]):
-        """Configurations to be serialized."""
+    def set_configurations(self, configurations: Iterable[Configuration]):
+        """Configurations to be serialized (any iterable, e.g., a generator)."""
         self.configurations = configurations
 
+    @profiled('ConfigurationsListWriter')
     def transform(self) -> str:
+        result = LINE_SEPARATOR.join(str(config.get_selected_elements())
+                                     for config in self.configurations)
         with open(self.path, 'w', encoding='utf-8') as file:
-            result = f'{LINE_SEPARATOR.join(str(config.get_selected_elements()) for config in self.configurations)}'
             file.write(result)
         return result
+
+    @profiled('ConfigurationsListWriter')
+    def write(self) -> int:
+        """Write the file in chunks of lines, without keeping its content in memory, and return
+        the number of configurations written."""
+        with open(self.path, 'w', encoding='utf-8') as file:
+            return write_configurations_list(file, self.configurations)
+
+
+def write_configurations_list(file: TextIO,
+                              configurations: Iterable[Configuration],
+                              chunk_size: int = CHUNK_SIZE) -> int:
+    """Write one line per configuration to the file in chunks of lines, and return the number
+    of lines written."""
+    n_lines = 0
+    chunk: list[str] = []
+    for config in configurations:
+        chunk.append(str(config.get_selected_elements()))
+        if len(chunk) >= chunk_size:
+            file.write(_join_lines(chunk, n_lines))
+            n_lines += len(chunk)
+            chunk = []
+    if chunk:
+        file.write(_join_lines(chunk, n_lines))
+        n_lines += len(chunk)
+    return n_lines
+
+
+def _join_lines(lines: list[str], n_previous_lines: int) -> str:
+    # The lines are separated (not terminated) by the line separator
+    text = LINE_SEPARATOR.join(lines)
+    return text if n_previous_lines == 0 else f'{LINE_SEPARATOR}{text}'
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Optional
+
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.fm_metamodel.transformations import UVLReader, FMSecureFeaturesNames
+from flamapy.metamodels.pysat_metamodel.models import PySATModel
+from flamapy.metamodels.pysat_metamodel.transformations import FmToPysat
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
+from flamapy.metamodels.bdd_metamodel.transformations import FmToBDD
+from flamapy.metamodels.productline_metamodel.profiling import profiled, span
+
+
+LOGGER = logging.getLogger('ModelCache')
+
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = '.flamapy_cache'
+SAT_FILE = 'sat.json'
+BDD_FILE = 'bdd.json'
+BDD_VARIABLES_FILE = 'bdd_variables.json'
+INDEX_DIR = 'index'
+
+
+class ModelCache:
+    """On-disk cache of the models compiled from UVL files.
+
+    For each UVL file, the cache stores the clauses and the variables of the SAT model
+    (FmToPysat) and the BDD with its variables (FmToBDD), so that later runs load them instead
+    of compiling them again. The entries are keyed by the hash of the content of the UVL file:
+    when the file changes, the models are compiled again. The stale entries are removed by
+    `prune`, which must not run while other processes use the cache.
+    The feature model itself is always parsed from the UVL file, since it is cheap.
+
+    Usage:
+        cache = ModelCache()
+        fm_model = cache.feature_model('models/BMW.uvl')
+        sat_model = cache.sat_model('models/BMW.uvl', fm_model)
+        bdd_model = cache.bdd_model('models/BMW.uvl', fm_model)
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        self._feature_models: dict[str, FeatureModel] = {}
+        self._keys: dict[str, tuple[int, int, str]] = {}  # path -> (mtime, size, key)
+
+    def key(self, fm_filepath: str) -> str:
+        """Key of the cache entry of the UVL file: the hash of its content.
+
+        The key is only computed again when the modification time or the size of the file
+        change.
+        """
+        source = os.path.abspath(fm_filepath)
+        stat = os.stat(source)
+        memo = self._keys.get(source)
+        if memo is not None and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return memo[2]
+        sha = hashlib.sha256(f'v{CACHE_VERSION}'.encode('utf-8'))
+        with open(source, 'rb') as file:
+            sha.update(file.read())
+        key = sha.hexdigest()
+        self._keys[source] = (stat.st_mtime_ns, stat.st_size, key)
+        return key
+
+    def entry_dir(self, fm_filepath: str) -> str:
+        return os.path.join(self.cache_dir, self.key(fm_filepath))
+
+    @profiled('UVLReader')
+    def feature_model(self, fm_filepath: str) -> FeatureModel:
+        key = self.key(fm_filepath)
+        if key not in self._feature_models:
+            self._feature_models[key] = UVLReader(fm_filepath).transform()
+        return self._feature_models[key]
+
+    @profiled('FmToPysat')
+    def sat_model(self, fm_filepath: str, fm_model: Optional[FeatureModel] = None) -> PySATModel:
+        if fm_model is None:
+            fm_model = self.feature_model(fm_filepath)
+        fm = fm_model
+        return self._load_or_build(fm_filepath,
+                                   [SAT_FILE],
+                                   lambda entry: _load_sat_model(entry, fm),
+                                   lambda: FmToPysat(fm).transform(),
+                                   _save_sat_model)
+
+    @profiled('FmToBDD')
+    def bdd_model(self, fm_filepath: str, fm_model: Optional[FeatureModel] = None) -> BDDModel:
+        if fm_model is None:
+            fm_model = self.feature_model(fm_filepath)
+        fm = fm_model
+        return self._load_or_build(fm_filepath,
+                                   [BDD_FILE, BDD_VARIABLES_FILE],
+                                   lambda entry: _load_bdd_model(entry, fm),
+                                   lambda: FmToBDD(fm).transform(),
+                                   _save_bdd_model)
+
+    def clear(self) -> None:
+        """Remove all the entries of the cache."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def prune(self) -> list[str]:
+        """Remove the entries that are not the current entry of any file (e.g., those of older
+        versions of the files), and return their keys."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        index_dir = os.path.join(self.cache_dir, INDEX_DIR)
+        current = set()
+        if os.path.isdir(index_dir):
+            for name in os.listdir(index_dir):
+                try:
+                    with open(os.path.join(index_dir, name), encoding='utf-8') as file:
+                        current.add(json.load(file)['key'])
+                except (OSError, ValueError, KeyError):
+                    continue
+        removed = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name != INDEX_DIR and name not in current and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def _load_or_build(self,
+                       fm_filepath: str,
+                       files: list[str],
+                       load: Callable[[str], Any],
+                       build: Callable[[], Any],
+                       save: Callable[[Any, str], None]) -> Any:
+        key = self.key(fm_filepath)
+        entry = os.path.join(self.cache_dir, key)
+        if all(os.path.exists(os.path.join(entry, file)) for file in files):
+            try:
+                with span('ModelCache.load'):
+                    return load(entry)
+            except (OSError, ValueError, KeyError) as exception:
+                LOGGER.warning('Invalid cache entry %s (%s), rebuilding it.', entry, exception)
+        with span('ModelCache.build'):
+            model = build()
+        with span('ModelCache.save'):
+            os.makedirs(entry, exist_ok=True)
+            self._update_index(fm_filepath, key)
+            save(model, entry)
+        return model
+
+    def _update_index(self, fm_filepath: str, key: str) -> None:
+        """Record the current entry of the file.
+
+        Each file has its own index file, which is replaced atomically, so concurrent processes
+        do not lose the records of each other. The previous entry of the file is left in place
+        (see `prune`).
+        """
+        index_dir = os.path.join(self.cache_dir, INDEX_DIR)
+        os.makedirs(index_dir, exist_ok=True)
+        source = os.path.abspath(fm_filepath)
+        name = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        _write_json(os.path.join(index_dir, f'{name}.json'), {'source': source, 'key': key})
+
+
+def _save_sat_model(sat_model: PySATModel, entry: str) -> None:
+    content = {'variables': sat_model.variables,
+               'features': {str(var): name for var, name in sat_model.features.items()},
+               'auxiliary_variables': sorted(sat_model.auxiliary_variables),
+               'clauses': sat_model.get_all_clauses().clauses}
+    _write_json(os.path.join(entry, SAT_FILE), content)
+
+
+def _load_sat_model(entry: str, fm_model: FeatureModel) -> PySATModel:
+    with open(os.path.join(entry, SAT_FILE), encoding='utf-8') as file:
+        content = json.load(file)
+    sat_model = PySATModel()
+    sat_model.variables = content['variables']
+    sat_model.features = {int(var): name for var, name in content['features'].items()}
+    sat_model.auxiliary_variables = set(content['auxiliary_variables'])
+    for clause in content['clauses']:
+        sat_model.add_clause(clause)
+    sat_model.original_model = fm_model
+    return sat_model
+
+
+def _save_bdd_model(bdd_model: BDDModel, entry: str) -> None:
+    # The BDD is dumped to a temporary file, which is renamed when it is complete
+    fd, tmp_path = tempfile.mkstemp(dir=entry, suffix='.json')
+    os.close(fd)
+    bdd_model.save_bdd(tmp_path, roots={'root': bdd_model.root}, filetype='json')
+    os.replace(tmp_path, os.path.join(entry, BDD_FILE))
+    _write_json(os.path.join(entry, BDD_VARIABLES_FILE),
+                {'vars_order': bdd_model.vars_order, 'features_vars': bdd_model.features_vars})
+
+
+def _load_bdd_model(entry: str, fm_model: FeatureModel) -> BDDModel:
+    with open(os.path.join(entry, BDD_VARIABLES_FILE), encoding='utf-8') as file:
+        variables = json.load(file)
+    bdd_model = BDDModel.load_bdd(os.path.join(entry, BDD_FILE), variables['vars_order'])
+    bdd_model.vars_order = variables['vars_order']
+    bdd_model.features_vars = variables['features_vars']
+    bdd_model.vars_features = {v: f for f, v in bdd_model.features_vars.items()}
+    bdd_model.original_model = FMSecureFeaturesNames(fm_model).transform()
+    return bdd_model
+
+
+def _write_json(path: str, content: Any) -> None:
+    """Write the JSON file atomically (to a temporary file that is then renamed)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        json.dump(content, file)
+    os.replace(tmp_path, path)
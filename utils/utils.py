@@ -1,12 +1,18 @@
+from flamapy.core.exceptions import FlamaException
 from flamapy.metamodels.configuration_metamodel.models import Configuration
 from flamapy.metamodels.fm_metamodel.models import FeatureModel, Feature
+from flamapy.metamodels.productline_metamodel.models import FeatureRegistry
 
 
 def complete_configuration_with_parents(configuration: Configuration, fm_model: FeatureModel) -> Configuration:
+    registry = FeatureRegistry.get(fm_model)
     configs_elements = dict(configuration.elements)
     for element in configuration.get_selected_elements():
-        feature = fm_model.get_feature_by_name(element)
-        configs_elements.update({parent: True for parent in get_all_parents(feature)})
+        feature_id = registry.get_id(element)
+        if feature_id is None:
+            raise FlamaException(f'Feature {element} not found')
+        configs_elements.update(dict.fromkeys(registry.features(registry.ancestors(feature_id)),
+                                              True))
     return Configuration(configs_elements)
 
 